@@ -0,0 +1 @@
+from .datasets import DATASETS, clear_cache, load_dataset, register_dataset
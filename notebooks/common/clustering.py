@@ -0,0 +1,382 @@
+"""
+Selección rápida del número de clusters para KMeans y el agrupamiento jerárquico.
+
+El bucle de los notebooks entrena un modelo por cada k y calcula `silhouette_score` para cada
+uno, lo que repite el cálculo de todas las distancias entre pares de puntos (O(n²)) por cada k y
+reconstruye el árbol jerárquico desde cero. Aquí:
+
+- El árbol jerárquico se construye una vez y se corta en cada k.
+- Las distancias entre pares se calculan una única vez, por bloques, y cada bloque se reutiliza
+  para las siluetas de todos los k (y de todos los métodos que se evalúen juntos).
+- Con muchas filas la silueta se estima sobre una muestra fija, como `silhouette_score` con
+  `sample_size`, y el árbol se construye sobre una muestra a cuyos grupos se asigna el resto.
+- Los k de KMeans se reparten en cadenas que se entrenan en paralelo; dentro de cada cadena
+  cada modelo parte de los centros del k anterior más los nuevos centros necesarios.
+
+Uso:
+    import sys
+    sys.path.insert(0, '..')
+    from common.clustering import select_k
+
+    seleccion = select_k(df, range(2, 11), method='kmeans', random_state=10)
+    seleccion.best_k, seleccion.best_score, seleccion.best_labels
+
+    python -m common.clustering --replicate 1000
+"""
+import argparse
+import math
+import time
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.cluster.hierarchy import cut_tree, linkage as hierarchy_linkage
+from sklearn.cluster import AgglomerativeClustering, KMeans, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances_argmin, pairwise_distances_chunked, silhouette_score
+from sklearn.preprocessing import MaxAbsScaler
+from sklearn.utils import check_random_state
+
+from .datasets import load_dataset
+
+# Filas a partir de las cuales la silueta se estima sobre una muestra.
+SAMPLE_SIZE = 10000
+
+# Filas máximas con las que se construye el árbol jerárquico (memoria O(n²): unos 400 MB con 10000).
+MAX_LINKAGE_SAMPLES = 10000
+
+# Métodos de selección admitidos por `select_k`.
+METHODS = ('kmeans', 'agglomerative')
+
+
+class KSelection(NamedTuple):
+    """
+    Resultado de la selección del número de clusters.
+
+    Attributes:
+        method (str): Método de agrupamiento ('kmeans' o 'agglomerative').
+        scores (Dict[int, float]): Silueta media de cada k.
+        labels (Dict[int, np.ndarray]): Grupo de cada fila para cada k.
+        models (Dict[int, object]): Modelo KMeans de cada k (vacío en el agrupamiento jerárquico).
+        linkage (np.ndarray): Matriz de enlace del árbol jerárquico, o None con KMeans.
+        best_k (int): El k de mayor silueta (el menor, a igualdad).
+        elapsed (float): Segundos empleados.
+    """
+    method: str
+    scores: Dict[int, float]
+    labels: Dict[int, np.ndarray]
+    models: Dict[int, object]
+    linkage: np.ndarray
+    best_k: int
+    elapsed: float
+
+    @property
+    def best_score(self) -> float:
+        """ Silueta media del mejor k. """
+        return self.scores[self.best_k]
+
+    @property
+    def best_labels(self) -> np.ndarray:
+        """ Grupos del mejor k. """
+        return self.labels[self.best_k]
+
+    @property
+    def best_model(self):
+        """ Modelo KMeans del mejor k, o None en el agrupamiento jerárquico. """
+        return self.models.get(self.best_k)
+
+
+def silhouette_scores(X, labelings: Dict, sample_size: int = SAMPLE_SIZE, metric: str = 'euclidean',
+                      random_state: int = 0, working_memory: int = None) -> Dict:
+    """
+    Calcula la silueta media de varios agrupamientos de los mismos datos con una sola pasada.
+
+    Las distancias entre pares se calculan por bloques de filas con `pairwise_distances_chunked`
+    y cada bloque se multiplica por la codificación one-hot de todos los agrupamientos a la vez,
+    de modo que cada distancia se calcula una única vez para todos ellos. La memoria es la de un
+    bloque más la de las sumas de distancias (filas × grupos de todos los agrupamientos).
+
+    Sin muestreo el resultado coincide con `silhouette_score`. Con más de `sample_size` filas se
+    usa la misma muestra aleatoria para todos los agrupamientos, como `silhouette_score` con
+    `sample_size`, por lo que las comparaciones entre ellos no dependen de muestras distintas.
+
+    Args:
+        X: Datos, con una fila por muestra.
+        labelings (Dict): Grupos de cada fila por nombre del agrupamiento (por ejemplo, k).
+        sample_size (int, optional): Filas de la muestra, o None para usar todas. Default: `SAMPLE_SIZE`.
+        metric (str, optional): Métrica de distancia. Default: 'euclidean'.
+        random_state (int, optional): Semilla de la muestra. Default: 0.
+        working_memory (int, optional): MiB máximos de cada bloque de distancias. Default: el de scikit-learn.
+
+    Returns:
+        Dict: La silueta media de cada agrupamiento.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    rows = _sample(len(X), sample_size, random_state)
+    sample = X[rows] if rows is not None else X
+
+    codes: Dict = dict()
+    offsets: Dict = dict()
+    total = 0
+    for name, labels in labelings.items():
+        labels = np.asarray(labels)
+        labels = labels[rows] if rows is not None else labels
+        _, inverse = np.unique(labels, return_inverse=True)
+        groups = int(inverse.max()) + 1 if len(inverse) else 0
+        if not 2 <= groups <= len(sample) - 1:
+            raise ValueError(f"Number of labels is {groups}. Valid values are 2 to n_samples - 1 (inclusive)")
+        codes[name] = inverse
+        offsets[name] = total
+        total += groups
+
+    onehot = np.zeros((len(sample), total), dtype=np.float64)
+    index = np.arange(len(sample))
+    for name, inverse in codes.items():
+        onehot[index, offsets[name] + inverse] = 1.0
+
+    # Suma de distancias de cada fila a cada grupo de todos los agrupamientos.
+    sums = np.vstack(list(pairwise_distances_chunked(sample, reduce_func=lambda chunk, start: chunk @ onehot,
+                                                     metric=metric, working_memory=working_memory)))
+
+    scores = dict()
+    for name, inverse in codes.items():
+        counts = np.bincount(inverse)
+        group_sums = sums[:, offsets[name]:offsets[name] + len(counts)]
+        own = counts[inverse]
+        intra = group_sums[index, inverse] / np.maximum(own - 1, 1)
+        inter = group_sums / counts
+        inter[index, inverse] = np.inf
+        inter = inter.min(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = (inter - intra) / np.maximum(intra, inter)
+        values = np.nan_to_num(np.where(own > 1, values, 0.0))
+        scores[name] = float(values.mean())
+    return scores
+
+
+def kmeans_sweep(X, ks: Iterable[int], n_jobs: int = None, warm_start: bool = True, random_state: int = 10,
+                 batch_size: int = None, **kmeans) -> Dict[int, object]:
+    """
+    Entrena un modelo KMeans por cada k, repartiendo los k en cadenas que se entrenan en paralelo.
+
+    Los k se ordenan y se dividen en tantas cadenas consecutivas como procesos. El primer k de
+    cada cadena se entrena desde cero; con `warm_start`, los siguientes parten de los centros del
+    k anterior más los centros que faltan, elegidos como en k-means++, por lo que convergen en
+    menos iteraciones. Con un `n_init` entero mayor que 1, el arranque desde el k anterior
+    sustituye a una de las inicializaciones y se conserva el modelo de menor inercia. Los
+    resultados dependen del reparto en cadenas, es decir, de `n_jobs`.
+
+    Args:
+        X: Datos, con una fila por muestra.
+        ks (Iterable[int]): Números de clusters.
+        n_jobs (int, optional): Procesos. Default: None (uno).
+        warm_start (bool, optional): Parte de los centros del k anterior. Default: True.
+        random_state (int, optional): Semilla. Default: 10.
+        batch_size (int, optional): Si se indica, se usa `MiniBatchKMeans` con ese tamaño de lote,
+            más adecuado para millones de filas. Default: None.
+        **kmeans: Otros argumentos de `KMeans` o `MiniBatchKMeans`.
+
+    Returns:
+        Dict[int, object]: El modelo entrenado de cada k.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    ks = _check_ks(ks)
+    chains = [chain.tolist() for chain in np.array_split(ks, min(effective_n_jobs(n_jobs), len(ks)))]
+    # Semilla de los centros añadidos en cada k, derivada de `random_state` (que puede ser None o un generador).
+    seeds = dict(zip(ks, check_random_state(random_state).randint(np.iinfo(np.int32).max, size=len(ks)).tolist()))
+    results = Parallel(n_jobs=n_jobs)(delayed(_kmeans_chain)(X, chain, warm_start, random_state, seeds, batch_size,
+                                                             kmeans)
+                                      for chain in chains)
+    return {k: model for models in results for k, model in models.items()}
+
+
+def agglomerative_sweep(X, ks: Iterable[int], linkage: str = 'ward', max_samples: int = MAX_LINKAGE_SAMPLES,
+                        random_state: int = 0) -> Tuple[Dict[int, np.ndarray], np.ndarray]:
+    """
+    Agrupa jerárquicamente los datos para cada k construyendo el árbol una única vez.
+
+    El árbol se construye con `scipy.cluster.hierarchy.linkage` (el mismo criterio que
+    `AgglomerativeClustering`) y se corta en todos los k con `cut_tree`. Con más de
+    `max_samples` filas el árbol se construye sobre una muestra y cada fila se asigna al grupo
+    de centroide más cercano; es una aproximación, exacta sólo para los puntos de la muestra.
+
+    Args:
+        X: Datos, con una fila por muestra.
+        ks (Iterable[int]): Números de clusters.
+        linkage (str, optional): Criterio de enlace: 'ward', 'complete', 'average' o 'single'. Default: 'ward'.
+        max_samples (int, optional): Filas máximas del árbol, o None para usar todas. Default: `MAX_LINKAGE_SAMPLES`.
+        random_state (int, optional): Semilla de la muestra. Default: 0.
+
+    Returns:
+        Tuple[Dict[int, np.ndarray], np.ndarray]: Los grupos de cada k y la matriz de enlace.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    ks = _check_ks(ks)
+    if linkage not in ('ward', 'complete', 'average', 'single'):
+        raise ValueError(f"Unsupported linkage: {linkage}")
+    rows = _sample(len(X), max_samples, random_state)
+    sample = X[rows] if rows is not None else X
+    if ks[-1] > len(sample):
+        raise ValueError(f"Cannot make {ks[-1]} clusters from {len(sample)} samples")
+
+    tree = hierarchy_linkage(sample, method=linkage, metric='euclidean')
+    cuts = cut_tree(tree, n_clusters=ks)
+    labels = dict()
+    for column, k in enumerate(ks):
+        groups = cuts[:, column]
+        if rows is not None:
+            centroids = np.vstack([sample[groups == group].mean(axis=0) for group in range(k)])
+            groups = pairwise_distances_argmin(X, centroids)
+        labels[k] = groups
+    return labels, tree
+
+
+def select_k(X, ks: Iterable[int] = range(2, 11), method: str = 'kmeans', sample_size: int = SAMPLE_SIZE,
+             n_jobs: int = None, random_state: int = 10, **options) -> KSelection:
+    """
+    Elige el número de clusters con mayor silueta media, como el bucle de los notebooks.
+
+    Args:
+        X: Datos, con una fila por muestra.
+        ks (Iterable[int], optional): Números de clusters a probar. Default: de 2 a 10.
+        method (str, optional): 'kmeans' o 'agglomerative'. Default: 'kmeans'.
+        sample_size (int, optional): Filas de la muestra de la silueta, o None para usar todas.
+            Default: `SAMPLE_SIZE`.
+        n_jobs (int, optional): Procesos del barrido de KMeans. Default: None (uno).
+        random_state (int, optional): Semilla. Default: 10.
+        **options: Argumentos de `kmeans_sweep` o `agglomerative_sweep`.
+
+    Returns:
+        KSelection: Siluetas, grupos y modelos de cada k y el mejor k.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}. Expected one of {', '.join(METHODS)}")
+    start = time.perf_counter()
+    models = dict()
+    tree = None
+    if method == 'kmeans':
+        models = kmeans_sweep(X, ks, n_jobs=n_jobs, random_state=random_state, **options)
+        labels = {k: model.labels_ for k, model in models.items()}
+    else:
+        labels, tree = agglomerative_sweep(X, ks, random_state=random_state, **options)
+    scores = silhouette_scores(X, labels, sample_size=sample_size, random_state=random_state)
+
+    best_k = None
+    for k in sorted(scores):
+        if best_k is None or scores[k] > scores[best_k]:
+            best_k = k
+    return KSelection(method, scores, labels, models, tree, best_k, time.perf_counter() - start)
+
+
+def _check_ks(ks: Iterable[int]) -> List[int]:
+    """ Función privada que ordena los números de clusters y comprueba que son al menos 2. """
+    ks = sorted({int(k) for k in ks})
+    if not ks or ks[0] < 2:
+        raise ValueError("The numbers of clusters must be at least 2")
+    return ks
+
+
+def _sample(n: int, sample_size: int, random_state: int) -> np.ndarray:
+    """ Función privada con las filas ordenadas de una muestra, o None si no hace falta muestrear. """
+    if sample_size is None or n <= sample_size:
+        return None
+    return np.sort(check_random_state(random_state).choice(n, sample_size, replace=False))
+
+
+def _kmeans_chain(X: np.ndarray, ks: List[int], warm_start: bool, random_state: int, seeds: Dict[int, int],
+                  batch_size: int, kmeans: Dict) -> Dict[int, object]:
+    """
+    Función privada que entrena los k de una cadena en orden, cada uno a partir del anterior.
+
+    Returns:
+        Dict[int, object]: El modelo entrenado de cada k.
+    """
+    factory = KMeans if batch_size is None else MiniBatchKMeans
+    if batch_size is not None:
+        kmeans = dict(kmeans, batch_size=batch_size)
+    models = dict()
+    previous = None
+    for k in ks:
+        if warm_start and previous is not None:
+            init = _grow_centers(X, previous.cluster_centers_, k, check_random_state(seeds[k]))
+            model = factory(n_clusters=k, init=init, random_state=random_state, **dict(kmeans, n_init=1)).fit(X)
+            # El arranque desde el k anterior sustituye a una de las `n_init` inicializaciones.
+            n_init = kmeans.get('n_init', 'auto')
+            if isinstance(n_init, int) and n_init > 1:
+                cold = factory(n_clusters=k, random_state=random_state, **dict(kmeans, n_init=n_init - 1)).fit(X)
+                model = cold if cold.inertia_ < model.inertia_ else model
+        else:
+            model = factory(n_clusters=k, random_state=random_state, **kmeans).fit(X)
+        models[k] = previous = model
+    return models
+
+
+def _grow_centers(X: np.ndarray, centers: np.ndarray, k: int, random_state: np.random.RandomState) -> np.ndarray:
+    """
+    Función privada que añade centros hasta tener k con la selección voraz de k-means++.
+
+    Cada nuevo centro se elige entre varios candidatos muestreados con probabilidad proporcional
+    al cuadrado de la distancia al centro más cercano, quedándose con el que más reduce la inercia.
+    """
+    closest = np.min(_squared_distances(X, centers), axis=1)
+    trials = 2 + int(math.log(k))
+    centers = list(centers)
+    while len(centers) < k:
+        potential = closest.sum()
+        if potential > 0:
+            candidates = random_state.choice(len(X), trials, p=closest / potential)
+        else:
+            candidates = random_state.choice(len(X), trials)
+        distances = np.minimum(closest, _squared_distances(X, X[candidates]).T)
+        best = int(np.argmin(distances.sum(axis=1)))
+        centers.append(X[candidates[best]])
+        closest = distances[best]
+    return np.vstack(centers)
+
+
+def _squared_distances(X: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """ Función privada con las distancias euclídeas al cuadrado de cada fila a cada centro. """
+    distances = (X ** 2).sum(axis=1)[:, np.newaxis] - 2 * X @ centers.T + (centers ** 2).sum(axis=1)
+    return np.maximum(distances, 0)
+
+
+def _notebook_loop(X: np.ndarray, ks: List[int], method: str) -> Tuple[int, float]:
+    """ Función privada con el bucle original del notebook: un modelo y una silueta exacta por k. """
+    best_k, best_score = None, None
+    for k in ks:
+        if method == 'kmeans':
+            labels = KMeans(n_clusters=k, random_state=10).fit_predict(X)
+        else:
+            labels = AgglomerativeClustering(n_clusters=k).fit_predict(X)
+        score = silhouette_score(X, labels)
+        if best_score is None or best_score < score:
+            best_k, best_score = k, score
+    return best_k, best_score
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Selección de k frente al bucle del notebook")
+    parser.add_argument('--replicate', type=int, default=1, help="Copias (con ruido) de los datos de clientes")
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+    parser.add_argument('--no-baseline', dest='baseline', action='store_false', help="No ejecuta el bucle original")
+    options = parser.parse_args(args)
+
+    X = MaxAbsScaler().fit_transform(load_dataset('wholesale-customers').to_numpy(dtype=np.float64))
+    if options.replicate > 1:
+        noise = np.random.RandomState(0).normal(scale=0.01, size=(len(X) * options.replicate, X.shape[1]))
+        X = np.tile(X, (options.replicate, 1)) + noise
+    ks = list(range(2, 11))
+    print(f"{len(X)} filas, k de {ks[0]} a {ks[-1]}")
+
+    for method in METHODS:
+        if options.baseline:
+            start = time.perf_counter()
+            best_k, best_score = _notebook_loop(X, ks, method)
+            print(f"{method:<14} bucle       {time.perf_counter() - start:>9.2f}s  k={best_k}  silueta={best_score:.4f}")
+        selection = select_k(X, ks, method, sample_size=options.sample_size, n_jobs=options.n_jobs)
+        print(f"{method:<14} select_k    {selection.elapsed:>9.2f}s  k={selection.best_k}  "
+              f"silueta={selection.best_score:.4f}")
+
+
+if __name__ == '__main__':
+    main()
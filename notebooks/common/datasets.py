@@ -0,0 +1,373 @@
+"""
+Carga de los conjuntos de datos de los notebooks con caché columnar.
+
+La primera vez que se carga un conjunto de datos se interpreta el fichero original con
+`pandas.read_csv`, se aplican sus correcciones de tipos y valores perdidos y se guarda cada
+columna como un fichero `.npy`. Las cargas siguientes
+abren esos ficheros como memmaps, sin volver a interpretar el texto ni copiar los datos.
+
+La caché se identifica por el hash del fichero original y de la definición del conjunto de
+datos, por lo que se regenera sola si cambia cualquiera de los dos. Cada variante (por ejemplo,
+con y sin `downcast`) tiene su propia entrada y sus propios metadatos, y se conservan todas
+mientras el fichero original no cambie.
+
+Uso:
+    import sys
+    sys.path.insert(0, '..')
+    from common.datasets import load_dataset
+
+    df_raw = load_dataset('auto-mpg')
+"""
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Versión del formato de la caché: cambiarla invalida todas las cachés existentes.
+CACHE_VERSION = 2
+
+# Directorio de los notebooks, base de las rutas relativas de los conjuntos de datos.
+NOTEBOOKS_DIR = Path(__file__).resolve().parent.parent
+
+# Directorio por defecto de la caché. Se puede cambiar con la variable de entorno NOTEBOOKS_CACHE_DIR.
+CACHE_DIR = Path(os.environ.get('NOTEBOOKS_CACHE_DIR',
+                                Path.home() / '.cache' / 'machine-learning-notebooks' / 'datasets'))
+
+
+class DatasetSpec(NamedTuple):
+    """
+    Definición de un conjunto de datos.
+
+    Attributes:
+        path (str): Ruta del fichero original, relativa al directorio de los notebooks.
+        read_csv (Dict): Argumentos de `pandas.read_csv`.
+        prepare (Callable[[pd.DataFrame], pd.DataFrame]): Correcciones de tipos y valores
+            perdidos que se aplican una única vez antes de guardar la caché. Default: None.
+    """
+    path: str
+    read_csv: Dict
+    prepare: Callable[[pd.DataFrame], pd.DataFrame] = None
+
+
+def _auto_mpg(df: pd.DataFrame) -> pd.DataFrame:
+    """ Función privada que convierte 'horsepower' a número: los valores '?' pasan a NaN. """
+    df['horsepower'] = pd.to_numeric(df['horsepower'], errors='coerce')
+    return df
+
+
+_WDBC_FEATURES = ['feat{:02d}'.format(x) for x in range(1, 31)]
+
+# Conjuntos de datos de los notebooks.
+DATASETS: Dict[str, DatasetSpec] = {
+    'bike-sharing-hour': DatasetSpec('random-forest/hour.csv', {'sep': ','}),
+    'bike-sharing-day': DatasetSpec('random-forest/day.csv', {'sep': ','}),
+    'wdbc': DatasetSpec('outlier-detection/wdbc.data',
+                        {'sep': ',', 'names': ['id', 'diagnosis'] + _WDBC_FEATURES, 'index_col': 'id'}),
+    'house-votes-84': DatasetSpec('naive-bayes-classifier/house-votes-84.data',
+                                  {'header': None, 'names': ['democrat'] + ['c%d' % x for x in range(1, 17)]}),
+    'auto-mpg': DatasetSpec('support-vector-machine-vs-neural-network/auto-mpg.data',
+                            {'header': None, 'sep': r'\s+',
+                             'names': ['mpg', 'cylinders', 'displacement', 'horsepower', 'weight',
+                                       'acceleration', 'model_year', 'origin', 'car_name']},
+                            _auto_mpg),
+    'wholesale-customers': DatasetSpec('clustering-techniques/Wholesale customers data.csv', {'sep': ','}),
+}
+
+
+def register_dataset(name: str, path: str, prepare: Callable[[pd.DataFrame], pd.DataFrame] = None,
+                     **read_csv) -> DatasetSpec:
+    """
+    Registra un conjunto de datos para cargarlo por su nombre con `load_dataset`.
+
+    Args:
+        name (str): Nombre del conjunto de datos.
+        path (str): Ruta del fichero original, absoluta o relativa al directorio de los notebooks.
+        prepare (Callable[[pd.DataFrame], pd.DataFrame], optional): Correcciones a aplicar. Default: None.
+        **read_csv: Argumentos de `pandas.read_csv`.
+
+    Returns:
+        DatasetSpec: La definición registrada.
+    """
+    spec = DatasetSpec(path, read_csv, prepare)
+    DATASETS[name] = spec
+    return spec
+
+
+def load_dataset(name: str, cache_dir: Union[str, Path] = None, refresh: bool = False,
+                 downcast: bool = False, categories: bool = False) -> pd.DataFrame:
+    """
+    Carga un conjunto de datos desde su caché columnar, generándola si no existe o está obsoleta.
+
+    Las columnas numéricas se abren como memmaps de copia en escritura: se pueden modificar en
+    el DataFrame sin alterar la caché. El texto se guarda siempre como categórico (códigos y
+    valores distintos) y se devuelve con su tipo original salvo que se pidan categorías.
+
+    Los tipos numéricos se conservan salvo que se pida reducirlos: con `downcast` los enteros
+    pasan, por ejemplo, a `int16`, y operaciones como `df['cnt'] * 100` desbordan sin avisar.
+
+    Args:
+        name (str): Nombre del conjunto de datos en `DATASETS`.
+        cache_dir (Union[str, Path], optional): Directorio de la caché. Default: `CACHE_DIR`.
+        refresh (bool, optional): Regenera la caché aunque esté al día. Default: False.
+        downcast (bool, optional): Reduce los tipos numéricos sin perder precisión. Default: False.
+        categories (bool, optional): Devuelve las columnas de texto como categóricas. Default: False.
+
+    Returns:
+        pd.DataFrame: El conjunto de datos.
+    """
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset: {name}")
+    spec = DATASETS[name]
+    source = NOTEBOOKS_DIR / spec.path
+    if not source.is_file():
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), str(source))
+
+    directory = Path(cache_dir if cache_dir is not None else CACHE_DIR) / name
+    key = _spec_hash(spec, downcast)
+    meta = None if refresh else _read_meta(directory, key)
+    if meta is not None and meta['spec'] == key and _source_matches(source, meta):
+        return _load_columns(directory / meta['entry'], categories)
+
+    df = pd.read_csv(source, **spec.read_csv)
+    if spec.prepare is not None:
+        df = spec.prepare(df)
+    if downcast:
+        df = downcast_dtypes(df)
+
+    stat = source.stat()
+    meta = {
+        'version': CACHE_VERSION,
+        'spec': key,
+        'source': str(source),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': file_hash(source),
+    }
+    meta['entry'] = f"{meta['hash'][:16]}-{key[:8]}"
+    _write_cache(directory, df, meta)
+    return _load_columns(directory / meta['entry'], categories)
+
+
+def clear_cache(name: str = None, cache_dir: Union[str, Path] = None):
+    """
+    Elimina la caché de un conjunto de datos o de todos.
+
+    Args:
+        name (str, optional): Nombre del conjunto de datos. Default: None (todos).
+        cache_dir (Union[str, Path], optional): Directorio de la caché. Default: `CACHE_DIR`.
+    """
+    directory = Path(cache_dir if cache_dir is not None else CACHE_DIR)
+    if name is not None:
+        directory = directory / name
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def downcast_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce los tipos de las columnas de un DataFrame sin perder información.
+
+    - Los enteros pasan al menor tipo entero que contiene sus valores.
+    - Los reales pasan a `float32` sólo si todos sus valores se representan exactamente.
+
+    Args:
+        df (pd.DataFrame): DataFrame a reducir.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con los tipos reducidos.
+    """
+    columns = dict()
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series):
+            pass
+        elif pd.api.types.is_integer_dtype(series):
+            series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            reduced = series.astype(np.float32)
+            if np.array_equal(reduced.to_numpy(np.float64), series.to_numpy(np.float64), equal_nan=True):
+                series = reduced
+        columns[column] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def file_hash(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """
+    Calcula el hash BLAKE2 del contenido de un fichero leyéndolo por bloques.
+
+    Args:
+        path (Union[str, Path]): Ruta del fichero.
+        block_size (int, optional): Tamaño de los bloques de lectura. Default: 1 MiB.
+
+    Returns:
+        str: El hash en hexadecimal.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _spec_hash(spec: DatasetSpec, downcast: bool) -> str:
+    """
+    Función privada con el hash de la definición de un conjunto de datos.
+
+    Incluye los argumentos de lectura y el código de la función de preparación, de modo que
+    modificar cualquiera de ellos invalida la caché.
+    """
+    prepare = spec.prepare
+    code = None
+    if prepare is not None:
+        code = getattr(prepare, '__code__', None)
+        code = (code.co_code.hex(), repr(code.co_consts)) if code is not None else getattr(prepare, '__qualname__', '')
+    payload = json.dumps([CACHE_VERSION, spec.read_csv, code, downcast], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _meta_path(directory: Path, key: str) -> Path:
+    """ Función privada con la ruta de los metadatos de una variante de la caché. """
+    return directory / f'meta-{key[:16]}.json'
+
+
+def _read_meta(directory: Path, key: str) -> Union[Dict, None]:
+    """ Función privada que lee los metadatos de una variante, o None si no existe o es de otra versión. """
+    try:
+        with open(_meta_path(directory, key)) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION or not (directory / meta.get('entry', '') / 'columns.json').is_file():
+        return None
+    return meta
+
+
+def _source_matches(source: Path, meta: Dict) -> bool:
+    """
+    Función privada que comprueba si el fichero original es el de la caché.
+
+    Si el tamaño y la fecha de modificación coinciden no se vuelve a calcular el hash; si sólo
+    cambia la fecha, se compara el hash del contenido.
+    """
+    stat = source.stat()
+    if stat.st_size != meta['size']:
+        return False
+    if stat.st_mtime_ns == meta['mtime_ns']:
+        return True
+    return file_hash(source) == meta['hash']
+
+
+def _write_cache(directory: Path, df: pd.DataFrame, meta: Dict):
+    """
+    Función privada que guarda las columnas de un DataFrame en la caché.
+
+    Se escribe en un directorio temporal que después se renombra, por lo que otros procesos
+    nunca ven una caché a medio escribir.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=directory, prefix='.tmp-'))
+    try:
+        columns: List[Dict] = list()
+        frame = df.reset_index() if _has_named_index(df) else df
+        for position, column in enumerate(frame.columns):
+            columns.append(_write_column(staging, position, column, frame[column]))
+        layout = {'columns': columns, 'index': list(df.index.names) if _has_named_index(df) else None}
+        with open(staging / 'columns.json', 'w') as file:
+            json.dump(layout, file)
+
+        entry = directory / meta['entry']
+        if entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix='.meta-')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(meta, file)
+        os.replace(temporary, _meta_path(directory, meta['spec']))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    # Se eliminan las entradas de versiones anteriores del fichero original, con sus metadatos,
+    # y se conservan las de las demás variantes del fichero actual.
+    live = set()
+    for path in directory.glob('meta*.json'):
+        try:
+            with open(path) as file:
+                other = json.load(file)
+        except (OSError, ValueError):
+            other = dict()
+        if other.get('version') == CACHE_VERSION and other.get('hash') == meta['hash'] and 'entry' in other:
+            live.add(other['entry'])
+        else:
+            path.unlink(missing_ok=True)
+    for path in directory.iterdir():
+        if path.is_dir() and path.name not in live and not path.name.startswith('.'):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _write_column(directory: Path, position: int, name, series: pd.Series) -> Dict:
+    """
+    Función privada que guarda una columna como `.npy`.
+
+    Las columnas categóricas y de texto se guardan como códigos enteros y la lista de categorías,
+    y las fechas como enteros de 64 bits.
+
+    Returns:
+        Dict: Descripción de la columna para reconstruirla.
+    """
+    info = {'name': name, 'file': f'{position}.npy', 'dtype': str(series.dtype)}
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series) \
+            or series.dtype == object:
+        categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+        info['kind'] = 'categorical'
+        info['categories'] = categorical.cat.categories.tolist()
+        info['ordered'] = bool(categorical.cat.ordered)
+        values = categorical.cat.codes.to_numpy()
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        info['kind'] = 'datetime'
+        values = series.to_numpy().view(np.int64)
+    else:
+        info['kind'] = 'numeric'
+        values = series.to_numpy()
+    np.save(directory / info['file'], np.ascontiguousarray(values), allow_pickle=False)
+    return info
+
+
+def _load_columns(entry: Path, categories: bool) -> pd.DataFrame:
+    """
+    Función privada que reconstruye el DataFrame a partir de las columnas de la caché.
+
+    Las columnas numéricas se abren como memmaps de copia en escritura y se usan sin copiarlas.
+    Las de texto se devuelven como categóricas si `categories` es True, o con su tipo original.
+    """
+    with open(entry / 'columns.json') as file:
+        layout = json.load(file)
+
+    columns = dict()
+    for info in layout['columns']:
+        values = np.load(entry / info['file'], mmap_mode='c', allow_pickle=False)
+        if info['kind'] == 'categorical':
+            series = pd.Series(pd.Categorical.from_codes(values, info['categories'], ordered=info['ordered']))
+            if info['dtype'] != 'category' and not categories:
+                series = series.astype(info['dtype'])
+        elif info['kind'] == 'datetime':
+            series = pd.Series(values.view(info['dtype']), copy=False)
+        else:
+            series = pd.Series(values, copy=False)
+        columns[info['name']] = series
+
+    df = pd.DataFrame(columns, copy=False)
+    if layout['index'] is not None:
+        df = df.set_index(layout['index'])
+    return df
+
+
+def _has_named_index(df: pd.DataFrame) -> bool:
+    """ Función privada que indica si el índice del DataFrame es una columna de datos con nombre. """
+    return any(name is not None for name in df.index.names)
@@ -0,0 +1,317 @@
+"""
+Entrenamiento incremental de clasificadores Naive Bayes sobre datos categóricos.
+
+Los datos se leen por bloques, cada bloque se codifica en one-hot como una matriz dispersa
+con un vocabulario de categorías fijo y los tres clasificadores (gaussiano, Bernoulli y
+multinomial) se entrenan con `partial_fit` en una única pasada. La memoria depende del
+tamaño de bloque y no del tamaño de los datos.
+
+Uso:
+    python -m common.naive_bayes --replicate 500 --chunksize 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.naive_bayes import BernoulliNB, GaussianNB, MultinomialNB
+from sklearn.preprocessing import LabelBinarizer
+
+from .datasets import DATASETS, NOTEBOOKS_DIR
+
+# Vocabulario del conjunto de votaciones: cada voto es 'y', 'n' o '?'.
+HOUSE_VOTES_VOCABULARY: Dict[str, List[str]] = {'c%d' % x: ['?', 'n', 'y'] for x in range(1, 17)}
+
+# Clasificadores que se entrenan por defecto.
+MODELS: Dict[str, Callable[[], object]] = {
+    'gaussian': GaussianNB,
+    'bernoulli': BernoulliNB,
+    'multinomial': MultinomialNB,
+}
+
+
+def read_chunks(source: str, chunksize: int = 100000, **read_csv) -> Iterator[pd.DataFrame]:
+    """
+    Lee un fichero CSV por bloques.
+
+    Args:
+        source (str): Nombre de un conjunto de datos de `datasets.DATASETS` o ruta del fichero.
+        chunksize (int, optional): Filas de cada bloque. Default: 100000.
+        **read_csv: Argumentos de `pandas.read_csv`. Con un conjunto de datos registrado se
+            añaden a los de su definición.
+
+    Returns:
+        Iterator[pd.DataFrame]: Los bloques del fichero.
+    """
+    if source in DATASETS:
+        spec = DATASETS[source]
+        read_csv = dict(spec.read_csv, **read_csv)
+        source = NOTEBOOKS_DIR / spec.path
+    with pd.read_csv(source, chunksize=chunksize, **read_csv) as reader:
+        yield from reader
+
+
+def learn_vocabulary(chunks: Iterable[pd.DataFrame], columns: Sequence[str]) -> Dict[str, List]:
+    """
+    Obtiene las categorías de cada columna recorriendo los bloques.
+
+    Sólo es necesario cuando el vocabulario no se conoce de antemano; guarda las categorías
+    distintas, no las filas.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Bloques de datos.
+        columns (Sequence[str]): Columnas categóricas.
+
+    Returns:
+        Dict[str, List]: Las categorías ordenadas de cada columna.
+    """
+    seen = {column: set() for column in columns}
+    for chunk in chunks:
+        for column in columns:
+            seen[column].update(chunk[column].dropna().unique().tolist())
+    return {column: sorted(values, key=str) for column, values in seen.items()}
+
+
+class OneHotVocabulary:
+
+    def __init__(self, categories: Dict[str, Sequence]):
+        """
+        Clase con un vocabulario fijo para codificar columnas categóricas en one-hot.
+
+        Cada par (columna, categoría) tiene una posición fija, de modo que todos los bloques se
+        codifican con las mismas columnas. Las categorías desconocidas y los valores nulos se
+        codifican sin ninguna columna activa.
+
+        Args:
+            categories (Dict[str, Sequence]): Categorías de cada columna, en orden.
+        """
+        self.categories: Dict[str, List] = {column: list(values) for column, values in categories.items()}
+        self.offsets: Dict[str, int] = dict()
+        offset = 0
+        for column, values in self.categories.items():
+            self.offsets[column] = offset
+            offset += len(values)
+        self.size: int = offset
+
+    @property
+    def feature_names(self) -> List[str]:
+        """ Nombres de las columnas codificadas, como 'c1_y' en `separar_categorias`. """
+        return ['{}_{}'.format(column, value) for column, values in self.categories.items() for value in values]
+
+    def transform(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        """
+        Codifica un bloque de datos como una matriz dispersa.
+
+        Args:
+            df (pd.DataFrame): Bloque con las columnas del vocabulario.
+
+        Returns:
+            sparse.csr_matrix: Matriz de ceros y unos de forma (filas, `size`).
+        """
+        rows = list()
+        cols = list()
+        index = np.arange(len(df))
+        for column, values in self.categories.items():
+            codes = pd.Categorical(df[column], categories=values).codes
+            known = codes >= 0
+            rows.append(index[known])
+            cols.append(codes[known].astype(np.int64) + self.offsets[column])
+        rows = np.concatenate(rows) if rows else np.empty(0, np.int64)
+        cols = np.concatenate(cols) if cols else np.empty(0, np.int64)
+        data = np.ones(len(rows), dtype=np.float64)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(len(df), self.size))
+
+
+class StreamingNaiveBayes:
+
+    def __init__(self, vocabulary: OneHotVocabulary, target: str, classes: Sequence,
+                 models: Dict[str, object] = None):
+        """
+        Clase que entrena varios clasificadores Naive Bayes en una pasada sobre bloques de datos.
+
+        El clasificador gaussiano no admite matrices dispersas, por lo que cada bloque se
+        densifica sólo para él; la memoria sigue acotada por el tamaño de bloque.
+
+        Args:
+            vocabulary (OneHotVocabulary): Vocabulario de las columnas predictoras.
+            target (str): Columna con la clase.
+            classes (Sequence): Todas las clases posibles, necesarias desde el primer bloque.
+            models (Dict[str, object], optional): Clasificadores con `partial_fit` por nombre.
+                Default: uno de cada tipo de `MODELS`.
+        """
+        self.vocabulary: OneHotVocabulary = vocabulary
+        self.target: str = target
+        self.classes: np.ndarray = np.asarray(classes)
+        self.models: Dict[str, object] = models if models is not None else \
+            {name: factory() for name, factory in MODELS.items()}
+        self.rows: int = 0
+
+    def partial_fit(self, chunk: pd.DataFrame) -> 'StreamingNaiveBayes':
+        """
+        Entrena los clasificadores con un bloque de datos.
+
+        Args:
+            chunk (pd.DataFrame): Bloque con las columnas predictoras y la clase.
+
+        Returns:
+            StreamingNaiveBayes: El propio objeto.
+        """
+        features = self.vocabulary.transform(chunk)
+        labels = chunk[self.target].to_numpy()
+        for model in self.models.values():
+            model.partial_fit(self._features(model, features), labels, classes=self.classes)
+        self.rows += len(chunk)
+        return self
+
+    def fit(self, chunks: Iterable[pd.DataFrame]) -> 'StreamingNaiveBayes':
+        """
+        Entrena los clasificadores en una pasada sobre todos los bloques.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Bloques de datos.
+
+        Returns:
+            StreamingNaiveBayes: El propio objeto.
+        """
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def predict(self, chunk: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Predice la clase de un bloque de datos con cada clasificador.
+
+        Args:
+            chunk (pd.DataFrame): Bloque con las columnas predictoras.
+
+        Returns:
+            Dict[str, np.ndarray]: Las predicciones de cada clasificador.
+        """
+        features = self.vocabulary.transform(chunk)
+        return {name: model.predict(self._features(model, features)) for name, model in self.models.items()}
+
+    def score(self, chunks: Iterable[pd.DataFrame]) -> Dict[str, float]:
+        """
+        Calcula la tasa de aciertos de cada clasificador recorriendo los bloques.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Bloques de datos con la clase.
+
+        Returns:
+            Dict[str, float]: La tasa de aciertos de cada clasificador.
+        """
+        hits = {name: 0 for name in self.models}
+        total = 0
+        for chunk in chunks:
+            expected = chunk[self.target].to_numpy()
+            for name, predicted in self.predict(chunk).items():
+                hits[name] += int(np.sum(predicted == expected))
+            total += len(chunk)
+        return {name: count / total if total else float('nan') for name, count in hits.items()}
+
+    @staticmethod
+    def _features(model, features: sparse.csr_matrix) -> Union[sparse.csr_matrix, np.ndarray]:
+        """ Método privado que densifica el bloque para los clasificadores que no admiten matrices dispersas. """
+        return features.toarray() if isinstance(model, GaussianNB) else features
+
+
+def dense_features(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """
+    Codifica los datos como en el notebook: un `LabelBinarizer` por columna y un DataFrame denso.
+
+    Args:
+        df (pd.DataFrame): Datos completos en memoria.
+        columns (Sequence[str]): Columnas categóricas.
+
+    Returns:
+        np.ndarray: La matriz densa de las columnas codificadas.
+    """
+    series = list()
+    for column in columns:
+        binarizer = LabelBinarizer()
+        encoded = binarizer.fit_transform(df[column])
+        series.append(pd.DataFrame(encoded, columns=['{}_{}'.format(column, x) for x in binarizer.classes_]))
+    return pd.concat(series, axis=1, sort=False).values
+
+
+def benchmark(source: str, vocabulary: Dict[str, Sequence], target: str, classes: Sequence,
+              chunksize: int = 100000, **read_csv) -> Dict[str, Dict]:
+    """
+    Compara el entrenamiento por bloques con el entrenamiento denso del notebook.
+
+    Cada camino se mide por separado con `tracemalloc` (memoria máxima reservada) y se
+    comprueba que ambos obtienen la misma tasa de aciertos sobre los datos de entrenamiento.
+
+    Args:
+        source (str): Nombre de un conjunto de datos de `datasets.DATASETS` o ruta del fichero.
+        vocabulary (Dict[str, Sequence]): Categorías de cada columna predictora.
+        target (str): Columna con la clase.
+        classes (Sequence): Clases posibles.
+        chunksize (int, optional): Filas de cada bloque. Default: 100000.
+        **read_csv: Argumentos de `pandas.read_csv`.
+
+    Returns:
+        Dict[str, Dict]: Tiempo, memoria máxima y tasa de aciertos de cada camino.
+    """
+    results = dict()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    streaming = StreamingNaiveBayes(OneHotVocabulary(vocabulary), target, classes)
+    streaming.fit(read_chunks(source, chunksize, **read_csv))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results['streaming'] = {'time': elapsed, 'peak_memory': peak, 'rows': streaming.rows,
+                            'accuracy': streaming.score(read_chunks(source, chunksize, **read_csv))}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = pd.concat(read_chunks(source, chunksize, **read_csv), ignore_index=True)
+    features = dense_features(df, list(vocabulary))
+    labels = df[target].to_numpy()
+    models = {name: factory().fit(features, labels) for name, factory in MODELS.items()}
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results['dense'] = {'time': elapsed, 'peak_memory': peak, 'rows': len(df),
+                        'accuracy': {name: model.score(features, labels) for name, model in models.items()}}
+    return results
+
+
+def _replicate(source: str, copies: int, directory: str, **read_csv) -> str:
+    """ Función privada que escribe un CSV con las filas del conjunto de datos repetidas. """
+    path = os.path.join(directory, 'replicated.csv')
+    df = pd.concat(read_chunks(source, **read_csv), ignore_index=True)
+    with open(path, 'w') as file:
+        for _ in range(copies):
+            df.to_csv(file, header=False, index=False)
+    return path
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Naive Bayes por bloques frente al camino denso")
+    parser.add_argument('--replicate', type=int, default=100, help="Copias de house-votes-84 a concatenar")
+    parser.add_argument('--chunksize', type=int, default=50000)
+    options = parser.parse_args(args)
+
+    spec = DATASETS['house-votes-84']
+    with tempfile.TemporaryDirectory() as directory:
+        path = _replicate('house-votes-84', options.replicate, directory)
+        results = benchmark(path, HOUSE_VOTES_VOCABULARY, 'democrat', ['democrat', 'republican'],
+                            options.chunksize, header=None, names=spec.read_csv['names'])
+
+    for name, result in results.items():
+        accuracy = result['accuracy']
+        print(f"{name:<10} {result['rows']:>10d} filas  {result['time']:>8.3f}s  "
+              f"{result['peak_memory'] / 2 ** 20:>9.1f} MiB  " +
+              '  '.join(f"{model}={value:.4f}" for model, value in accuracy.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,525 @@
+"""
+Puntuación por bloques de un detector de anomalías ya entrenado.
+
+Los datos se leen de un CSV o de un array `.npy` (como memmap) en bloques de un número fijo de
+filas. Cada bloque se puntúa en un proceso del pool, que carga el modelo una única vez al
+arrancar y lee su bloque directamente del fichero, de modo que el proceso principal nunca
+tiene los datos en memoria. Las puntuaciones de `decision_function` y las etiquetas (1 normal,
+-1 anomalía) se escriben en el fichero de salida según se calculan: en un `.npy` cada proceso
+escribe su bloque en su posición; en un CSV el proceso principal las añade en orden.
+
+Al terminar se informa de las filas por segundo y de la memoria residente máxima del proceso
+principal y de cada proceso del pool durante la puntuación. En Linux el máximo se reinicia al
+empezar (`/proc/self/clear_refs`); en otros sistemas es el máximo desde que arrancó el proceso,
+por lo que incluye la memoria usada antes de puntuar (y la heredada por los procesos con 'fork').
+
+Uso:
+    python -m common.outliers --replicate 2000 --chunksize 100000 --workers 4
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from .datasets import DATASETS, NOTEBOOKS_DIR
+
+# Tipo de cada fila de la salida en formato `.npy`.
+OUTPUT_DTYPE = np.dtype([('score', np.float64), ('label', np.int8)])
+
+# Tamaño de los bloques de lectura al indexar las líneas de un CSV.
+_BLOCK_SIZE = 1 << 24
+
+# Tabla con los bytes que no cuentan como contenido de una línea: las líneas sólo con ellos son líneas en blanco.
+_BLANK = np.zeros(256, dtype=bool)
+_BLANK[list(b' \t\r\n')] = True
+
+# Bloque enviado a los procesos: (índice, primera fila, número de filas, posición en bytes y
+# longitud en bytes dentro del CSV, o None con un `.npy`).
+Task = Tuple[int, int, int, Union[int, None], Union[int, None]]
+
+
+class ScoringReport(NamedTuple):
+    """
+    Resumen de una puntuación por bloques.
+
+    Attributes:
+        rows (int): Filas puntuadas.
+        anomalies (int): Filas etiquetadas como anomalía.
+        chunks (int): Bloques procesados.
+        elapsed (float): Segundos empleados.
+        peak_rss (int): Memoria residente máxima del proceso principal durante la puntuación, en bytes.
+        worker_peak_rss (List[int]): Memoria residente máxima de cada proceso del pool, en bytes.
+        output (str): Ruta del fichero de salida.
+    """
+    rows: int
+    anomalies: int
+    chunks: int
+    elapsed: float
+    peak_rss: int
+    worker_peak_rss: List[int]
+    output: str
+
+    @property
+    def rows_per_second(self) -> float:
+        """ Filas puntuadas por segundo. """
+        return self.rows / self.elapsed if self.elapsed > 0 else float('nan')
+
+
+class _Source(NamedTuple):
+    """
+    Origen privado de los datos, tal como se envía a los procesos.
+
+    Attributes:
+        path (str): Ruta del CSV o del `.npy`.
+        kind (str): 'csv' o 'npy'.
+        names (List[str]): Nombres de las columnas del CSV, o None con un `.npy`.
+        features (List[str]): Columnas que recibe el modelo, o None para todas.
+        read_csv (Dict): Otros argumentos de `pandas.read_csv`.
+    """
+    path: str
+    kind: str
+    names: Union[List[str], None]
+    features: Union[List[str], None]
+    read_csv: Dict
+
+
+class _ChunkResult(NamedTuple):
+    """
+    Resultado privado de un bloque, devuelto por los procesos.
+
+    Attributes:
+        index (int): Posición del bloque.
+        rows (int): Filas puntuadas.
+        anomalies (int): Filas etiquetadas como anomalía.
+        scores (np.ndarray): Puntuaciones y etiquetas con `OUTPUT_DTYPE`, o None si ya están en la salida.
+        pid (int): Proceso que ha puntuado el bloque.
+        peak_rss (int): Memoria residente máxima del proceso, en bytes.
+    """
+    index: int
+    rows: int
+    anomalies: int
+    scores: Union[np.ndarray, None]
+    pid: int
+    peak_rss: int
+
+
+# Modelo, origen y salida de cada proceso, fijados por `_initialize`.
+_model = None
+_source: Union[_Source, None] = None
+_output: Union[str, None] = None
+
+
+def _initialize(model_path: str, source: _Source, output_path: Union[str, None]):
+    """ Función privada que carga el modelo una única vez al arrancar cada proceso. """
+    global _model, _source, _output
+    # Los procesos creados con 'fork' heredan el máximo del proceso principal.
+    _reset_peak_rss()
+    _model = joblib.load(model_path)
+    if 'n_jobs' in _model.get_params():
+        _model.set_params(n_jobs=1)
+    _source = source
+    _output = output_path
+
+
+def _score_chunk(task: Task) -> _ChunkResult:
+    """
+    Función privada que puntúa en un proceso un bloque leído directamente del fichero.
+
+    Con salida `.npy` el proceso escribe el bloque en su posición y no devuelve las
+    puntuaciones; con salida CSV las devuelve para que el proceso principal las escriba en orden.
+    Los memmaps se abren en cada bloque y se cierran al terminarlo, para que las páginas leídas
+    y escritas no se acumulen en la memoria residente del proceso.
+
+    Returns:
+        _ChunkResult: Filas, anomalías y puntuaciones del bloque y memoria del proceso.
+    """
+    index, start, rows, offset, length = task
+    if _source.kind == 'npy':
+        data = np.load(_source.path, mmap_mode='r')
+        chunk = np.array(data[start:start + rows])
+        del data
+        if getattr(_model, 'feature_names_in_', None) is not None:
+            chunk = pd.DataFrame(chunk, columns=_model.feature_names_in_)
+    else:
+        with open(_source.path, 'rb') as file:
+            file.seek(offset)
+            text = file.read(length)
+        chunk = pd.read_csv(io.BytesIO(text), header=None, names=_source.names, **_source.read_csv)
+        if len(chunk) != rows:
+            raise ValueError(f"Chunk {index} has {len(chunk)} rows, expected {rows}")
+        if _source.features is not None:
+            chunk = chunk[_source.features]
+
+    result = np.empty(len(chunk), dtype=OUTPUT_DTYPE)
+    result['score'] = _model.decision_function(chunk)
+    # Convenio de los detectores de scikit-learn: las puntuaciones negativas son anomalías.
+    result['label'] = np.where(result['score'] < 0, -1, 1)
+    anomalies = int(np.count_nonzero(result['label'] == -1))
+    if _output is not None:
+        output = np.load(_output, mmap_mode='r+')
+        output[start:start + len(result)] = result
+        output.flush()
+        del output
+        result = None
+    return _ChunkResult(index, len(chunk), anomalies, result, os.getpid(), _peak_rss())
+
+
+def score_file(model, source: str, output: str, chunksize: int = 100000, workers: int = None,
+               features: Sequence[str] = None, names: Sequence[str] = None, context: str = None,
+               **read_csv) -> ScoringReport:
+    """
+    Puntúa un fichero por bloques con un detector de anomalías entrenado.
+
+    Los CSV se indexan primero con una lectura binaria que localiza el salto de línea de cada
+    `chunksize` filas, de modo que cada proceso lee e interpreta sólo su bloque. Los campos no
+    pueden contener saltos de línea.
+
+    Args:
+        model: Detector entrenado (con `decision_function`) o ruta de un fichero de `joblib.dump`.
+        source (str): Nombre de un conjunto de datos de `datasets.DATASETS`, ruta de un CSV o
+            ruta de un `.npy` con una fila por registro.
+        output (str): Fichero de salida: `.npy` (array con `OUTPUT_DTYPE`) o CSV ('score,label').
+        chunksize (int, optional): Filas de cada bloque. Default: 100000.
+        workers (int, optional): Procesos del pool. Default: uno por núcleo.
+        features (Sequence[str], optional): Columnas del CSV que recibe el modelo. Default: todas.
+        names (Sequence[str], optional): Nombres de las columnas si el CSV no tiene cabecera.
+            Default: None (la primera línea es la cabecera).
+        context (str, optional): Método de arranque de los procesos ('fork', 'spawn', ...). Default: None.
+        **read_csv: Otros argumentos de `pandas.read_csv` para interpretar cada bloque.
+
+    Returns:
+        ScoringReport: Filas, anomalías, tiempo y memoria de la puntuación.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be positive")
+    _reset_peak_rss()
+    start_time = time.perf_counter()
+    source_spec, tasks, total = _plan(source, chunksize, features, names, read_csv)
+
+    output = str(output)
+    to_npy = output.endswith('.npy')
+    if to_npy:
+        if total is None:
+            raise ValueError("The number of rows must be known to write a .npy output")
+        np.lib.format.open_memmap(output, mode='w+', dtype=OUTPUT_DTYPE, shape=(total,)).flush()
+
+    workers = workers or os.cpu_count() or 1
+    mp_context = multiprocessing.get_context(context) if context is not None else None
+    results: List[_ChunkResult] = list()
+    with tempfile.TemporaryDirectory() as directory:
+        if isinstance(model, (str, os.PathLike)):
+            model_path = str(model)
+        else:
+            model_path = os.path.join(directory, 'model.joblib')
+            joblib.dump(model, model_path)
+
+        with ProcessPoolExecutor(workers, mp_context=mp_context, initializer=_initialize,
+                                 initargs=(model_path, source_spec, output if to_npy else None)) as executor, \
+                _Writer(None if to_npy else output) as writer:
+            limit = 2 * workers
+            pending = set()
+            for task in tasks:
+                pending.add(executor.submit(_score_chunk, task))
+                if len(pending) >= limit:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(future.result() for future in done)
+                    writer.add(results)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(future.result() for future in done)
+                writer.add(results)
+
+    worker_rss: Dict[int, int] = dict()
+    for result in results:
+        worker_rss[result.pid] = max(worker_rss.get(result.pid, 0), result.peak_rss)
+    return ScoringReport(sum(result.rows for result in results), sum(result.anomalies for result in results),
+                         len(results), time.perf_counter() - start_time, _peak_rss(),
+                         sorted(worker_rss.values(), reverse=True), output)
+
+
+class _Writer:
+
+    def __init__(self, path: Union[str, None]):
+        """
+        Clase privada que escribe en orden las puntuaciones de los bloques en un CSV.
+
+        Los bloques terminan en cualquier orden; los que llegan antes de tiempo se guardan hasta
+        que se han escrito todos los anteriores. Con `path` None no escribe nada (salida `.npy`).
+
+        Args:
+            path (Union[str, None]): Ruta del CSV de salida.
+        """
+        self.path: Union[str, None] = path
+        self.file = None
+        self.next: int = 0
+        self.waiting: Dict[int, np.ndarray] = dict()
+
+    def __enter__(self) -> '_Writer':
+        if self.path is not None:
+            self.file = open(self.path, 'w', newline='')
+            self.file.write('score,label\n')
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            self.file.close()
+
+    def add(self, results: List[_ChunkResult]):
+        """
+        Recibe los resultados de los bloques terminados y escribe todos los bloques consecutivos disponibles.
+
+        Las puntuaciones se retiran de los resultados en cuanto se guardan, para no acumularlas en memoria.
+        """
+        if self.file is None:
+            return
+        for position, result in enumerate(results):
+            if result.scores is not None:
+                self.waiting[result.index] = result.scores
+                results[position] = result._replace(scores=None)
+        while self.next in self.waiting:
+            block = self.waiting.pop(self.next)
+            lines = io.StringIO()
+            np.savetxt(lines, np.column_stack([block['score'], block['label']]), fmt=['%.17g', '%d'], delimiter=',')
+            self.file.write(lines.getvalue())
+            self.next += 1
+
+
+def _plan(source: str, chunksize: int, features: Sequence[str], names: Sequence[str],
+          read_csv: Dict) -> Tuple[_Source, Iterator[Task], Union[int, None]]:
+    """
+    Función privada que prepara el origen de los datos y sus bloques.
+
+    Returns:
+        Tuple[_Source, Iterator[Task], Union[int, None]]: Origen para los procesos, bloques y
+            número total de filas.
+    """
+    if source in DATASETS:
+        spec = DATASETS[source]
+        names = names if names is not None else spec.read_csv.get('names')
+        read_csv = dict({key: value for key, value in spec.read_csv.items()
+                         if key not in ('names', 'header', 'index_col')}, **read_csv)
+        source = NOTEBOOKS_DIR / spec.path
+    path = str(source)
+
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        total = len(data)
+        tasks = ((index, start, min(chunksize, total - start), None, None)
+                 for index, start in enumerate(range(0, total, chunksize)))
+        return _Source(path, 'npy', None, None, dict()), tasks, total
+
+    start = 0
+    if names is None:
+        with open(path, 'rb') as file:
+            header = file.readline()
+        names = next(csv.reader([header.decode()]))
+        start = len(header)
+    offsets, total = _line_offsets(path, start, chunksize, read_csv.get('skip_blank_lines', True))
+    tasks = ((index, index * chunksize, min(chunksize, total - index * chunksize), begin, end - begin)
+             for index, (begin, end) in enumerate(zip(offsets, offsets[1:])))
+    return _Source(path, 'csv', list(names), list(features) if features is not None else None, read_csv), \
+        tasks, total
+
+
+def _line_offsets(path: str, start: int, chunksize: int, skip_blank: bool = True) -> Tuple[List[int], int]:
+    """
+    Función privada que localiza el inicio de cada bloque de `chunksize` filas de un fichero.
+
+    Como `pandas.read_csv` con `skip_blank_lines`, las líneas vacías o con sólo espacios no
+    cuentan como filas. Las que quedan al final del fichero se asignan al último bloque.
+
+    Args:
+        path (str): Ruta del fichero.
+        start (int): Posición de la primera línea de datos.
+        chunksize (int): Filas de cada bloque.
+        skip_blank (bool, optional): Omite las líneas en blanco. Default: True.
+
+    Returns:
+        Tuple[List[int], int]: Posiciones de inicio de los bloques (más el final del fichero) y
+            número de filas.
+    """
+    offsets = [start]
+    rows = 0
+    position = start
+    boundary = chunksize
+    # Si la línea en curso, que empieza en un bloque de lectura anterior, tiene contenido.
+    pending = False
+    with open(path, 'rb') as file:
+        file.seek(start)
+        for block in iter(lambda: file.read(_BLOCK_SIZE), b''):
+            data = np.frombuffer(block, dtype=np.uint8)
+            newlines = np.flatnonzero(data == ord('\n'))
+            if skip_blank:
+                filled = _filled_lines(data, newlines)
+                if len(filled):
+                    filled[0] |= pending
+                    pending = False
+                tail = data[newlines[-1] + 1:] if len(newlines) else data
+                pending = pending or not _BLANK[tail].all()
+                newlines = newlines[filled]
+            while rows + len(newlines) >= boundary:
+                offsets.append(position + int(newlines[boundary - rows - 1]) + 1)
+                boundary += chunksize
+            rows += len(newlines)
+            position += len(block)
+            if not skip_blank:
+                pending = block[-1:] != b'\n'
+    if pending:
+        rows += 1
+    if offsets[-1] < position:
+        if rows > (len(offsets) - 1) * chunksize:
+            offsets.append(position)
+        else:
+            # Sólo quedan líneas en blanco: pasan al último bloque.
+            offsets[-1] = position
+    return offsets, rows
+
+
+def _filled_lines(data: np.ndarray, newlines: np.ndarray) -> np.ndarray:
+    """
+    Función privada que indica qué líneas de un bloque de lectura tienen contenido.
+
+    Cada línea se recorre hacia atrás desde su salto de línea hasta encontrar un byte que no
+    sea un espacio, por lo que casi todas se resuelven en uno o dos pasos vectorizados (el
+    salto de línea de Windows ocupa dos bytes). Las que siguen sin resolver tras unos pocos
+    pasos, con muchos espacios finales, se comprueban una a una.
+
+    Args:
+        data (np.ndarray): Bytes del bloque.
+        newlines (np.ndarray): Posiciones de los saltos de línea del bloque.
+
+    Returns:
+        np.ndarray: Vector booleano, por cada salto de línea, que indica si la línea que termina
+            en él tiene contenido. La primera línea sólo se comprueba dentro del bloque.
+    """
+    starts = np.concatenate(([-1], newlines[:-1]))
+    filled = np.zeros(len(newlines), dtype=bool)
+    lines = np.arange(len(newlines))
+    positions = newlines - 1
+    for _ in range(4):
+        inside = positions > starts[lines]
+        lines, positions = lines[inside], positions[inside]
+        found = ~_BLANK[data[positions]]
+        filled[lines[found]] = True
+        lines, positions = lines[~found], positions[~found] - 1
+        if not len(lines):
+            return filled
+    for line, position in zip(lines, positions):
+        filled[line] = not _BLANK[data[starts[line] + 1:position + 1]].all()
+    return filled
+
+
+def _reset_peak_rss() -> bool:
+    """ Función privada que reinicia la memoria residente máxima del proceso. Sólo es posible en Linux. """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def _peak_rss() -> int:
+    """
+    Función privada con la memoria residente máxima del proceso, en bytes.
+
+    En Linux es el máximo desde el último `_reset_peak_rss` (VmHWM); en otros sistemas, el máximo
+    desde que arrancó el proceso.
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _score_in_memory(model_path: str, path: str, names: List[str], features: List[str]) -> Tuple[np.ndarray, float, int]:
+    """ Función privada con el camino del notebook: todo el CSV en memoria y una única llamada al modelo. """
+    _reset_peak_rss()
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    df = pd.read_csv(path, header=None, names=names)
+    scores = model.decision_function(df[features])
+    return scores, time.perf_counter() - start, _peak_rss()
+
+
+def _replicate(df: pd.DataFrame, features: List[str], copies: int, directory: str) -> Tuple[str, str]:
+    """ Función privada que escribe las filas del conjunto de datos repetidas como CSV y como `.npy`. """
+    path = os.path.join(directory, 'wdbc.csv')
+    with open(path, 'w') as file:
+        for _ in range(copies):
+            df.to_csv(file, header=False, index=False)
+    array = os.path.join(directory, 'wdbc.npy')
+    values = df[features].to_numpy()
+    replicated = np.lib.format.open_memmap(array, mode='w+', dtype=values.dtype,
+                                           shape=(len(values) * copies, values.shape[1]))
+    for copy in range(copies):
+        replicated[copy * len(values):(copy + 1) * len(values)] = values
+    replicated.flush()
+    return path, array
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Puntuación por bloques con IsolationForest")
+    parser.add_argument('--replicate', type=int, default=1000, help="Copias de wdbc a concatenar")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-baseline', dest='baseline', action='store_false',
+                        help="No compara con la puntuación en memoria")
+    options = parser.parse_args(args)
+
+    spec = DATASETS['wdbc']
+    names = spec.read_csv['names']
+    features = [name for name in names if name.startswith('feat')]
+    df = pd.read_csv(NOTEBOOKS_DIR / spec.path, header=None, names=names)
+    model = IsolationForest(random_state=10, contamination='auto', max_samples='auto').fit(df[features])
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Los datos se generan en otro proceso para que no cuenten en la memoria del principal.
+        with ProcessPoolExecutor(1) as executor:
+            path, array = executor.submit(_replicate, df, features, options.replicate, directory).result()
+        model_path = os.path.join(directory, 'model.joblib')
+        joblib.dump(model, model_path)
+
+        reports = [('csv → npy', score_file(model_path, path, os.path.join(directory, 'csv.npy'), options.chunksize,
+                                            options.workers, features=features, names=names)),
+                   ('csv → csv', score_file(model_path, path, os.path.join(directory, 'scores.csv'), options.chunksize,
+                                            options.workers, features=features, names=names)),
+                   ('npy → npy', score_file(model_path, array, os.path.join(directory, 'npy.npy'), options.chunksize,
+                                            options.workers))]
+        for name, report in reports:
+            print(f"{name:<10} {report.rows:>11d} filas  {report.elapsed:>8.2f}s  {report.rows_per_second:>12,.0f} filas/s  "
+                  f"RSS principal {report.peak_rss / 2 ** 20:>7.1f} MiB  "
+                  f"RSS máx. proceso {max(report.worker_peak_rss) / 2 ** 20:>7.1f} MiB  anomalías {report.anomalies}")
+
+        if options.baseline:
+            with ProcessPoolExecutor(1) as executor:
+                expected, elapsed, rss = executor.submit(_score_in_memory, model_path, path, names, features).result()
+            print(f"{'memoria':<10} {len(expected):>11d} filas  {elapsed:>8.2f}s  {len(expected) / elapsed:>12,.0f} filas/s  "
+                  f"RSS {rss / 2 ** 20:>7.1f} MiB")
+            outputs = {'csv → npy': np.load(os.path.join(directory, 'csv.npy'))['score'],
+                       'csv → csv': pd.read_csv(os.path.join(directory, 'scores.csv'),
+                                                float_precision='round_trip')['score'].to_numpy(),
+                       'npy → npy': np.load(os.path.join(directory, 'npy.npy'))['score']}
+            for name, scores in outputs.items():
+                print(f"{name:<10} diferencia máxima con la puntuación en memoria: {np.abs(scores - expected).max():.3g}")
+
+
+if __name__ == '__main__':
+    main()
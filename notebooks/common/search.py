@@ -0,0 +1,647 @@
+"""
+Búsqueda de hiperparámetros por rejilla con caché de puntuaciones y eliminación sucesiva.
+
+La puntuación de cada combinación de parámetros en cada fold se guarda en disco en cuanto se
+calcula, de modo que al volver a ejecutar un notebook, al ampliar la rejilla o tras interrumpir
+una búsqueda sólo se entrenan las combinaciones que faltan.
+
+Con `halving=True` las combinaciones se evalúan primero con una fracción del recurso (filas de
+entrenamiento o árboles del bosque) y en cada ronda sólo continúa la mejor fracción; la última
+ronda usa siempre el recurso completo, por lo que comparte la caché con la búsqueda exhaustiva.
+
+En los estimadores con `warm_start` y `n_estimators` (bosques), los distintos números de
+árboles de una misma combinación se obtienen añadiendo árboles al modelo ya entrenado en lugar
+de entrenar cada bosque desde cero. Con una semilla entera el resultado es idéntico.
+
+Uso:
+    import sys
+    sys.path.insert(0, '..')
+    from common.search import CachedGridSearchCV
+
+    rforest_cls = CachedGridSearchCV(ensemble.RandomForestClassifier(random_state=1),
+                                     param_grid={...}, cv=5, n_jobs=-1)
+    rforest_cls.fit(df_train[features], df_train[target_cls])
+
+    python -m common.search --grid forest-cls --rows 3000 --halving
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn import ensemble, tree
+from sklearn.base import BaseEstimator, clone, is_classifier
+from sklearn.exceptions import FitFailedWarning
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, ParameterGrid, check_cv, train_test_split
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVR
+from sklearn.utils import check_random_state
+
+from .datasets import CACHE_DIR as DATASETS_CACHE_DIR, load_dataset
+
+# Versión del formato de la caché: cambiarla invalida todas las cachés existentes.
+CACHE_VERSION = 1
+
+# Directorio por defecto de la caché. Se puede cambiar con la variable de entorno NOTEBOOKS_SEARCH_CACHE_DIR.
+CACHE_DIR = Path(os.environ.get('NOTEBOOKS_SEARCH_CACHE_DIR', DATASETS_CACHE_DIR.parent / 'search'))
+
+# Parámetro que se hace crecer con `warm_start` en lugar de reentrenar.
+WARM_START_PARAMETER = 'n_estimators'
+
+# Mínimo de filas de entrenamiento de la primera ronda cuando el recurso es 'n_samples'.
+MIN_SAMPLES = 50
+
+# Parámetros que no cambian la puntuación y no forman parte de la clave de la caché.
+_IGNORED_PARAMETERS = {'n_jobs', 'verbose', 'warm_start'}
+
+
+class ScoreCache:
+
+    def __init__(self, directory: Union[str, Path], context: Dict):
+        """
+        Clase con las puntuaciones guardadas de las búsquedas sobre unos mismos datos.
+
+        Las puntuaciones se guardan en un fichero JSON Lines por contexto (datos, métrica,
+        tipo de estimador y versiones). Cada puntuación se añade como una línea en cuanto se
+        calcula, por lo que una búsqueda interrumpida conserva lo ya entrenado; las líneas
+        incompletas se ignoran al leer.
+
+        Args:
+            directory (Union[str, Path]): Directorio de la caché.
+            context (Dict): Datos que identifican el contexto de las puntuaciones.
+        """
+        self.path: Path = Path(directory) / (_digest(json.dumps(context, sort_keys=True)) + '.jsonl')
+        self.context: Dict = context
+        self.scores: Dict[str, Tuple[float, float]] = dict()
+        if self.path.exists():
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                        self.scores[entry['key']] = (entry['score'], entry['fit_time'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+    def get(self, key: str) -> Union[Tuple[float, float], None]:
+        """ Devuelve la puntuación y el tiempo de entrenamiento guardados de una clave, o None. """
+        return self.scores.get(key)
+
+    def add(self, key: str, score: float, fit_time: float):
+        """
+        Guarda la puntuación de una clave.
+
+        Args:
+            key (str): Clave de la evaluación (parámetros, fold y filas).
+            score (float): Puntuación obtenida.
+            fit_time (float): Segundos de entrenamiento.
+        """
+        self.scores[key] = (score, fit_time)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = ''
+        if not self.path.exists():
+            lines += json.dumps({'context': self.context}, sort_keys=True) + '\n'
+        lines += json.dumps({'key': key, 'score': score, 'fit_time': fit_time}) + '\n'
+        with open(self.path, 'a') as file:
+            file.write(lines)
+
+
+class _Task(NamedTuple):
+    """
+    Tarea privada de entrenamiento: una combinación en un fold, con uno o varios tamaños de bosque.
+
+    Attributes:
+        params (Dict): Parámetros de la combinación, sin `WARM_START_PARAMETER` si `sizes` no está vacío.
+        fold (int): Índice del fold.
+        n_samples (int): Filas de entrenamiento, o None para todas.
+        sizes (Tuple[int, ...]): Tamaños crecientes del bosque a evaluar con `warm_start`, o vacío.
+        keys (Tuple[str, ...]): Clave de la caché de cada evaluación.
+    """
+    params: Dict
+    fold: int
+    n_samples: int
+    sizes: Tuple[int, ...]
+    keys: Tuple[str, ...]
+
+
+class CachedGridSearchCV(BaseEstimator):
+
+    def __init__(self, estimator, param_grid: Union[Dict, List[Dict]], scoring=None, cv=5, n_jobs: int = None,
+                 refit: bool = True, cache: Union[bool, str, Path] = True, halving: bool = False,
+                 resource: str = 'n_samples', factor: int = 3, min_resources: int = None,
+                 max_resources: int = None, warm_start: bool = True, random_state: int = 0,
+                 error_score=np.nan):
+        """
+        Clase que busca la mejor combinación de parámetros con validación cruzada, como `GridSearchCV`.
+
+        Las puntuaciones de cada (combinación, fold) se guardan en la caché y sólo se entrenan las
+        que no estén guardadas. Expone `best_params_`, `best_score_`, `best_estimator_`,
+        `cv_results_`, `predict` y `score` con el mismo significado que `GridSearchCV`.
+
+        Args:
+            estimator: Estimador de scikit-learn a parametrizar.
+            param_grid (Union[Dict, List[Dict]]): Rejilla de parámetros, como en `GridSearchCV`.
+            scoring (optional): Métrica, como en `GridSearchCV`. Default: la del estimador.
+            cv (optional): Número de folds o generador de particiones. Default: 5.
+            n_jobs (int, optional): Procesos para entrenar en paralelo. Default: None (uno).
+            refit (bool, optional): Entrena la mejor combinación con todos los datos. Default: True.
+            cache (Union[bool, str, Path], optional): Directorio de la caché, True para `CACHE_DIR`
+                o False para no usarla. Default: True.
+            halving (bool, optional): Aplica la eliminación sucesiva. Default: False.
+            resource (str, optional): Recurso que crece en cada ronda: 'n_samples' (filas de
+                entrenamiento) o un parámetro entero del estimador, como 'n_estimators'.
+                Default: 'n_samples'.
+            factor (int, optional): Proporción de combinaciones que se descartan en cada ronda y
+                de crecimiento del recurso. Default: 3.
+            min_resources (int, optional): Recurso de la primera ronda. Default: el necesario para
+                llegar al recurso completo con las rondas que requieren las combinaciones.
+            max_resources (int, optional): Recurso de la última ronda cuando es un parámetro.
+                Default: el valor del parámetro en el estimador.
+            warm_start (bool, optional): Hace crecer los bosques en lugar de reentrenarlos. Default: True.
+            random_state (int, optional): Semilla para elegir las filas de las rondas parciales. Default: 0.
+            error_score (optional): Puntuación de los entrenamientos que fallan, o 'raise'. Default: NaN.
+        """
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.cache = cache
+        self.halving = halving
+        self.resource = resource
+        self.factor = factor
+        self.min_resources = min_resources
+        self.max_resources = max_resources
+        self.warm_start = warm_start
+        self.random_state = random_state
+        self.error_score = error_score
+
+    def fit(self, X, y=None, groups=None) -> 'CachedGridSearchCV':
+        """
+        Evalúa la rejilla con validación cruzada y, si se indica, entrena la mejor combinación.
+
+        Args:
+            X: Features de entrenamiento.
+            y (optional): Variable objetivo. Default: None.
+            groups (optional): Grupos para el generador de particiones. Default: None.
+
+        Returns:
+            CachedGridSearchCV: El propio objeto.
+        """
+        estimator = self.estimator
+        defaults = estimator.get_params(deep=False)
+        candidates = list(ParameterGrid(self.param_grid))
+        if not candidates:
+            raise ValueError("The parameter grid is empty")
+        if self.halving and self.resource != 'n_samples':
+            if self.resource not in defaults:
+                raise ValueError(f"Unknown resource parameter: {self.resource}")
+            if any(self.resource in params for params in candidates):
+                raise ValueError(f"The resource parameter {self.resource} cannot be part of the grid")
+
+        cv = check_cv(self.cv, y, classifier=is_classifier(estimator))
+        splits = [(np.asarray(train), np.asarray(test)) for train, test in cv.split(X, y, groups)]
+        self.scorer_ = check_scoring(estimator, self.scoring)
+        self.n_splits_ = len(splits)
+        self._cache = self._open_cache(X, y)
+        self._splits = splits
+        self._warm = self.warm_start and {'warm_start', WARM_START_PARAMETER} <= set(defaults)
+        self._models: Dict[Tuple[str, int], object] = dict()
+        self.n_fits_ = 0
+        self.n_cached_ = 0
+
+        start = time.perf_counter()
+        rows: List[Dict] = list()
+        alive = list(range(len(candidates)))
+        budgets = self._budgets(len(candidates), defaults, splits) if self.halving else [None]
+        for iteration, budget in enumerate(budgets):
+            last = iteration == len(budgets) - 1
+            evaluations = [self._evaluation(candidates[index], budget, last) for index in alive]
+            scores = self._run(X, y, evaluations)
+            for index, (params, n_samples) in zip(alive, evaluations):
+                rows.append({'candidate': index, 'iter': iteration, 'n_resources': budget,
+                             'params': candidates[index],
+                             'scores': [scores[(fold, _key(params, fold, splits, n_samples))][0]
+                                        for fold in range(len(splits))],
+                             'fit_times': [scores[(fold, _key(params, fold, splits, n_samples))][1]
+                                           for fold in range(len(splits))]})
+            if not last:
+                means = {row['candidate']: _mean(row['scores']) for row in rows[-len(alive):]}
+                alive = sorted(alive, key=lambda index: (-means[index], index))
+                alive = sorted(alive[:max(1, math.ceil(len(alive) / self.factor))])
+                groups = {_group(self._evaluation(candidates[index], budget, last)[0]) for index in alive}
+                self._models = {key: model for key, model in self._models.items() if key[0] in groups}
+        self._models = dict()
+        self.search_time_ = time.perf_counter() - start
+
+        self.cv_results_ = _cv_results(rows, len(splits))
+        final = [position for position, row in enumerate(rows) if row['iter'] == len(budgets) - 1]
+        means = [_mean(rows[position]['scores']) for position in final]
+        if all(np.isnan(mean) for mean in means):
+            raise ValueError("All fits failed")
+        self.best_index_ = final[int(np.nanargmax(means))]
+        self.best_params_ = rows[self.best_index_]['params']
+        self.best_score_ = float(self.cv_results_['mean_test_score'][self.best_index_])
+
+        if self.refit:
+            start = time.perf_counter()
+            self.best_estimator_ = clone(estimator).set_params(**self.best_params_)
+            self.best_estimator_.fit(X, y)
+            self.refit_time_ = time.perf_counter() - start
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        """ Predice con el mejor estimador. """
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, y=None) -> float:
+        """ Puntúa el mejor estimador con la métrica de la búsqueda. """
+        return self.scorer_(self.best_estimator_, X, y)
+
+    def _open_cache(self, X, y) -> Union[ScoreCache, None]:
+        """ Método privado que abre la caché del contexto de la búsqueda, o devuelve None si no se usa. """
+        if self.cache is False or self.cache is None:
+            return None
+        directory = CACHE_DIR if self.cache is True else Path(self.cache)
+        estimator = type(self.estimator)
+        context = {'version': CACHE_VERSION, 'sklearn': sklearn.__version__,
+                   'estimator': f'{estimator.__module__}.{estimator.__qualname__}',
+                   'scoring': repr(self.scorer_), 'data': data_hash(X, y), 'random_state': self.random_state}
+        return ScoreCache(directory, context)
+
+    def _budgets(self, n_candidates: int, defaults: Dict, splits: List[Tuple[np.ndarray, np.ndarray]]) -> List[int]:
+        """
+        Método privado que calcula el recurso de cada ronda de la eliminación sucesiva.
+
+        Se necesitan tantas rondas como veces haya que dividir las combinaciones entre `factor`
+        para quedarse con una; el recurso crece por `factor` en cada ronda y la última usa el
+        recurso completo (None con 'n_samples', para compartir la caché con la búsqueda exhaustiva).
+        """
+        factor = self.factor
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        if self.resource == 'n_samples':
+            max_resources = min(len(train) for train, _ in splits)
+            floor = min(MIN_SAMPLES, max_resources)
+        else:
+            max_resources = self.max_resources if self.max_resources is not None else defaults[self.resource]
+            floor = 1
+        iterations = 1 + int(math.floor(math.log(n_candidates, factor) + 1e-9)) if n_candidates > 1 else 1
+        min_resources = self.min_resources if self.min_resources is not None else \
+            max(floor, max_resources // factor ** (iterations - 1))
+        if not 0 < min_resources <= max_resources:
+            raise ValueError(f"min_resources must be between 1 and {max_resources}")
+        iterations = min(iterations, 1 + int(math.floor(math.log(max_resources / min_resources, factor) + 1e-9)))
+        budgets = [min_resources * factor ** iteration for iteration in range(iterations - 1)]
+        return budgets + [None if self.resource == 'n_samples' else max_resources]
+
+    def _evaluation(self, candidate: Dict, budget: int, last: bool) -> Tuple[Dict, int]:
+        """
+        Método privado con los parámetros completos y las filas de una combinación en una ronda.
+
+        Los parámetros incluyen todos los del estimador, de modo que la clave de la caché no
+        depende de qué parámetros se incluyan en la rejilla.
+        """
+        params = dict(self.estimator.get_params(deep=False), **candidate)
+        n_samples = None
+        if budget is not None:
+            if self.resource == 'n_samples':
+                n_samples = None if last else budget
+            else:
+                params[self.resource] = budget
+        params = {name: value for name, value in params.items() if name not in _IGNORED_PARAMETERS}
+        return params, n_samples
+
+    def _run(self, X, y, evaluations: List[Tuple[Dict, int]]) -> Dict[Tuple[int, str], Tuple[float, float]]:
+        """
+        Método privado que obtiene la puntuación de cada evaluación en cada fold.
+
+        Las puntuaciones guardadas se leen de la caché; el resto se agrupan en tareas (una por
+        bosque y fold con `warm_start`) que se entrenan en paralelo y se guardan según terminan.
+
+        Returns:
+            Dict[Tuple[int, str], Tuple[float, float]]: Puntuación y tiempo de entrenamiento por (fold, clave).
+        """
+        results: Dict[Tuple[int, str], Tuple[float, float]] = dict()
+        pending: Dict[Tuple, List[Tuple[Dict, str]]] = dict()
+        for params, n_samples in evaluations:
+            for fold in range(len(self._splits)):
+                key = _key(params, fold, self._splits, n_samples)
+                cached = self._cache.get(key) if self._cache is not None else None
+                if cached is not None:
+                    results[(fold, key)] = cached
+                    self.n_cached_ += 1
+                    continue
+                # Las combinaciones que sólo difieren en el tamaño del bosque se entrenan juntas.
+                warm = self._warm and params.get(WARM_START_PARAMETER) is not None
+                group = (_group(params) if warm else key, fold, n_samples, warm)
+                pending.setdefault(group, list()).append((params, key))
+
+        tasks = list()
+        for (_, fold, n_samples, warm), members in pending.items():
+            if warm:
+                members = sorted(members, key=lambda member: member[0][WARM_START_PARAMETER])
+                base = {name: value for name, value in members[0][0].items() if name != WARM_START_PARAMETER}
+                tasks.append(_Task(base, fold, n_samples, tuple(params[WARM_START_PARAMETER] for params, _ in members),
+                                   tuple(key for _, key in members)))
+            else:
+                tasks.append(_Task(members[0][0], fold, n_samples, (), (members[0][1],)))
+        if not tasks:
+            return results
+
+        # Los bosques se conservan entre rondas sólo si el recurso es su número de árboles.
+        keep = self.halving and self.resource == WARM_START_PARAMETER
+        outputs = Parallel(n_jobs=self.n_jobs, return_as='generator')(
+            delayed(_fit_and_score)(self.estimator, X, y, self._train_rows(task), self._splits[task.fold][1],
+                                    self.scorer_, task, self._models.get((_group(task.params), task.fold)),
+                                    self.error_score, keep)
+            for task in tasks)
+        for task, (scores, fit_times, failed, model) in zip(tasks, outputs):
+            for key, score, fit_time in zip(task.keys, scores, fit_times):
+                results[(task.fold, key)] = (score, fit_time)
+                if self._cache is not None and not failed:
+                    self._cache.add(key, score, fit_time)
+            self.n_fits_ += len(task.keys)
+            if model is not None:
+                self._models[(_group(task.params), task.fold)] = model
+        return results
+
+    def _train_rows(self, task: _Task) -> np.ndarray:
+        """
+        Método privado con las filas de entrenamiento de una tarea.
+
+        En las rondas parciales se toma una muestra aleatoria fija del fold que conserva el orden
+        original de las filas; la muestra de cada ronda contiene a la de la anterior.
+        """
+        train = self._splits[task.fold][0]
+        if task.n_samples is None or task.n_samples >= len(train):
+            return train
+        permutation = check_random_state(self.random_state).permutation(len(train))
+        return train[np.sort(permutation[:task.n_samples])]
+
+
+def data_hash(*arrays) -> str:
+    """
+    Calcula un hash del contenido de unos datos (arrays, DataFrames, Series o matrices dispersas).
+
+    Args:
+        *arrays: Datos a incluir en el hash; los None se ignoran.
+
+    Returns:
+        str: El hash en hexadecimal.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for array in arrays:
+        if array is None:
+            continue
+        if isinstance(array, (pd.DataFrame, pd.Series)):
+            names = list(array.columns) if isinstance(array, pd.DataFrame) else [array.name]
+            dtypes = list(array.dtypes) if isinstance(array, pd.DataFrame) else [array.dtype]
+            digest.update(repr((names, [str(dtype) for dtype in dtypes], array.shape)).encode())
+            digest.update(pd.util.hash_pandas_object(array, index=False).to_numpy().tobytes())
+        elif sparse.issparse(array):
+            array = sparse.csr_matrix(array)
+            digest.update(repr((array.dtype.str, array.shape)).encode())
+            for part in (array.data, array.indices, array.indptr):
+                digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            array = np.asarray(array)
+            digest.update(repr((array.dtype.str, array.shape)).encode())
+            if array.dtype == object:
+                digest.update(pd.util.hash_array(array.ravel()).tobytes())
+            else:
+                digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _fit_and_score(estimator, X, y, train: np.ndarray, test: np.ndarray, scorer, task: _Task, model,
+                   error_score, keep: bool) -> Tuple[List[float], List[float], bool, object]:
+    """
+    Función privada que entrena y puntúa una tarea en un proceso del pool.
+
+    Con `task.sizes` el bosque se entrena con el primer tamaño (o se continúa `model`, entrenado
+    en la ronda anterior) y se le añaden árboles hasta cada uno de los siguientes.
+
+    Returns:
+        Tuple[List[float], List[float], bool, object]: Puntuaciones, tiempos de entrenamiento,
+            si el entrenamiento falló y el bosque entrenado si `keep` (para continuarlo).
+    """
+    X_train, y_train = _rows(X, train), _rows(y, train)
+    X_test, y_test = _rows(X, test), _rows(y, test)
+    scores: List[float] = list()
+    fit_times: List[float] = list()
+    try:
+        if not task.sizes:
+            model = clone(estimator).set_params(**task.params)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_times.append(time.perf_counter() - start)
+            scores.append(float(scorer(model, X_test, y_test)))
+            return scores, fit_times, False, None
+
+        if model is None or model.get_params()[WARM_START_PARAMETER] > task.sizes[0]:
+            model = clone(estimator).set_params(**task.params, warm_start=True)
+        for size in task.sizes:
+            start = time.perf_counter()
+            model.set_params(**{WARM_START_PARAMETER: size}).fit(X_train, y_train)
+            fit_times.append(time.perf_counter() - start)
+            scores.append(float(scorer(model, X_test, y_test)))
+        return scores, fit_times, False, model if keep else None
+    except Exception as error:
+        if error_score == 'raise':
+            raise
+        warnings.warn(f"Fit failed for {task.params}: {error!r}", FitFailedWarning)
+        missing = len(task.keys) - len(scores)
+        return scores + [error_score] * missing, fit_times + [0.0] * missing, True, None
+
+
+def _rows(data, index: np.ndarray):
+    """ Función privada que selecciona filas de un array, DataFrame o matriz dispersa. """
+    if data is None:
+        return None
+    if hasattr(data, 'iloc'):
+        return data.iloc[index]
+    if sparse.issparse(data):
+        return sparse.csr_matrix(data)[index]
+    return np.asarray(data)[index]
+
+
+def _canonical(value):
+    """ Función privada que convierte un valor en uno serializable en JSON de forma estable. """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(name): _canonical(item) for name, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def _digest(value) -> str:
+    """ Función privada con el hash corto de un valor. """
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _group(params: Dict) -> str:
+    """ Función privada que identifica las combinaciones que sólo difieren en `WARM_START_PARAMETER`. """
+    return _digest(_canonical({name: value for name, value in params.items() if name != WARM_START_PARAMETER}))
+
+
+def _key(params: Dict, fold: int, splits: List[Tuple[np.ndarray, np.ndarray]], n_samples: int) -> str:
+    """
+    Función privada con la clave de la caché de una combinación en un fold.
+
+    El fold se identifica por el hash de sus filas de entrenamiento y validación, de modo que
+    cambiar la validación cruzada no reutiliza puntuaciones de otras particiones.
+    """
+    train, test = splits[fold]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(train, dtype=np.int64).tobytes())
+    digest.update(b'|')
+    digest.update(np.asarray(test, dtype=np.int64).tobytes())
+    return json.dumps([_canonical(params), digest.hexdigest(), n_samples], sort_keys=True)
+
+
+def _mean(scores: List[float]) -> float:
+    """ Función privada con la media de las puntuaciones, -inf si alguna falló (para ordenar). """
+    mean = float(np.mean(scores))
+    return -math.inf if np.isnan(mean) else mean
+
+
+def _cv_results(rows: List[Dict], n_splits: int) -> Dict[str, np.ndarray]:
+    """
+    Función privada que construye `cv_results_` con el formato de `GridSearchCV`.
+
+    Con eliminación sucesiva hay una fila por combinación y ronda ('iter', 'n_resources'); las
+    combinaciones de la última ronda se ordenan primero en 'rank_test_score'.
+    """
+    scores = np.array([row['scores'] for row in rows], dtype=float).reshape(len(rows), n_splits)
+    fit_times = np.array([row['fit_times'] for row in rows], dtype=float).reshape(len(rows), n_splits)
+    results = {
+        'params': [row['params'] for row in rows],
+        'iter': np.array([row['iter'] for row in rows]),
+        'n_resources': np.array([row['n_resources'] for row in rows], dtype=object),
+        'mean_fit_time': fit_times.mean(axis=1),
+        'std_fit_time': fit_times.std(axis=1),
+        'mean_test_score': scores.mean(axis=1),
+        'std_test_score': scores.std(axis=1),
+    }
+    for fold in range(n_splits):
+        results[f'split{fold}_test_score'] = scores[:, fold]
+    for name in sorted({name for row in rows for name in row['params']}):
+        results[f'param_{name}'] = np.ma.masked_array([row['params'].get(name) for row in rows],
+                                                      mask=[name not in row['params'] for row in rows], dtype=object)
+    keys = [(-row['iter'], -_mean(row['scores'])) for row in rows]
+    ordered = sorted(keys)
+    ranks = np.array([bisect.bisect_left(ordered, key) + 1 for key in keys], dtype=np.int32)
+    results['rank_test_score'] = ranks
+    return results
+
+
+def _bike_sharing(target: str, rows: int = None) -> Tuple[pd.DataFrame, pd.Series]:
+    """ Función privada que prepara el conjunto de entrenamiento del notebook de random forest. """
+    features = ['season', 'mnth', 'hr', 'holiday', 'yr', 'weekday', 'workingday', 'weathersit',
+                'temp', 'atemp', 'hum', 'windspeed']
+    df = load_dataset('bike-sharing-hour')
+    df = pd.concat([df[features + ['cnt']], pd.Series(df.cnt > 20, name='ventas_altas')], axis=1)
+    df_train, _ = train_test_split(df, test_size=0.3, random_state=26)
+    if rows is not None:
+        df_train = df_train.iloc[:rows]
+    return df_train[features], df_train[target]
+
+
+def _auto_mpg(rows: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """ Función privada que prepara el conjunto de entrenamiento normalizado del notebook de SVR y MLP. """
+    features = ['cylinders', 'displacement', 'horsepower', 'weight', 'acceleration', 'model_year', 'origin']
+    df = load_dataset('auto-mpg').dropna(subset=['horsepower'])
+    X_train, _, y_train, _ = train_test_split(df[features].astype(np.float64), df['mpg'], test_size=0.3,
+                                              random_state=109)
+    X_train = StandardScaler().fit_transform(X_train)
+    y_train = StandardScaler().fit_transform(y_train.to_numpy().reshape(-1, 1))[:, 0]
+    if rows is not None:
+        X_train, y_train = X_train[:rows], y_train[:rows]
+    return X_train, y_train
+
+
+# Rejillas de los notebooks: estimador, parámetros y datos de entrenamiento.
+GRIDS = {
+    'forest-cls': (lambda: ensemble.RandomForestClassifier(random_state=1),
+                   {'criterion': ['gini', 'entropy'], 'max_features': ['sqrt', None],
+                    'n_estimators': [10, 100, 150], 'max_depth': range(5, 15)},
+                   lambda rows: _bike_sharing('ventas_altas', rows)),
+    'forest-reg': (lambda: ensemble.RandomForestRegressor(random_state=13),
+                   {'criterion': ['squared_error'], 'max_features': ['sqrt', None],
+                    'n_estimators': [100, 150], 'max_depth': range(15, 25)},
+                   lambda rows: _bike_sharing('cnt', rows)),
+    'tree-cls': (lambda: tree.DecisionTreeClassifier(random_state=1),
+                 {'criterion': ['gini', 'entropy'], 'max_depth': range(1, 15)},
+                 lambda rows: _bike_sharing('ventas_altas', rows)),
+    'svr': (lambda: SVR(kernel='rbf'),
+            {'C': range(1, 20), 'gamma': np.logspace(-2, 2, 5)},
+            _auto_mpg),
+    'mlp': (lambda: MLPRegressor(solver='adam', max_iter=500, random_state=219),
+            {'hidden_layer_sizes': ((10), (10, 10), (10, 10, 10), (70), (70, 70), (70, 70, 70),
+                                    (130), (130, 130), (130, 130, 130)),
+             'activation': ('tanh', 'relu')},
+            _auto_mpg),
+}
+
+
+def _runs(grid: str, rows: int, n_jobs: int, halving: bool, resource: str,
+          baseline: bool) -> Iterator[Tuple[str, object, float]]:
+    """ Función privada que ejecuta las búsquedas del benchmark y devuelve (nombre, búsqueda, segundos). """
+    factory, param_grid, data = GRIDS[grid]
+    X, y = data(rows)
+    if baseline:
+        start = time.perf_counter()
+        search = GridSearchCV(factory(), param_grid, cv=5, n_jobs=n_jobs).fit(X, y)
+        yield 'GridSearchCV', search, time.perf_counter() - start
+
+    if halving and resource != 'n_samples':
+        param_grid = {name: values for name, values in param_grid.items() if name != resource}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('en frío', 'repetida'):
+            start = time.perf_counter()
+            search = CachedGridSearchCV(factory(), param_grid, cv=5, n_jobs=n_jobs, cache=directory,
+                                        halving=halving, resource=resource).fit(X, y)
+            yield f'caché {name}', search, time.perf_counter() - start
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Búsqueda por rejilla con caché frente a GridSearchCV")
+    parser.add_argument('--grid', choices=sorted(GRIDS), default='svr')
+    parser.add_argument('--rows', type=int, default=None, help="Filas de entrenamiento a usar")
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--halving', action='store_true', help="Aplica la eliminación sucesiva")
+    parser.add_argument('--resource', default='n_samples', help="Recurso de la eliminación sucesiva")
+    parser.add_argument('--no-baseline', dest='baseline', action='store_false', help="No ejecuta GridSearchCV")
+    options = parser.parse_args(args)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for name, search, elapsed in _runs(options.grid, options.rows, options.n_jobs, options.halving,
+                                           options.resource, options.baseline):
+            fits = getattr(search, 'n_fits_', len(search.cv_results_['params']) * search.n_splits_)
+            print(f"{name:<16} {elapsed:>9.2f}s  {fits:>5d} entrenamientos  "
+                  f"score={search.best_score_:.4f}  {search.best_params_}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,13 @@ from .actions import GetBanana, MoveHorizontally, ChangeLevel, PushBox
 from .heuristic import Heuristic
 from .element import Element, Banana, Box, Monkey
 from .state import State
+from .search import BestFirstSearch
+from .regression import RegressionSearch
+from .planning_graph import PlanningGraph
+from .anytime import AnytimePlanner
+from .batch import BatchPlanner
+from .config import PlannerConfig
+from .replanning import ReplanningPlanner
+from .vectorized import VectorizedActions
 from .strips import Strips
+from .symmetry import Symmetries
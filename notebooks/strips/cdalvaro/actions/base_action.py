@@ -1,19 +1,27 @@
 from abc import abstractmethod
 from typing import List, TypeVar, Union
 
+from ..flyweight import Flyweight, _rebuild
 from ..properties import Properties
 from ..state import State
 
 Actions = TypeVar('Actions', bound=List['BaseAction'])
 
 
-class BaseAction:
+class BaseAction(metaclass=Flyweight):
+    __slots__ = ('name', 'weight', 'precondition', 'add_list', 'remove_list', '_hash', '_arguments',
+                 '__weakref__')
     verbose: bool = False
+    # Argumentos de construcción iniciales que no son objetos del problema y no se permutan.
+    fixed_arguments: int = 0
 
     def __init__(self, name: str, weight: int = 0):
         """
         Clase base para modelizar una acción que aplica sobre un estado.
 
+        Las acciones son únicas: construir la misma acción devuelve siempre la misma
+        instancia. Una vez construida, sus listas de propiedades se congelan.
+
         Args:
             name (str): Nombre que describe la acción.
             weight (int, optional): El peso que tiene asociada la acción. Default: 0.
@@ -23,6 +31,7 @@ class BaseAction:
         self.precondition: Properties = set()
         self.add_list: Properties = set()
         self.remove_list: Properties = set()
+        self._hash: int = hash(name)
 
     def can_apply(self, state: State, reverse: bool) -> bool:
         """
@@ -84,6 +93,14 @@ class BaseAction:
 
         return State(properties)
 
+    def _finalize(self):
+        """
+        Método privado para congelar las listas de propiedades una vez construida la acción.
+        """
+        self.precondition = frozenset(self.precondition)
+        self.add_list = frozenset(self.add_list)
+        self.remove_list = frozenset(self.remove_list)
+
     @abstractmethod
     def _set_precondition(self):
         """
@@ -118,7 +135,10 @@ class BaseAction:
         return self.__str__()
 
     def __eq__(self, other) -> bool:
-        return self.name == other.name
+        return self is other
 
     def __hash__(self) -> int:
-        return hash(self.name)
+        return self._hash
+
+    def __reduce__(self):
+        return _rebuild, (type(self),) + self._arguments
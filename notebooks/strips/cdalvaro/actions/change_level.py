@@ -4,8 +4,9 @@ from ..properties import Level, TopLevel, GroundLevel, AtPosition, AtLevel
 
 
 class ChangeLevel(BaseAction):
+    __slots__ = ('position', 'to_level', 'from_level', 'box')
 
-    def __init__(self, position: int, to_level: Level):
+    def __init__(self, position: int, to_level: Level, box: Box = None):
         """
         Clase con la acción de cambiar de nivel.
 
@@ -14,12 +15,18 @@ class ChangeLevel(BaseAction):
         Args:
             position (int): Posición horizontal en la que se encuentra el mono.
             to_level (Level): Nivel en el que finalizará el mono.
+            box (Box, optional): Caja sobre la que sube o de la que baja el mono. Default: Box().
         """
+        if box is None:
+            box = Box()
         name = f"Cambia {Monkey()} al nivel {to_level} en posición {position}"
+        if box.index is not None:
+            name += f" sobre {box}"
         weight = 3
 
         super().__init__(name, weight)
         self.position: int = position
+        self.box: Box = box
         self.to_level: Level = to_level
         self.from_level: Level = GroundLevel() if to_level == TopLevel() else TopLevel()
 
@@ -33,7 +40,7 @@ class ChangeLevel(BaseAction):
         * El mono se encuentra en la posición 'position'
         * El mono está en el nivel opuesto al que se va a mover
         """
-        self.precondition.add(AtPosition(Box(), self.position))
+        self.precondition.add(AtPosition(self.box, self.position))
         self.precondition.add(AtPosition(Monkey(), self.position))
         self.precondition.add(AtLevel(Monkey(), self.from_level, self.position))
 
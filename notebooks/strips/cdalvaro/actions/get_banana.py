@@ -4,8 +4,9 @@ from ..properties import AtLevel, TopLevel, AtPosition, Has
 
 
 class GetBanana(BaseAction):
+    __slots__ = ('position', 'banana', 'box')
 
-    def __init__(self, position: int):
+    def __init__(self, position: int, banana: Banana = None, box: Box = None):
         """
         Clase con la acción de conseguir un plátano.
 
@@ -13,12 +14,22 @@ class GetBanana(BaseAction):
 
         Args:
             position (int): Posición en la que el mono consigue el plátano.
+            banana (Banana, optional): Plátano que consigue el mono. Default: Banana().
+            box (Box, optional): Caja sobre la que está subido el mono. Default: Box().
         """
-        name = f"{Monkey()} consigue {Banana()} en posición {position}"
+        if banana is None:
+            banana = Banana()
+        if box is None:
+            box = Box()
+        name = f"{Monkey()} consigue {banana} en posición {position}"
+        if box.index is not None:
+            name += f" sobre {box}"
         weight = 4
 
         super().__init__(name, weight)
         self.position: int = position
+        self.banana: Banana = banana
+        self.box: Box = box
 
         self._set_precondition()
         self._set_add_list()
@@ -31,16 +42,16 @@ class GetBanana(BaseAction):
         * El mono se encuentra en el nivel superior
         * El plátano se encuentra en la posición: 'position'
         """
-        self.precondition.add(AtPosition(Box(), self.position))
+        self.precondition.add(AtPosition(self.box, self.position))
         self.precondition.add(AtPosition(Monkey(), self.position))
-        self.precondition.add(AtPosition(Banana(), self.position))
+        self.precondition.add(AtPosition(self.banana, self.position))
         self.precondition.add(AtLevel(Monkey(), TopLevel(), self.position))
 
     def _set_add_list(self):
         """
         * El mono tendrá el plátano
         """
-        self.add_list.add(Has(Monkey(), Banana()))
+        self.add_list.add(Has(Monkey(), self.banana))
 
     def _set_remove_list(self):
         """ (No se elimina ninguna propiedad) """
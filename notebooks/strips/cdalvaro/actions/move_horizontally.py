@@ -4,6 +4,7 @@ from ..properties import AtLevel, GroundLevel, AtPosition
 
 
 class MoveHorizontally(BaseAction):
+    __slots__ = ('element', 'from_position', 'to_position')
 
     def __init__(self, element: Element, from_position: int, to_position: int):
         """
@@ -4,8 +4,9 @@ from ..properties import AtLevel, GroundLevel, AtPosition
 
 
 class PushBox(BaseAction):
+    __slots__ = ('from_position', 'to_position', 'box')
 
-    def __init__(self, from_position: int, to_position: int):
+    def __init__(self, from_position: int, to_position: int, box: Box = None):
         """
         Clase con la acción de empujar la caja.
 
@@ -14,13 +15,17 @@ class PushBox(BaseAction):
         Args:
             from_position (int): Posición desde la que se va a mover el elemento.
             to_position (int): Posición a la que se va a mover el elemento.
+            box (Box, optional): Caja que se empuja. Default: Box().
         """
-        name = f"{Monkey()} empuja la {Box()} de {from_position} a {to_position}"
+        if box is None:
+            box = Box()
+        name = f"{Monkey()} empuja la {box} de {from_position} a {to_position}"
         weight = 1
 
         super().__init__(name, weight)
         self.from_position: int = from_position
         self.to_position: int = to_position
+        self.box: Box = box
 
         self._set_precondition()
         self._set_add_list()
@@ -32,7 +37,7 @@ class PushBox(BaseAction):
         * El mono se encuentra en la posición de partida
         * El mono está en el nivel inferior
         """
-        self.precondition.add(AtPosition(Box(), self.from_position))
+        self.precondition.add(AtPosition(self.box, self.from_position))
         self.precondition.add(AtPosition(Monkey(), self.from_position))
         self.precondition.add(AtLevel(Monkey(), GroundLevel(), self.from_position))
 
@@ -41,7 +46,7 @@ class PushBox(BaseAction):
         * La caja estará en la nueva posición
         * El mono estará en la nueva posición
         """
-        self.add_list.add(AtPosition(Box(), self.to_position))
+        self.add_list.add(AtPosition(self.box, self.to_position))
         self.add_list.add(AtPosition(Monkey(), self.to_position))
 
     def _set_remove_list(self):
@@ -49,5 +54,5 @@ class PushBox(BaseAction):
         * La caja dejará de estar en la posición de origen
         * El mono dejará de estar en la posición de origen
         """
-        self.remove_list.add(AtPosition(Box(), self.from_position))
+        self.remove_list.add(AtPosition(self.box, self.from_position))
         self.remove_list.add(AtPosition(Monkey(), self.from_position))
@@ -0,0 +1,146 @@
+from time import perf_counter
+from typing import List, NamedTuple, Sequence, Tuple, Union
+
+from .actions import Actions
+from .heuristic import Heuristic
+from .planning_graph import PlanningGraph
+from .plans import eliminate_redundant
+from .search import BestFirstSearch
+from .state import State
+from .stats import PlannerStats
+
+# Paso de la planificación: peso del estimador (None para la búsqueda voraz) y nombre del estimador.
+Step = Tuple[Union[float, None], Union[str, None]]
+
+
+class AnytimeResult(NamedTuple):
+    """
+    Resultado de una planificación con presupuesto.
+
+    Attributes:
+        plan (Union[Actions, bool]): Mejor plan encontrado o False si no se ha encontrado ninguno.
+        cost (Union[int, None]): Coste del mejor plan.
+        optimal (bool): True si se ha demostrado que el plan es óptimo.
+        status (str): 'solved' si se ha encontrado un plan o, si no, el estado de la última búsqueda
+            ('unsolvable', 'timeout' o 'node_limit').
+        history (List[Tuple[float, int]]): Segundos transcurridos y coste de cada mejora del plan.
+    """
+    plan: Union[Actions, bool]
+    cost: Union[int, None]
+    optimal: bool
+    status: str
+    history: List[Tuple[float, int]]
+
+
+class AnytimePlanner:
+    # Secuencia por defecto: una búsqueda voraz para obtener rápidamente un primer plan,
+    # A* ponderado con pesos decrecientes y, por último, A* con un estimador admisible.
+    schedule: Sequence[Step] = ((None, 'ff'), (5.0, 'add'), (3.0, 'add'), (2.0, 'add'), (1.5, 'add'), (1.0, 'max'))
+
+    # Estimadores admisibles, con los que A* sin peso demuestra la optimalidad. El recuento de
+    # objetivos pendientes (None) no lo es: una acción puede conseguir varios objetivos a la vez.
+    admissible: Sequence[Union[str, None]] = ('max',)
+
+    def __init__(self, initial_state: State, goal: State, heuristic: Heuristic,
+                 schedule: Sequence[Step] = None, reachability: bool = True, stats: PlannerStats = None):
+        """
+        Clase que implementa una planificación anytime con presupuesto de tiempo y de nodos.
+
+        Ejecuta `BestFirstSearch` siguiendo la secuencia de pasos (A* ponderado con pesos
+        decrecientes, reiniciando la búsqueda en cada paso). Cada plan encontrado se mejora
+        eliminando sus acciones redundantes y su coste se usa como cota de las búsquedas
+        siguientes, que sólo buscan planes estrictamente mejores.
+
+        Cuando un paso sin peso con un estimador admisible termina, el mejor plan es óptimo.
+
+        Con `reachability=True`, antes de buscar se construye el grafo de planificación del
+        problema: si demuestra que el objetivo no es alcanzable, no se consume el presupuesto.
+
+        Args:
+            initial_state (State): Estado inicial del que parte el problema.
+            goal (State): Estado objetivo que debe alcanzar la planificación.
+            heuristic (Heuristic): Heurística que proporciona las acciones del problema y su codificación.
+            schedule (Sequence[Step], optional): Pasos (peso, estimador) a ejecutar en orden.
+                Default: `AnytimePlanner.schedule`.
+            reachability (bool, optional): Comprueba con `PlanningGraph` si el problema tiene solución. Default: True.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: el de la heurística.
+        """
+        self.initial_state: State = initial_state
+        self.goal: State = goal
+        self.heuristic: Heuristic = heuristic
+        self.schedule: Sequence[Step] = schedule if schedule is not None else AnytimePlanner.schedule
+        self.reachability: bool = reachability
+        self.stats: PlannerStats = stats if stats is not None else heuristic.stats
+
+    def get_plan(self, time_budget: float = None, node_budget: int = None) -> AnytimeResult:
+        """
+        Busca el mejor plan posible dentro del presupuesto.
+
+        Args:
+            time_budget (float, optional): Segundos disponibles. Default: None (sin límite).
+            node_budget (int, optional): Nodos a expandir entre todas las búsquedas. Default: None (sin límite).
+
+        Returns:
+            AnytimeResult: El mejor plan encontrado, su coste y si es óptimo.
+        """
+        start = perf_counter()
+        deadline = None if time_budget is None else start + time_budget
+        nodes = 0
+
+        best: Union[Actions, bool] = False
+        history: List[Tuple[float, int]] = list()
+        status = BestFirstSearch.UNSOLVABLE
+        optimal = False
+
+        if self.reachability:
+            graph = PlanningGraph(self.heuristic.actions, self.initial_state, self.stats)
+            if graph.is_unsolvable(self.goal):
+                if self.stats is not None:
+                    self.stats.event('unsolvable_proved', levels=len(graph.facts) - 1)
+                return AnytimeResult(best, None, optimal, status, history)
+
+        for weight, estimator in self.schedule:
+            time_limit = None
+            if deadline is not None:
+                time_limit = deadline - perf_counter()
+                if time_limit <= 0:
+                    status = BestFirstSearch.TIMEOUT
+                    break
+            node_limit = None
+            if node_budget is not None:
+                node_limit = node_budget - nodes
+                if node_limit <= 0:
+                    status = BestFirstSearch.NODE_LIMIT
+                    break
+
+            search = BestFirstSearch(self.initial_state, self.goal, self.heuristic,
+                                     weight=weight if weight is not None else 1.0, greedy=weight is None,
+                                     estimator=estimator, stats=self.stats, time_limit=time_limit,
+                                     node_limit=node_limit, bound=len(best) if best is not False else None)
+            plan = search.get_plan()
+            nodes += search.expanded
+            status = search.status
+
+            if plan is not False:
+                plan = eliminate_redundant(self.initial_state, self.goal, plan)
+                if best is False or len(plan) < len(best):
+                    best = plan
+                    history.append((perf_counter() - start, len(best)))
+                    if self.stats is not None:
+                        self.stats.event('anytime_improvement', cost=len(best), weight=weight)
+
+            finished = status in (BestFirstSearch.SOLVED, BestFirstSearch.UNSOLVABLE)
+            if finished and weight == 1.0 and estimator in self.admissible:
+                # A* admisible completo: su plan es óptimo o, si no encuentra ninguno
+                # más barato que la cota, el mejor plan anterior lo es.
+                optimal = best is not False
+                break
+            if status == BestFirstSearch.UNSOLVABLE and best is False:
+                # Sin cota, agotar la búsqueda demuestra que el problema no tiene solución.
+                break
+            if status in (BestFirstSearch.TIMEOUT, BestFirstSearch.NODE_LIMIT):
+                break
+
+        if best is not False:
+            status = BestFirstSearch.SOLVED
+        return AnytimeResult(best, len(best) if best is not False else None, optimal, status, history)
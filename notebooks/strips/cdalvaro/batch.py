@@ -0,0 +1,240 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from .actions import Actions
+from .generator import Problem
+from .heuristic import Heuristic
+from .search import BestFirstSearch
+from .state import State
+
+# Tarea enviada a los procesos: (índice del problema, máscara inicial, máscara objetivo).
+Task = Tuple[int, int, int]
+
+# Resultado devuelto por los procesos: (índice, estado, índices de las acciones del plan,
+# coste, nodos expandidos, nodos generados, segundos empleados).
+RawResult = Tuple[int, str, Union[List[int], None], Union[int, None], int, int, float]
+
+
+class BatchResult(NamedTuple):
+    """
+    Resultado de uno de los problemas de un lote.
+
+    Attributes:
+        index (int): Posición del problema en el lote.
+        status (str): Estado final de la búsqueda ('solved', 'unsolvable' o 'timeout').
+        plan (Union[Actions, bool]): Acciones del plan o False si no se ha encontrado.
+        cost (Union[int, None]): Coste del plan encontrado.
+        expanded (int): Nodos expandidos.
+        generated (int): Nodos generados.
+        elapsed (float): Segundos empleados en la búsqueda.
+    """
+    index: int
+    status: str
+    plan: Union[Actions, bool]
+    cost: Union[int, None]
+    expanded: int
+    generated: int
+    elapsed: float
+
+
+# Dominio y opciones de búsqueda de cada proceso, fijados por `_initialize`.
+_domain: Union[Heuristic, None] = None
+_options: Dict = dict()
+
+
+def _initialize(domain: Heuristic, options: Dict):
+    """ Función privada que recibe el dominio una única vez al arrancar cada proceso. """
+    global _domain, _options
+    _domain = domain
+    _options = options
+
+
+def _solve_chunk(chunk: List[Task]) -> List[RawResult]:
+    """
+    Función privada que resuelve en un proceso un bloque de problemas.
+
+    Los estados llegan codificados como máscaras y el plan se devuelve como índices
+    de la tabla de acciones, de modo que no se serializa ninguna acción.
+
+    Args:
+        chunk (List[Task]): Problemas a resolver.
+
+    Returns:
+        List[RawResult]: Resultados de los problemas del bloque.
+    """
+    encoding = _domain.encoding
+    index = _domain.actions.index
+
+    results = list()
+    for problem, initial_mask, goal_mask in chunk:
+        start = perf_counter()
+        search = BestFirstSearch(encoding.state(initial_mask), encoding.state(goal_mask), _domain, **_options)
+        plan = search.get_plan()
+        if plan is not False:
+            compiled = search.encoding.compile
+            plan = [index[compiled(action)] for action in plan]
+        else:
+            plan = None
+        results.append((problem, search.status, plan, search.cost, search.expanded, search.generated,
+                        perf_counter() - start))
+    return results
+
+
+class BatchPlanner:
+
+    def __init__(self, heuristic: Heuristic, workers: int = None, chunksize: int = 1, timeout: float = None,
+                 weight: float = 1.0, greedy: bool = False, estimator: str = None, context: str = None):
+        """
+        Clase para resolver en paralelo lotes de problemas sobre un mismo dominio.
+
+        Reparte los problemas entre un conjunto de procesos con `BestFirstSearch`. La heurística
+        (codificación y tabla de acciones ya instanciadas) se envía una única vez a cada proceso
+        al arrancarlo, y cada tarea sólo transporta las máscaras del estado inicial y del objetivo.
+
+        La tabla de acciones de la heurística debe cubrir todos los problemas del lote: se puede
+        construir con `BatchPlanner.domain`, a partir de los estados iniciales de todos ellos.
+
+        Args:
+            heuristic (Heuristic): Heurística con el dominio ya instanciado.
+            workers (int, optional): Número de procesos. Default: None (número de CPUs).
+            chunksize (int, optional): Problemas por tarea enviada a los procesos. Default: 1.
+            timeout (float, optional): Segundos máximos de búsqueda de cada problema. Default: None.
+            weight (float, optional): Peso del estimador de `BestFirstSearch`. Default: 1.0.
+            greedy (bool, optional): Activa la búsqueda voraz de `BestFirstSearch`. Default: False.
+            estimator (str, optional): Nombre de la heurística relajada ('add', 'max' o 'ff').
+                Default: None (número de objetivos pendientes).
+            context (str, optional): Método de arranque de los procesos ('fork', 'spawn' o 'forkserver').
+                Default: None (el de la plataforma).
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("At least one worker is required")
+        if chunksize < 1:
+            raise ValueError("Chunk size must be positive")
+
+        self.heuristic: Heuristic = heuristic
+        self.workers: Union[int, None] = workers
+        self.chunksize: int = chunksize
+        self.context: Union[str, None] = context
+        self.options: Dict = {'weight': weight, 'greedy': greedy, 'estimator': estimator, 'time_limit': timeout}
+
+    @staticmethod
+    def domain(states: Iterable[State], positions: Iterable[int] = None) -> Heuristic:
+        """
+        Construye una heurística cuyo dominio cubre todos los estados indicados.
+
+        Las acciones se instancian y podan desde la unión de los estados, por lo que
+        son alcanzables las de cualquiera de ellos.
+
+        Args:
+            states (Iterable[State]): Estados iniciales de los problemas del lote.
+            positions (Iterable[int], optional): Posiciones del escenario. Default: `Heuristic.positions`.
+
+        Returns:
+            Heuristic: Heurística con el dominio común.
+        """
+        properties = set()
+        for state in states:
+            properties.update(state.properties)
+        return Heuristic(State(properties), positions)
+
+    def solve(self, problems: Iterable[Union[Problem, Tuple[State, State]]]) -> Iterator[BatchResult]:
+        """
+        Resuelve los problemas y devuelve sus resultados según van terminando.
+
+        Los problemas se consumen de forma perezosa y nunca hay más de dos tareas
+        pendientes por proceso. Cada resultado indica la posición de su problema en el lote.
+
+        Args:
+            problems (Iterable[Union[Problem, Tuple[State, State]]]): Problemas o pares (estado inicial, objetivo).
+
+        Returns:
+            Iterator[BatchResult]: Resultados en orden de finalización.
+        """
+        workers = self.workers or os.cpu_count() or 1
+        context = multiprocessing.get_context(self.context) if self.context is not None else None
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_initialize,
+                                 initargs=(self.heuristic, self.options)) as executor:
+            limit = 2 * workers
+            pending = set()
+            for chunk in self._chunks(problems):
+                pending.add(executor.submit(_solve_chunk, chunk))
+                if len(pending) >= limit:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._collect(done)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self._collect(done)
+
+    def solve_all(self, problems: Iterable[Union[Problem, Tuple[State, State]]]) -> List[BatchResult]:
+        """
+        Resuelve los problemas y devuelve sus resultados en el orden del lote.
+
+        Args:
+            problems (Iterable[Union[Problem, Tuple[State, State]]]): Problemas o pares (estado inicial, objetivo).
+
+        Returns:
+            List[BatchResult]: Resultados ordenados por la posición de su problema.
+        """
+        return sorted(self.solve(problems), key=lambda result: result.index)
+
+    def _chunks(self, problems: Iterable[Union[Problem, Tuple[State, State]]]) -> Iterator[List[Task]]:
+        """
+        Método privado para codificar los problemas y agruparlos en bloques.
+
+        Args:
+            problems (Iterable[Union[Problem, Tuple[State, State]]]): Problemas a codificar.
+
+        Returns:
+            Iterator[List[Task]]: Bloques de como mucho `chunksize` tareas.
+        """
+        chunk = list()
+        for index, problem in enumerate(problems):
+            if isinstance(problem, Problem):
+                initial_state, goal = problem.initial_state, problem.goal
+            else:
+                initial_state, goal = problem
+            chunk.append((index, self._encode(initial_state), self._encode(goal)))
+            if len(chunk) == self.chunksize:
+                yield chunk
+                chunk = list()
+        if chunk:
+            yield chunk
+
+    def _encode(self, state: State) -> int:
+        """
+        Método privado para codificar un estado con la codificación del dominio.
+
+        Args:
+            state (State): Estado a codificar.
+
+        Returns:
+            int: Máscara del estado.
+        """
+        ids = self.heuristic.encoding.ids
+        for prop in state.properties:
+            if prop not in ids:
+                raise ValueError(f"Property {prop} is not part of the grounded domain")
+        return self.heuristic.encoding.encode(state)
+
+    def _collect(self, futures: Iterable[Future]) -> Iterator[BatchResult]:
+        """
+        Método privado para traducir los resultados de las tareas terminadas.
+
+        Args:
+            futures (Iterable[Future]): Tareas terminadas.
+
+        Returns:
+            Iterator[BatchResult]: Resultados con los planes reconstruidos.
+        """
+        actions = self.heuristic.actions.actions
+        for future in futures:
+            for index, status, plan, cost, expanded, generated, elapsed in future.result():
+                if plan is not None:
+                    plan = [actions[i].action for i in plan]
+                else:
+                    plan = False
+                yield BatchResult(index, status, plan, cost, expanded, generated, elapsed)
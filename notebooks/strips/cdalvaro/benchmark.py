@@ -0,0 +1,444 @@
+"""
+Batería de pruebas de rendimiento de los planificadores.
+
+Ejecuta cada planificador sobre problemas generados de tamaño creciente y guarda
+un informe JSON con el tiempo, los nodos expandidos, las llamadas a la heurística,
+la memoria máxima y la longitud del plan de cada ejecución.
+
+Con `--threads` ejecuta en su lugar una prueba de estrés: resuelve los problemas con
+muchos planificadores a la vez desde varios hilos y comprueba que los planes coinciden
+con los obtenidos de forma secuencial. Con `--check-relaxed` comprueba que las heurísticas
+relajadas incrementales coinciden con su evaluación desde cero sobre paseos aleatorios.
+
+Uso:
+    python -m cdalvaro.benchmark --positions 3 5 10 --boxes 1 2 --output informe.json
+    python -m cdalvaro.benchmark --positions 3 4 5 --boxes 1 2 --threads 8 --rounds 4
+    python -m cdalvaro.benchmark --positions 6 --boxes 2 --check-relaxed 20
+    python -m cdalvaro.benchmark --pddl domains/blocksworld/domain.pddl domains/blocksworld/p01.pddl
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import queue
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from random import Random
+from typing import Callable, Dict, List, Tuple, Union
+
+from .config import PlannerConfig
+from .generator import Problem, generate_suite
+from .heuristic import Heuristic
+from .pddl import load
+from .regression import RegressionSearch
+from .relaxed import RELAXED_HEURISTICS
+from .search import BestFirstSearch
+from .stats import PlannerStats
+from .strips import Strips
+from .symmetry import Symmetries
+
+# Planificadores disponibles: construyen el planificador a partir del problema y su heurística.
+PLANNERS: Dict[str, Callable[[Problem, Heuristic], object]] = {
+    'strips': lambda problem, heuristic: Strips(problem.initial_state, problem.goal, heuristic,
+                                                config=PlannerConfig(seed=0)),
+    'astar': lambda problem, heuristic: BestFirstSearch(problem.initial_state, problem.goal, heuristic,
+                                                        estimator='max'),
+    'astar-symmetry': lambda problem, heuristic: BestFirstSearch(problem.initial_state, problem.goal, heuristic,
+                                                                 estimator='max',
+                                                                 symmetries=Symmetries(heuristic.actions,
+                                                                                       problem.goal)),
+    'wastar': lambda problem, heuristic: BestFirstSearch(problem.initial_state, problem.goal, heuristic,
+                                                         weight=3.0, estimator='add'),
+    'gbfs': lambda problem, heuristic: BestFirstSearch(problem.initial_state, problem.goal, heuristic,
+                                                       greedy=True, estimator='ff'),
+    'regression': lambda problem, heuristic: RegressionSearch(problem.initial_state, problem.goal, heuristic,
+                                                              estimator='max'),
+    'bidirectional': lambda problem, heuristic: RegressionSearch(problem.initial_state, problem.goal, heuristic,
+                                                                 bidirectional=True),
+}
+
+
+def _solve(problem: Problem, planner: str, trace_memory: bool) -> Dict:
+    """
+    Función privada que resuelve un problema y mide la ejecución.
+
+    Args:
+        problem (Problem): Problema a resolver.
+        planner (str): Nombre del planificador en `PLANNERS`.
+        trace_memory (bool): Mide la memoria máxima reservada con `tracemalloc`.
+
+    Returns:
+        Dict: Métricas de la ejecución.
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    stats = PlannerStats()
+    start = time.perf_counter()
+    heuristic = problem.heuristic(stats)
+    grounding_time = time.perf_counter() - start
+
+    instance = PLANNERS[planner](problem, heuristic)
+    plan = instance.get_plan()
+    elapsed = time.perf_counter() - start
+    search_time = elapsed - grounding_time
+    # Los problemas PDDL llegan ya instanciados: se suma el tiempo que llevó hacerlo.
+    grounding_time += getattr(problem, 'grounding_time', 0.0)
+
+    # Los planificadores sin nodos de búsqueda (como `Strips`) no tienen contadores de nodos
+    # expandidos ni generados: se informan como None para no mezclar magnitudes distintas.
+    counters = stats.counters
+    result = {
+        'status': 'solved' if plan is not False else 'unsolved',
+        'wall_time': elapsed,
+        'grounding_time': grounding_time,
+        'search_time': search_time,
+        'expanded': counters.get('expanded'),
+        'generated': counters.get('generated'),
+        'choose_actions_calls': counters.get('choose_actions', 0),
+        'plan_length': len(plan) if plan is not False else None,
+        'grounded_actions': len(heuristic.actions),
+        'timings': dict(stats.timings),
+    }
+
+    if trace_memory:
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def _worker(problem: Problem, planner: str, trace_memory: bool, results: multiprocessing.Queue):
+    """ Función privada ejecutada en el proceso hijo de `_run_isolated`. """
+    results.put(_solve(problem, planner, trace_memory))
+
+
+def _run_isolated(problem: Problem, planner: str, trace_memory: bool, timeout: float) -> Dict:
+    """
+    Función privada que resuelve un problema en un proceso hijo con límite de tiempo.
+
+    Si el proceso hijo termina sin devolver resultado (por ejemplo, por falta de memoria o una
+    excepción) se devuelve el estado 'error' con su código de salida sin esperar al límite.
+
+    Args:
+        problem (Problem): Problema a resolver.
+        planner (str): Nombre del planificador en `PLANNERS`.
+        trace_memory (bool): Mide la memoria máxima reservada con `tracemalloc`.
+        timeout (float): Tiempo máximo en segundos.
+
+    Returns:
+        Dict: Métricas de la ejecución o el estado 'timeout' o 'error'.
+    """
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_worker, args=(problem, planner, trace_memory, results))
+    start = time.perf_counter()
+    process.start()
+    try:
+        while True:
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                return {'status': 'timeout', 'wall_time': timeout}
+            try:
+                return results.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                if process.exitcode is not None:
+                    # El hijo puede haber terminado justo después de dejar el resultado en la cola.
+                    try:
+                        return results.get(timeout=0.1)
+                    except queue.Empty:
+                        return {'status': 'error', 'exitcode': process.exitcode,
+                                'wall_time': time.perf_counter() - start}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def run_benchmark(problems: List[Problem], planners: List[str], timeout: float = 30.0,
+                  repeat: int = 1, memory: bool = True) -> Dict:
+    """
+    Ejecuta los planificadores indicados sobre los problemas y construye el informe.
+
+    Cada ejecución se realiza en un proceso independiente para poder cortarla al
+    superar el tiempo límite. El tiempo se toma como el mínimo de las repeticiones y
+    la memoria en una ejecución adicional, ya que `tracemalloc` ralentiza la planificación.
+
+    Args:
+        problems (List[Problem]): Problemas a resolver.
+        planners (List[str]): Nombres de los planificadores en `PLANNERS`.
+        timeout (float, optional): Tiempo máximo en segundos de cada ejecución. Default: 30.0.
+        repeat (int, optional): Número de repeticiones para medir el tiempo. Default: 1.
+        memory (bool, optional): Mide la memoria máxima de cada ejecución. Default: True.
+
+    Returns:
+        Dict: Informe con los metadatos del entorno y los resultados.
+    """
+    results = list()
+    for problem in problems:
+        for planner in planners:
+            runs = [_run_isolated(problem, planner, False, timeout) for _ in range(repeat)]
+            result = min(runs, key=lambda run: run['wall_time'])
+            if memory and result['status'] not in ('timeout', 'error'):
+                result['peak_memory'] = _run_isolated(problem, planner, True, timeout).get('peak_memory')
+
+            result.update({
+                'problem': problem.name,
+                'planner': planner,
+                'positions': len(problem.positions),
+                'facts': len(problem.initial_state.properties),
+                'goals': len(problem.goal.properties),
+            })
+            results.append(result)
+
+    return {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timeout': timeout,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def _plan_names(problem: Problem, planner: str, heuristic: Heuristic = None) -> Union[Tuple[str, ...], None]:
+    """
+    Función privada que resuelve un problema y devuelve el nombre de las acciones del plan.
+
+    Args:
+        problem (Problem): Problema a resolver.
+        planner (str): Nombre del planificador en `PLANNERS`.
+        heuristic (Heuristic, optional): Heurística a usar. Default: None (se construye una nueva).
+
+    Returns:
+        Union[Tuple[str, ...], None]: Las acciones del plan o None si no se ha encontrado.
+    """
+    if heuristic is None:
+        heuristic = problem.heuristic()
+    plan = PLANNERS[planner](problem, heuristic).get_plan()
+    return None if plan is False else tuple(str(action) for action in plan)
+
+
+def run_stress(problems: List[Problem], planners: List[str], threads: int = 8, rounds: int = 4,
+               seed: int = 0) -> Dict:
+    """
+    Prueba de estrés de la planificación concurrente.
+
+    Resuelve cada problema con cada planificador `rounds` veces, en orden aleatorio, desde
+    `threads` hilos. En las rondas pares los planificadores de un mismo problema comparten la
+    heurística (y con ella su codificación y sus cachés); en las impares cada uno construye la
+    suya, de modo que las acciones y propiedades se crean a la vez desde varios hilos.
+
+    Durante la prueba se reduce el intervalo de cambio entre hilos del intérprete para forzar
+    más intercalados. Después se resuelve cada problema de forma secuencial y se comprueba que
+    todos los planes coinciden.
+
+    Args:
+        problems (List[Problem]): Problemas a resolver.
+        planners (List[str]): Nombres de los planificadores en `PLANNERS`.
+        threads (int, optional): Número de hilos. Default: 8.
+        rounds (int, optional): Veces que se resuelve cada combinación. Default: 4.
+        seed (int, optional): Semilla con la que se baraja el orden de las ejecuciones. Default: 0.
+
+    Returns:
+        Dict: Número de ejecuciones, tiempo total y las discrepancias y errores encontrados.
+    """
+    jobs = [(problem, planner, round_index % 2 == 0)
+            for round_index in range(rounds) for problem in problems for planner in planners]
+    Random(seed).shuffle(jobs)
+    shared: Dict[str, Heuristic] = dict()
+
+    def run(job: Tuple[Problem, str, bool]) -> Union[Tuple[str, ...], None]:
+        problem, planner, share = job
+        heuristic = None
+        if share:
+            heuristic = shared.get(problem.name)
+            if heuristic is None:
+                heuristic = shared.setdefault(problem.name, problem.heuristic())
+        return _plan_names(problem, planner, heuristic)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [executor.submit(run, job) for job in jobs]
+    finally:
+        sys.setswitchinterval(switch_interval)
+    wall_time = time.perf_counter() - start
+
+    expected = {(problem.name, planner): _plan_names(problem, planner) for problem in problems for planner in planners}
+    mismatches = list()
+    errors = list()
+    for (problem, planner, share), future in zip(jobs, futures):
+        error = future.exception()
+        if error is not None:
+            errors.append({'problem': problem.name, 'planner': planner, 'shared': share, 'error': repr(error)})
+        elif future.result() != expected[(problem.name, planner)]:
+            mismatches.append({'problem': problem.name, 'planner': planner, 'shared': share,
+                               'expected': expected[(problem.name, planner)], 'result': future.result()})
+
+    return {
+        'jobs': len(jobs),
+        'threads': threads,
+        'wall_time': wall_time,
+        'mismatches': mismatches,
+        'errors': errors,
+    }
+
+
+def run_relaxed_check(problems: List[Problem], walks: int = 20, steps: int = 50, seed: int = 0) -> Dict:
+    """
+    Comprueba que la evaluación incremental de las heurísticas relajadas coincide con la completa.
+
+    Recorre cada problema con paseos aleatorios desde el estado inicial. Cada estado visitado se
+    evalúa con una instancia de cada heurística de `RELAXED_HEURISTICS` que conserva la tabla del
+    estado anterior (y por tanto se actualiza de forma incremental) y se compara el valor, los
+    costes y los soportes con los de una evaluación desde cero.
+
+    Args:
+        problems (List[Problem]): Problemas a recorrer.
+        walks (int, optional): Paseos aleatorios por problema. Default: 20.
+        steps (int, optional): Longitud máxima de cada paseo. Default: 50.
+        seed (int, optional): Semilla de los paseos. Default: 0.
+
+    Returns:
+        Dict: Número de estados comprobados, tiempo total y las discrepancias encontradas.
+    """
+    rng = Random(seed)
+    checked = 0
+    mismatches = list()
+    start = time.perf_counter()
+    for problem in problems:
+        table = problem.heuristic().actions
+        initial = table.encoding.encode(problem.initial_state)
+        heuristics = {name: cls(table, problem.goal) for name, cls in RELAXED_HEURISTICS.items()}
+        for _ in range(walks):
+            state = initial
+            for _ in range(steps):
+                for name, heuristic in heuristics.items():
+                    value = heuristic(state)
+                    fresh = RELAXED_HEURISTICS[name](table, problem.goal)
+                    expected = fresh(state)
+                    if (value, heuristic._cost, heuristic._supporter) != (expected, fresh._cost, fresh._supporter):
+                        mismatches.append({'problem': problem.name, 'heuristic': name, 'state': state,
+                                           'expected': expected, 'result': value})
+                checked += 1
+
+                successors = [action.apply(state) for action in table.actions if action.can_apply(state)]
+                if not successors:
+                    break
+                state = rng.choice(successors)
+
+    return {
+        'states': checked,
+        'wall_time': time.perf_counter() - start,
+        'mismatches': mismatches,
+    }
+
+
+def compare_reports(old: Dict, new: Dict) -> List[Dict]:
+    """
+    Compara dos informes y calcula la variación del tiempo y de los nodos expandidos.
+
+    Args:
+        old (Dict): Informe de referencia.
+        new (Dict): Informe a comparar.
+
+    Returns:
+        List[Dict]: Una entrada por cada par (problema, planificador) presente en ambos informes.
+    """
+    reference = {(result['problem'], result['planner']): result for result in old['results']}
+
+    comparison = list()
+    for result in new['results']:
+        previous = reference.get((result['problem'], result['planner']))
+        if previous is None:
+            continue
+        comparison.append({
+            'problem': result['problem'],
+            'planner': result['planner'],
+            'status': f"{previous['status']} -> {result['status']}",
+            'time_ratio': result['wall_time'] / previous['wall_time'] if previous['wall_time'] else None,
+            'expanded': f"{previous.get('expanded')} -> {result.get('expanded')}",
+        })
+    return comparison
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de los planificadores STRIPS")
+    parser.add_argument('--positions', type=int, nargs='+', default=[3, 5, 10, 20])
+    parser.add_argument('--boxes', type=int, nargs='+', default=[1])
+    parser.add_argument('--bananas', type=int, nargs='+', default=[1])
+    parser.add_argument('--instances', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--planners', nargs='+', choices=sorted(PLANNERS))
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--compare', help="Informe previo con el que comparar los resultados")
+    parser.add_argument('--output', help="Fichero JSON donde guardar el informe")
+    parser.add_argument('--threads', type=int, help="Ejecuta la prueba de estrés con este número de hilos")
+    parser.add_argument('--rounds', type=int, default=4, help="Rondas de la prueba de estrés")
+    parser.add_argument('--check-relaxed', type=int, metavar='PASEOS',
+                        help="Comprueba las heurísticas relajadas incrementales con este número de paseos aleatorios")
+    parser.add_argument('--pddl', nargs='+', metavar='FICHERO',
+                        help="Dominio PDDL seguido de sus problemas, en lugar de los problemas generados")
+    options = parser.parse_args(args)
+
+    if options.pddl:
+        if len(options.pddl) < 2:
+            parser.error("--pddl requires a domain and at least one problem")
+        problems = [load(options.pddl[0], problem) for problem in options.pddl[1:]]
+        # El planificador de pila de objetivos ordena las acciones con los pesos de las propiedades
+        # del mono, que en los dominios PDDL son todos iguales, y agota el tiempo límite en ellos:
+        # sólo se ejecuta si se pide de forma explícita.
+        if options.planners is None:
+            options.planners = [planner for planner in sorted(PLANNERS) if planner != 'strips']
+    else:
+        problems = generate_suite(options.positions, options.boxes, options.bananas,
+                                  options.instances, options.seed)
+    if options.planners is None:
+        options.planners = sorted(PLANNERS)
+    if options.check_relaxed:
+        report = run_relaxed_check(problems, options.check_relaxed, seed=options.seed)
+        for entry in report['mismatches']:
+            print(entry)
+        print(f"{report['states']} estados comprobados: {report['wall_time']:.2f}s, "
+              f"{len(report['mismatches'])} discrepancias")
+        if report['mismatches']:
+            sys.exit(1)
+        return
+    if options.threads:
+        report = run_stress(problems, options.planners, options.threads, options.rounds, options.seed)
+        for entry in report['mismatches'] + report['errors']:
+            print(entry)
+        print(f"{report['jobs']} ejecuciones en {report['threads']} hilos: {report['wall_time']:.2f}s, "
+              f"{len(report['mismatches'])} discrepancias, {len(report['errors'])} errores")
+        if report['mismatches'] or report['errors']:
+            sys.exit(1)
+        return
+    report = run_benchmark(problems, options.planners, options.timeout, options.repeat, not options.no_memory)
+    report['meta']['seed'] = options.seed
+
+    for result in report['results']:
+        print(f"{result['problem']:<28} {result['planner']:<8} {result['status']:<9} "
+              f"{result['wall_time']:>9.4f}s  grounding={result.get('grounding_time', 0.0):.4f}s  "
+              f"expanded={result.get('expanded')}  plan={result.get('plan_length')}")
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as file:
+            for entry in compare_reports(json.load(file), report):
+                print(entry)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable
+
+
+class LRUCache:
+    # Valor centinela para distinguir las claves ausentes de los valores None.
+    MISSING = object()
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Clase con una caché acotada con política de expulsión LRU (el menos usado recientemente).
+
+        Lleva la cuenta de aciertos y fallos para poder ajustar su tamaño.
+        Las operaciones están protegidas por un cerrojo para poder compartirla entre hilos.
+
+        Args:
+            maxsize (int, optional): Número máximo de entradas. Con 0 la caché no guarda nada. Default: 4096.
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size must be non-negative")
+
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default=MISSING):
+        """
+        Devuelve el valor asociado a la clave y la marca como usada recientemente.
+
+        Args:
+            key (Hashable): Clave a consultar.
+            default (optional): Valor devuelto si la clave no está. Default: `LRUCache.MISSING`.
+
+        Returns:
+            El valor guardado o `default`.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value):
+        """
+        Guarda un valor, expulsando la entrada menos usada si se supera el tamaño máximo.
+
+        Args:
+            key (Hashable): Clave del valor.
+            value: Valor a guardar.
+        """
+        if self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default=None):
+        """
+        Elimina una entrada de la caché.
+
+        Args:
+            key (Hashable): Clave a eliminar.
+            default (optional): Valor devuelto si la clave no está. Default: None.
+
+        Returns:
+            El valor eliminado o `default`.
+        """
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        """ Vacía la caché y reinicia los contadores. """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> Dict[str, int]:
+        """
+        Devuelve los contadores de uso de la caché.
+
+        Returns:
+            Dict[str, int]: Aciertos, fallos, expulsiones, tamaño actual y tamaño máximo.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getstate__(self) -> Dict:
+        """ Estado a serializar de la caché, sin el cerrojo. """
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = Lock()
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from typing import Union
+
+
+@dataclass(frozen=True)
+class PlannerConfig:
+    """
+    Configuración inmutable de un planificador.
+
+    Cada planificador guarda su propia configuración en lugar de leer atributos de clase
+    compartidos por todo el proceso, de modo que varios planificadores pueden ejecutarse a la
+    vez en distintos hilos sin interferir entre sí. Para cambiar una opción se crea una copia
+    con `dataclasses.replace`.
+
+    Attributes:
+        efficiency_limit (int): Iteraciones en las que `Strips` sigue el orden de la heurística
+            antes de barajar las acciones. Default: 10.
+        verbose (bool): Muestra las acciones según se aplican. Default: False.
+        seed (Union[int, None]): Semilla del generador aleatorio del planificador. Default: None.
+    """
+    efficiency_limit: int = 10
+    verbose: bool = False
+    seed: Union[int, None] = None
+
+    def __post_init__(self):
+        if self.efficiency_limit < 0:
+            raise ValueError("Efficiency limit must be non-negative")
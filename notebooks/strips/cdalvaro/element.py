@@ -16,7 +16,10 @@ class Element:
         return self.name
 
     def __eq__(self, other) -> bool:
-        return self.name == other.name
+        return isinstance(other, Element) and self.name == other.name
+
+    def __hash__(self) -> int:
+        return hash(self.name)
 
 
 class Monkey(Element, metaclass=Singleton):
@@ -27,20 +30,37 @@ class Monkey(Element, metaclass=Singleton):
         """
         super().__init__("🐒")
 
+    def __reduce__(self):
+        return Monkey, ()
+
 
 class Banana(Element, metaclass=Singleton):
     """
     Clase singleton plátano.
+
+    Args:
+        index (int, optional): Identificador del plátano cuando hay varios en el problema. Default: None.
     """
 
-    def __init__(self):
-        super().__init__("🍌")
+    def __init__(self, index: int = None):
+        super().__init__("🍌" if index is None else f"🍌{index}")
+        self.index: int = index
+
+    def __reduce__(self):
+        return Banana, (() if self.index is None else (self.index,))
 
 
 class Box(Element, metaclass=Singleton):
     """
     Clase singleton caja.
+
+    Args:
+        index (int, optional): Identificador de la caja cuando hay varias en el problema. Default: None.
     """
 
-    def __init__(self):
-        super().__init__("📦")
+    def __init__(self, index: int = None):
+        super().__init__("📦" if index is None else f"📦{index}")
+        self.index: int = index
+
+    def __reduce__(self):
+        return Box, (() if self.index is None else (self.index,))
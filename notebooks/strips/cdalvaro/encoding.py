@@ -0,0 +1,238 @@
+from threading import RLock
+from typing import Dict, Iterable, Iterator, List, Union
+
+from .actions import BaseAction
+from .properties import BaseProperty, Properties
+from .state import State
+
+
+class CompiledAction:
+    __slots__ = ('action', 'precondition', 'add_list', 'remove_list', 'weight')
+
+    def __init__(self, action: BaseAction, precondition: int, add_list: int, remove_list: int):
+        """
+        Clase con la representación compilada de una acción.
+
+        Las listas de precondición, añadir y eliminar se guardan como máscaras de bits
+        sobre los identificadores asignados por una instancia de `Encoding`.
+
+        Args:
+            action (BaseAction): Acción original a partir de la que se ha compilado.
+            precondition (int): Máscara con las propiedades de precondición.
+            add_list (int): Máscara con las propiedades que añade la acción.
+            remove_list (int): Máscara con las propiedades que elimina la acción.
+        """
+        self.action: BaseAction = action
+        self.precondition: int = precondition
+        self.add_list: int = add_list
+        self.remove_list: int = remove_list
+        self.weight: int = action.weight
+
+    def can_apply(self, state: int, reverse: bool = False) -> bool:
+        """
+        Equivalente a `BaseAction.can_apply` operando sobre máscaras de bits.
+
+        Args:
+            state (int): Máscara del estado sobre el que se comprueba la acción.
+            reverse (bool, optional): Determina si la comprobación es en sentido de aplicar o revertir.
+
+        Returns:
+            bool: True si la acción se puede aplicar (o revertir) sobre el estado.
+        """
+        if reverse:
+            return state & self.add_list != 0
+        return state & self.precondition == self.precondition
+
+    def apply(self, state: int, reverse: bool = False) -> Union[int, None]:
+        """
+        Equivalente a `BaseAction.apply` operando sobre máscaras de bits.
+
+        Args:
+            state (int): Máscara del estado sobre el que se aplica la acción.
+            reverse (bool, optional): Revierte la acción aplicada sobre el estado dado.
+
+        Returns:
+            Union[int, None]: La máscara del estado resultante o None si la acción no es aplicable.
+        """
+        if reverse:
+            if state & self.add_list == 0:
+                return None
+            return (state | self.remove_list | self.precondition) & ~self.add_list
+
+        if state & self.precondition != self.precondition:
+            return None
+        return (state | self.add_list) & ~self.remove_list
+
+    def __str__(self) -> str:
+        return str(self.action)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class Encoding:
+
+    def __init__(self, properties: Iterable[BaseProperty] = ()):
+        """
+        Clase que asigna un identificador entero a cada propiedad del problema.
+
+        Con estos identificadores los estados se representan como máscaras de bits
+        inmutables (enteros) y las acciones como máscaras de precondición, añadir y eliminar,
+        de modo que comprobar y aplicar una acción se reduce a unas pocas operaciones de bits.
+
+        Las propiedades que no se hayan registrado previamente se registran
+        automáticamente la primera vez que se codifican. El registro está protegido
+        por un cerrojo, por lo que una misma codificación puede usarse desde varios hilos.
+
+        Args:
+            properties (Iterable[BaseProperty], optional): Propiedades a registrar inicialmente.
+        """
+        self.properties: List[BaseProperty] = list()
+        self.ids: Dict[BaseProperty, int] = dict()
+        self.weights: List[int] = list()
+        self._compiled: Dict[BaseAction, CompiledAction] = dict()
+        self._lock = RLock()
+
+        for prop in properties:
+            self.id(prop)
+
+    def id(self, prop: BaseProperty) -> int:
+        """
+        Devuelve el identificador de la propiedad, registrándola si es necesario.
+
+        Args:
+            prop (BaseProperty): La propiedad a identificar.
+
+        Returns:
+            int: El identificador entero de la propiedad.
+        """
+        index = self.ids.get(prop)
+        if index is None:
+            with self._lock:
+                index = self.ids.get(prop)
+                if index is None:
+                    index = len(self.properties)
+                    self.properties.append(prop)
+                    self.weights.append(prop.weight)
+                    self.ids[prop] = index
+        return index
+
+    def bit(self, prop: BaseProperty) -> int:
+        """
+        Devuelve la máscara con el único bit que representa a la propiedad.
+
+        Args:
+            prop (BaseProperty): La propiedad a codificar.
+
+        Returns:
+            int: Máscara de bits de la propiedad.
+        """
+        return 1 << self.id(prop)
+
+    def encode(self, properties: Union[Properties, State]) -> int:
+        """
+        Codifica un conjunto de propiedades (o un estado) como máscara de bits.
+
+        Args:
+            properties (Union[Properties, State]): Propiedades o estado a codificar.
+
+        Returns:
+            int: Máscara de bits con las propiedades indicadas.
+        """
+        if isinstance(properties, State):
+            properties = properties.properties
+
+        mask = 0
+        for prop in properties:
+            mask |= 1 << self.id(prop)
+        return mask
+
+    def decode(self, mask: int) -> Properties:
+        """
+        Decodifica una máscara de bits al conjunto de propiedades que representa.
+
+        Args:
+            mask (int): Máscara de bits a decodificar.
+
+        Returns:
+            Properties: Conjunto de propiedades representado por la máscara.
+        """
+        return set(self.properties[index] for index in bits(mask))
+
+    def state(self, mask: int) -> State:
+        """
+        Construye el `State` equivalente a una máscara de bits.
+
+        Args:
+            mask (int): Máscara de bits del estado.
+
+        Returns:
+            State: Estado con las propiedades representadas por la máscara.
+        """
+        return State(self.decode(mask))
+
+    def weight(self, mask: int) -> int:
+        """
+        Calcula la suma de los pesos de las propiedades representadas por una máscara.
+
+        Args:
+            mask (int): Máscara de bits de las propiedades.
+
+        Returns:
+            int: Suma de los pesos de las propiedades.
+        """
+        weights = self.weights
+        return sum(weights[index] for index in bits(mask))
+
+    def compile(self, action: BaseAction) -> CompiledAction:
+        """
+        Devuelve la representación compilada de una acción.
+
+        El resultado se guarda para que cada acción sólo se compile una vez.
+
+        Args:
+            action (BaseAction): La acción a compilar.
+
+        Returns:
+            CompiledAction: La acción con sus listas codificadas como máscaras de bits.
+        """
+        compiled = self._compiled.get(action)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(action)
+                if compiled is None:
+                    compiled = CompiledAction(action,
+                                              self.encode(action.precondition),
+                                              self.encode(action.add_list),
+                                              self.encode(action.remove_list))
+                    self._compiled[action] = compiled
+        return compiled
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def __getstate__(self) -> Dict:
+        """ Estado a serializar de la codificación, sin el cerrojo. """
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = RLock()
+
+
+def bits(mask: int) -> Iterator[int]:
+    """
+    Itera sobre los índices de los bits activos de una máscara, de menor a mayor.
+
+    Args:
+        mask (int): Máscara de bits.
+
+    Returns:
+        Iterator[int]: Los índices de los bits activos.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
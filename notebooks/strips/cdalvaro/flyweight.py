@@ -0,0 +1,70 @@
+from threading import RLock
+from weakref import WeakValueDictionary
+
+
+class Flyweight(type):
+    """
+    Metaclase para implementar el patrón de diseño Flyweight.
+
+    Construir dos veces el mismo objeto lógico devuelve siempre la misma instancia,
+    por lo que la igualdad entre instancias se reduce a comparar identidades.
+
+    Dos objetos son el mismo objeto lógico si son de la misma clase y tienen la misma
+    representación en texto (la descripción de una propiedad o el nombre de una acción).
+    Las llamadas repetidas con los mismos argumentos se resuelven con una única consulta
+    a un diccionario, sin construir ningún objeto intermedio.
+
+    Las clases cuyo texto no basta para distinguirlas pueden guardar en `_scope` un valor
+    adicional que forma parte de la identidad.
+
+    Tras construir una instancia nueva se invoca su método `_finalize`, si existe,
+    para que pueda congelar su estado antes de compartirse.
+
+    El registro se protege con un cerrojo: la consulta rápida no lo necesita, pero la
+    construcción y el registro de una instancia nueva son atómicos entre hilos.
+
+    Los registros guardan referencias débiles: una instancia que ya no se usa en ningún sitio
+    se libera, y construirla de nuevo crea otra. Así, un proceso de larga duración (como el
+    servicio de planificación) no acumula todas las propiedades y acciones que ha visto.
+    """
+    # Instancias por (clase, argumentos de construcción).
+    _by_arguments = WeakValueDictionary()
+
+    # Instancias por (clase, representación en texto).
+    _by_identity = WeakValueDictionary()
+
+    # Cerrojo reentrante: construir una acción construye a su vez sus propiedades.
+    _lock = RLock()
+
+    def __call__(cls, *args, **kwargs):
+        key = (cls, args, tuple(sorted(kwargs.items())))
+        instance = Flyweight._by_arguments.get(key)
+        if instance is not None:
+            return instance
+
+        with Flyweight._lock:
+            instance = Flyweight._by_arguments.get(key)
+            if instance is not None:
+                return instance
+
+            candidate = super(Flyweight, cls).__call__(*args, **kwargs)
+            identity = (cls, str(candidate), getattr(candidate, '_scope', None))
+            instance = Flyweight._by_identity.get(identity)
+            if instance is None:
+                candidate._arguments = (args, kwargs)
+                finalize = getattr(candidate, '_finalize', None)
+                if finalize is not None:
+                    finalize()
+                instance = Flyweight._by_identity[identity] = candidate
+
+            Flyweight._by_arguments[key] = instance
+        return instance
+
+
+def _rebuild(cls: Flyweight, args: tuple, kwargs: dict):
+    """
+    Reconstruye una instancia Flyweight a partir de sus argumentos de construcción.
+
+    Se usa al deserializar (pickle/copy) para que el objeto recuperado sea la instancia compartida.
+    """
+    return cls(*args, **kwargs)
@@ -0,0 +1,112 @@
+from random import Random
+from typing import List, NamedTuple
+
+from .element import Banana, Box, Monkey
+from .heuristic import Heuristic
+from .properties import AtLevel, AtPosition, GroundLevel, Has, TopLevel
+from .state import State
+from .stats import PlannerStats
+
+
+class Problem(NamedTuple):
+    """
+    Instancia de un problema del mono, la caja y los plátanos.
+
+    Attributes:
+        name (str): Nombre que identifica la instancia.
+        initial_state (State): Estado inicial del problema.
+        goal (State): Estado objetivo del problema.
+        positions (List[int]): Posiciones horizontales del escenario.
+    """
+    name: str
+    initial_state: State
+    goal: State
+    positions: List[int]
+
+    def heuristic(self, stats: PlannerStats = None) -> Heuristic:
+        """
+        Construye la heurística del problema con todas sus posiciones.
+
+        Args:
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+
+        Returns:
+            Heuristic: Heurística con las acciones instanciadas para el problema.
+        """
+        return Heuristic(self.initial_state, self.positions, stats)
+
+
+def generate_problem(positions: int, boxes: int = 1, bananas: int = 1,
+                     on_box: float = 0.0, seed: int = None) -> Problem:
+    """
+    Genera una instancia aleatoria del problema con el tamaño indicado.
+
+    El mono, las cajas y los plátanos se colocan en posiciones aleatorias (los plátanos
+    en posiciones distintas entre sí) y el objetivo es que el mono consiga todos los plátanos.
+    Con una única caja o un único plátano se usan las instancias por defecto `Box()` y `Banana()`.
+
+    Args:
+        positions (int): Número de posiciones horizontales del escenario.
+        boxes (int, optional): Número de cajas. Default: 1.
+        bananas (int, optional): Número de plátanos. Default: 1.
+        on_box (float, optional): Probabilidad de que el mono empiece subido a una caja
+            cuando comparte posición con ella. Default: 0.0.
+        seed (int, optional): Semilla del generador aleatorio. Default: None.
+
+    Returns:
+        Problem: La instancia generada.
+    """
+    if positions < 1 or boxes < 1 or bananas < 1:
+        raise ValueError("At least one position, box and banana are required")
+    if bananas > positions:
+        raise ValueError("There cannot be more bananas than positions")
+
+    rng = Random(seed)
+    scenario = list(range(1, positions + 1))
+
+    box_elements = [Box()] if boxes == 1 else [Box(i) for i in range(1, boxes + 1)]
+    banana_elements = [Banana()] if bananas == 1 else [Banana(i) for i in range(1, bananas + 1)]
+
+    monkey_position = rng.choice(scenario)
+    box_positions = [rng.choice(scenario) for _ in box_elements]
+    banana_positions = rng.sample(scenario, bananas)
+
+    properties = {AtPosition(Monkey(), monkey_position)}
+    properties.update(AtPosition(box, position) for box, position in zip(box_elements, box_positions))
+    properties.update(AtPosition(banana, position) for banana, position in zip(banana_elements, banana_positions))
+
+    if monkey_position in box_positions and rng.random() < on_box:
+        properties.add(AtLevel(Monkey(), TopLevel(), monkey_position))
+    else:
+        properties.add(AtLevel(Monkey(), GroundLevel()))
+
+    goal = State(set(Has(Monkey(), banana) for banana in banana_elements))
+    name = f"monkey-p{positions}-b{boxes}-n{bananas}-s{seed}"
+
+    return Problem(name, State(properties), goal, scenario)
+
+
+def generate_suite(sizes: List[int], boxes: List[int] = (1,), bananas: List[int] = (1,),
+                   instances: int = 1, seed: int = 0) -> List[Problem]:
+    """
+    Genera una batería de problemas de tamaño creciente con semillas reproducibles.
+
+    Args:
+        sizes (List[int]): Números de posiciones a generar.
+        boxes (List[int], optional): Números de cajas a generar. Default: (1,).
+        bananas (List[int], optional): Números de plátanos a generar. Default: (1,).
+        instances (int, optional): Instancias por combinación de tamaños. Default: 1.
+        seed (int, optional): Semilla base de la batería. Default: 0.
+
+    Returns:
+        List[Problem]: Los problemas generados.
+    """
+    problems = list()
+    for size in sizes:
+        for n_boxes in boxes:
+            for n_bananas in bananas:
+                if n_bananas > size:
+                    continue
+                for instance in range(instances):
+                    problems.append(generate_problem(size, n_boxes, n_bananas, seed=seed + instance))
+    return problems
@@ -0,0 +1,123 @@
+from typing import Dict, List
+
+from .actions import Actions
+from .encoding import CompiledAction, Encoding, bits
+from .state import State
+
+
+class ActionTable:
+
+    def __init__(self, actions: Actions, initial_state: State = None, encoding: Encoding = None):
+        """
+        Clase con la tabla de acciones instanciadas (grounded) de un problema.
+
+        Compila una única vez las acciones indicadas y construye dos índices invertidos:
+        de cada propiedad a las acciones que la añaden (`achievers`) y de cada
+        propiedad a las acciones que la tienen como precondición (`consumers`).
+        Así, buscar las acciones que generan un objetivo es una consulta al índice.
+
+        Si se indica el estado inicial, sólo se conservan las acciones alcanzables
+        desde él en el problema relajado (ignorando las listas de eliminar).
+
+        Args:
+            actions (Actions): Acciones candidatas del dominio.
+            initial_state (State, optional): Estado inicial para podar las acciones inalcanzables. Default: None.
+            encoding (Encoding, optional): Codificación de propiedades a usar. Default: None.
+        """
+        if encoding is None:
+            encoding = Encoding(initial_state.properties if initial_state is not None else ())
+        self.encoding: Encoding = encoding
+
+        # Se compilan las acciones descartando las repetidas y conservando su orden.
+        compiled = list(dict.fromkeys(map(encoding.compile, actions)))
+        if initial_state is not None:
+            compiled = self._reachable(compiled, encoding.encode(initial_state))
+
+        self.actions: List[CompiledAction] = compiled
+        self.index: Dict[CompiledAction, int] = {action: i for i, action in enumerate(compiled)}
+        self.achievers: List[List[int]] = [list() for _ in range(len(encoding))]
+        self.consumers: List[List[int]] = [list() for _ in range(len(encoding))]
+
+        for i, action in enumerate(compiled):
+            for prop in bits(action.add_list):
+                self.achievers[prop].append(i)
+            for prop in bits(action.precondition):
+                self.consumers[prop].append(i)
+
+    def achieving(self, goal: int) -> List[CompiledAction]:
+        """
+        Devuelve las acciones que añaden alguna de las propiedades indicadas.
+
+        Args:
+            goal (int): Máscara con las propiedades objetivo.
+
+        Returns:
+            List[CompiledAction]: Las acciones en el orden de la tabla.
+        """
+        return self._lookup(self.achievers, goal)
+
+    def consuming(self, properties: int) -> List[CompiledAction]:
+        """
+        Devuelve las acciones que requieren alguna de las propiedades indicadas.
+
+        Args:
+            properties (int): Máscara con las propiedades a consultar.
+
+        Returns:
+            List[CompiledAction]: Las acciones en el orden de la tabla.
+        """
+        return self._lookup(self.consumers, properties)
+
+    def _lookup(self, index: List[List[int]], mask: int) -> List[CompiledAction]:
+        """
+        Método privado para consultar uno de los índices invertidos.
+
+        Args:
+            index (List[List[int]]): Índice de propiedad a acciones.
+            mask (int): Máscara con las propiedades a consultar.
+
+        Returns:
+            List[CompiledAction]: Las acciones sin repetir en el orden de la tabla.
+        """
+        size = len(index)
+        found = set()
+        for prop in bits(mask):
+            if prop < size:
+                found.update(index[prop])
+        return [self.actions[i] for i in sorted(found)]
+
+    @staticmethod
+    def _reachable(actions: List[CompiledAction], initial: int) -> List[CompiledAction]:
+        """
+        Método privado para filtrar las acciones alcanzables desde el estado inicial.
+
+        Calcula el punto fijo del problema relajado: una acción es alcanzable cuando todas
+        sus precondiciones lo son, y sus propiedades añadidas pasan a ser alcanzables.
+
+        Args:
+            actions (List[CompiledAction]): Acciones candidatas.
+            initial (int): Máscara del estado inicial.
+
+        Returns:
+            List[CompiledAction]: Las acciones alcanzables en su orden original.
+        """
+        reached = initial
+        pending = actions
+        changed = True
+        while changed:
+            changed = False
+            remaining = list()
+            for action in pending:
+                if action.precondition & reached == action.precondition:
+                    if action.add_list & ~reached:
+                        reached |= action.add_list
+                        changed = True
+                else:
+                    remaining.append(action)
+            pending = remaining
+
+        unreachable = set(pending)
+        return [action for action in actions if action not in unreachable]
+
+    def __len__(self) -> int:
+        return len(self.actions)
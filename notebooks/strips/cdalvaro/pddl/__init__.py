@@ -0,0 +1,4 @@
+from .atom import Atom
+from .ground_action import ActionSchema, GroundAction
+from .parser import Domain, Task, parse_domain, parse_problem
+from .grounding import PddlProblem, ground, load
@@ -0,0 +1,22 @@
+from ..properties import BaseProperty
+
+
+class Atom(BaseProperty):
+    __slots__ = ('predicate', 'objects')
+    # El predicado no es un objeto del problema.
+    fixed_arguments: int = 1
+
+    def __init__(self, predicate: str, *objects: str):
+        """
+        Clase para modelizar un átomo instanciado de un dominio PDDL.
+
+        Args:
+            predicate (str): Nombre del predicado.
+            *objects (str): Objetos a los que se aplica el predicado.
+        """
+        name = f"({' '.join((predicate,) + objects)})"
+        weight = 0
+
+        super().__init__(name, weight)
+        self.predicate: str = predicate
+        self.objects: tuple = objects
@@ -0,0 +1,96 @@
+from typing import NamedTuple, Tuple
+
+from .atom import Atom
+from ..actions import BaseAction
+
+# Átomo sin instanciar: predicado y argumentos (variables '?x' u objetos).
+Literal = Tuple[str, Tuple[str, ...]]
+
+
+class ActionSchema(NamedTuple):
+    """
+    Esquema de una acción de un dominio PDDL, antes de instanciar sus parámetros.
+
+    Las precondiciones se separan en estáticas, cuyos predicados no modifica ninguna acción del
+    dominio, y dinámicas. Las estáticas sólo se comprueban al instanciar la acción.
+
+    Attributes:
+        name (str): Nombre de la acción.
+        parameters (Tuple[Tuple[str, str], ...]): Cada parámetro ('?x') y su tipo.
+        precondition (Tuple[Literal, ...]): Precondiciones dinámicas.
+        static (Tuple[Literal, ...]): Precondiciones estáticas.
+        add_list (Tuple[Literal, ...]): Átomos que añade la acción.
+        remove_list (Tuple[Literal, ...]): Átomos que elimina la acción.
+        constraints (Tuple[Tuple[str, str, bool], ...]): Igualdades (True) o desigualdades (False)
+            entre argumentos.
+    """
+    name: str
+    parameters: Tuple[Tuple[str, str], ...]
+    precondition: Tuple[Literal, ...]
+    static: Tuple[Literal, ...]
+    add_list: Tuple[Literal, ...]
+    remove_list: Tuple[Literal, ...]
+    constraints: Tuple[Tuple[str, str, bool], ...] = ()
+
+
+class GroundAction(BaseAction):
+    __slots__ = ('schema', 'objects', '_scope')
+    # El esquema no es un objeto del problema.
+    fixed_arguments: int = 1
+
+    def __init__(self, schema: ActionSchema, *objects: str):
+        """
+        Clase con una acción de un dominio PDDL instanciada con sus objetos.
+
+        Las precondiciones estáticas no forman parte de la acción: se han comprobado al
+        instanciarla y siguen siendo ciertas en todos los estados del problema.
+
+        Args:
+            schema (ActionSchema): Esquema de la acción.
+            *objects (str): Objeto asignado a cada parámetro del esquema, en orden.
+        """
+        if len(objects) != len(schema.parameters):
+            raise ValueError(f"Action {schema.name} expects {len(schema.parameters)} objects")
+        name = f"({' '.join((schema.name,) + objects)})"
+        weight = 1
+
+        super().__init__(name, weight)
+        self.schema: ActionSchema = schema
+        self.objects: tuple = objects
+        # Acciones con el mismo nombre de esquemas distintos (p. ej. al recargar un dominio) son distintas.
+        self._scope: ActionSchema = schema
+
+        self._set_precondition()
+        self._set_add_list()
+        self._set_remove_list()
+
+    def _set_precondition(self):
+        """
+        * Las precondiciones dinámicas del esquema
+        """
+        self.precondition.update(self._instantiate(self.schema.precondition))
+
+    def _set_add_list(self):
+        """
+        * Los átomos que añade el esquema
+        """
+        self.add_list.update(self._instantiate(self.schema.add_list))
+
+    def _set_remove_list(self):
+        """
+        * Los átomos que elimina el esquema y no vuelve a añadir
+        """
+        self.remove_list.update(self._instantiate(self.schema.remove_list) - self.add_list)
+
+    def _instantiate(self, literals: Tuple[Literal, ...]) -> set:
+        """
+        Método privado que sustituye los parámetros del esquema por los objetos de la acción.
+
+        Args:
+            literals (Tuple[Literal, ...]): Átomos sin instanciar.
+
+        Returns:
+            set: Los átomos instanciados.
+        """
+        binding = {variable: obj for (variable, _), obj in zip(self.schema.parameters, self.objects)}
+        return {Atom(predicate, *(binding.get(arg, arg) for arg in args)) for predicate, args in literals}
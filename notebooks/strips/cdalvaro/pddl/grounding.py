@@ -0,0 +1,304 @@
+from time import perf_counter
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple
+
+from .atom import Atom
+from .ground_action import ActionSchema, GroundAction, Literal
+from .parser import Task, parse_domain, parse_problem
+from ..actions import Actions
+from ..heuristic import Heuristic
+from ..state import State
+from ..stats import PlannerStats
+
+# Asignación de objetos a las variables de un esquema.
+Binding = Dict[str, str]
+
+
+class PddlProblem(NamedTuple):
+    """
+    Problema PDDL instanciado, intercambiable con `generator.Problem` en los planificadores y el benchmark.
+
+    Attributes:
+        name (str): Nombre que identifica la instancia.
+        initial_state (State): Átomos dinámicos del estado inicial.
+        goal (State): Átomos del objetivo que no se cumplen de forma estática.
+        positions (List[int]): Vacío: los problemas PDDL no tienen posiciones.
+        actions (Actions): Acciones instanciadas alcanzables desde el estado inicial.
+        grounding_time (float): Segundos empleados en instanciar el problema.
+    """
+    name: str
+    initial_state: State
+    goal: State
+    positions: List[int]
+    actions: Actions
+    grounding_time: float
+
+    def heuristic(self, stats: PlannerStats = None) -> Heuristic:
+        """
+        Construye la heurística del problema con sus acciones instanciadas.
+
+        Args:
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+
+        Returns:
+            Heuristic: Heurística con las acciones del problema.
+        """
+        return Heuristic(self.initial_state, stats=stats, actions=self.actions)
+
+
+class _FactIndex:
+
+    def __init__(self):
+        """
+        Clase privada con los hechos alcanzados, indexados por predicado y por cada argumento.
+        """
+        self.facts: Dict[str, Set[Tuple[str, ...]]] = dict()
+        self.by_argument: Dict[Tuple[str, int, str], Set[Tuple[str, ...]]] = dict()
+
+    def add(self, predicate: str, args: Tuple[str, ...]) -> bool:
+        """ Añade un hecho y devuelve si es nuevo. """
+        facts = self.facts.setdefault(predicate, set())
+        if args in facts:
+            return False
+        facts.add(args)
+        for position, arg in enumerate(args):
+            self.by_argument.setdefault((predicate, position, arg), set()).add(args)
+        return True
+
+    def match(self, predicate: str, pattern: Tuple) -> Set[Tuple[str, ...]]:
+        """
+        Devuelve los hechos candidatos de un predicado para un patrón con argumentos conocidos o None.
+
+        Se usa el índice del argumento conocido más selectivo; los candidatos deben comprobarse después.
+        """
+        candidates = self.facts.get(predicate, set())
+        for position, arg in enumerate(pattern):
+            if arg is not None:
+                bucket = self.by_argument.get((predicate, position, arg), set())
+                if len(bucket) < len(candidates):
+                    candidates = bucket
+        return candidates
+
+
+def ground(task: Task, stats: PlannerStats = None) -> PddlProblem:
+    """
+    Instancia las acciones de un problema PDDL alcanzables desde su estado inicial.
+
+    La instanciación calcula el punto fijo del problema relajado de forma semi-ingenua: en cada
+    ronda sólo se buscan las asignaciones en las que alguna precondición dinámica usa un hecho
+    alcanzado en la ronda anterior. Las asignaciones se construyen uniendo las precondiciones
+    con los hechos alcanzados, empezando por las más restrictivas, en lugar de recorrer el
+    producto cartesiano de los objetos de cada tipo.
+
+    Los predicados estáticos (que ninguna acción modifica) sólo restringen las asignaciones:
+    se eliminan de las precondiciones, del estado inicial y del objetivo.
+
+    Args:
+        task (Task): Problema sin instanciar.
+        stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+
+    Returns:
+        PddlProblem: El problema instanciado.
+    """
+    start = perf_counter()
+    domain = task.domain
+    static = domain.static
+    objects = _objects_by_type(task)
+
+    reached = _FactIndex()
+    delta = _FactIndex()
+    for fact in task.init:
+        reached.add(fact[0], fact[1:])
+        delta.add(fact[0], fact[1:])
+
+    grounded: Dict[Tuple[ActionSchema, Tuple[str, ...]], None] = dict()
+    first = True
+    while first or delta.facts:
+        following = _FactIndex()
+        for schema in domain.actions:
+            for binding in _bindings(schema, reached, delta, objects, first):
+                arguments = tuple(binding[variable] for variable, _ in schema.parameters)
+                if (schema, arguments) in grounded:
+                    continue
+                grounded[(schema, arguments)] = None
+                for predicate, args in schema.add_list:
+                    fact = tuple(binding.get(arg, arg) for arg in args)
+                    if fact not in reached.facts.get(predicate, ()):
+                        following.add(predicate, fact)
+        for predicate, facts in following.facts.items():
+            for fact in facts:
+                reached.add(predicate, fact)
+        delta = following
+        first = False
+
+    # Las acciones se ordenan para que la tabla no dependa del orden de los conjuntos de hechos.
+    order = {schema: index for index, schema in enumerate(domain.actions)}
+    actions = [GroundAction(schema, *arguments)
+               for schema, arguments in sorted(grounded, key=lambda key: (order[key[0]], key[1]))]
+    initial_state = State({Atom(*fact) for fact in task.init if fact[0] not in static})
+    goal = State({Atom(*fact) for fact in task.goal if fact[0] not in static or fact not in task.init})
+
+    elapsed = perf_counter() - start
+    if stats is not None:
+        stats.count('grounded_actions', len(actions))
+        stats.timing('grounding', elapsed)
+    return PddlProblem(task.name, initial_state, goal, [], actions, elapsed)
+
+
+def load(domain_file: str, problem_file: str, stats: PlannerStats = None) -> PddlProblem:
+    """
+    Carga e instancia un problema PDDL a partir de sus ficheros.
+
+    Args:
+        domain_file (str): Ruta del fichero del dominio.
+        problem_file (str): Ruta del fichero del problema.
+        stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+
+    Returns:
+        PddlProblem: El problema instanciado.
+    """
+    with open(domain_file) as file:
+        domain = parse_domain(file.read())
+    with open(problem_file) as file:
+        task = parse_problem(file.read(), domain)
+    return ground(task, stats)
+
+
+def _objects_by_type(task: Task) -> Dict[str, Dict[str, None]]:
+    """
+    Función privada con los objetos de cada tipo, incluidos los de sus subtipos.
+
+    Los objetos de cada tipo se guardan como claves de un diccionario: conservan el orden
+    para enumerarlos y la pertenencia se comprueba en tiempo constante.
+
+    Args:
+        task (Task): Problema sin instanciar.
+
+    Returns:
+        Dict[str, Dict[str, None]]: Objetos ordenados de cada tipo del dominio.
+    """
+    result: Dict[str, Dict[str, None]] = {kind: dict() for kind in task.domain.types}
+    for obj, kind in sorted(task.objects.items()):
+        seen = set()
+        while kind is not None and kind not in seen:
+            seen.add(kind)
+            result.setdefault(kind, dict())[obj] = None
+            kind = task.domain.types.get(kind)
+    return result
+
+
+def _bindings(schema: ActionSchema, reached: _FactIndex, delta: _FactIndex, objects: Dict[str, Dict[str, None]],
+              first: bool) -> Iterator[Binding]:
+    """
+    Función privada que enumera las asignaciones de un esquema cuyas precondiciones se alcanzan.
+
+    En la primera ronda se consideran todas las asignaciones; en las siguientes, sólo aquellas en
+    las que alguna precondición dinámica usa un hecho de `delta`.
+
+    Args:
+        schema (ActionSchema): Esquema a instanciar.
+        reached (_FactIndex): Hechos alcanzados.
+        delta (_FactIndex): Hechos alcanzados en la ronda anterior.
+        objects (Dict[str, Dict[str, None]]): Objetos de cada tipo.
+        first (bool): Indica si es la primera ronda.
+
+    Returns:
+        Iterator[Binding]: Asignaciones completas de los parámetros del esquema.
+    """
+    if first:
+        yield from _join(schema, _order(schema.static + schema.precondition, set()), reached, None, {}, objects)
+        return
+
+    for index, seed in enumerate(schema.precondition):
+        if seed[0] not in delta.facts:
+            continue
+        rest = schema.static + schema.precondition[:index] + schema.precondition[index + 1:]
+        order = [seed] + _order(rest, {arg for arg in seed[1] if arg.startswith('?')})
+        yield from _join(schema, order, reached, delta, {}, objects)
+
+
+def _order(literals: Tuple[Literal, ...], bound: Set[str]) -> List[Literal]:
+    """
+    Función privada que ordena las precondiciones para unirlas empezando por las más restrictivas.
+
+    En cada paso se elige la precondición con más variables ya asignadas, y a igualdad, la estática.
+
+    Args:
+        literals (Tuple[Literal, ...]): Precondiciones a ordenar.
+        bound (Set[str]): Variables asignadas antes de la primera.
+
+    Returns:
+        List[Literal]: Las precondiciones en orden de unión.
+    """
+    pending = list(literals)
+    bound = set(bound)
+    order = list()
+    while pending:
+        best = max(pending, key=lambda literal: (sum(arg in bound or not arg.startswith('?') for arg in literal[1]),
+                                                 -len(literal[1])))
+        pending.remove(best)
+        order.append(best)
+        bound.update(arg for arg in best[1] if arg.startswith('?'))
+    return order
+
+
+def _join(schema: ActionSchema, literals: List[Literal], reached: _FactIndex, delta: _FactIndex,
+          binding: Binding, objects: Dict[str, Dict[str, None]]) -> Iterator[Binding]:
+    """
+    Función privada que une recursivamente las precondiciones con los hechos alcanzados.
+
+    Args:
+        schema (ActionSchema): Esquema a instanciar.
+        literals (List[Literal]): Precondiciones pendientes de unir. La primera se une con `delta` si se indica.
+        reached (_FactIndex): Hechos alcanzados.
+        delta (_FactIndex): Hechos con los que unir la primera precondición, o None.
+        binding (Binding): Asignación parcial.
+        objects (Dict[str, Dict[str, None]]): Objetos de cada tipo.
+
+    Returns:
+        Iterator[Binding]: Asignaciones completas que cumplen las precondiciones, tipos y (in)igualdades.
+    """
+    if not literals:
+        yield from _complete(schema, binding, objects)
+        return
+
+    predicate, args = literals[0]
+    facts = delta if delta is not None else reached
+    pattern = tuple(binding.get(arg) if arg.startswith('?') else arg for arg in args)
+    for fact in facts.match(predicate, pattern):
+        extended = dict(binding)
+        for arg, value in zip(args, fact):
+            current = extended.get(arg, arg if not arg.startswith('?') else None)
+            if current is None:
+                extended[arg] = value
+            elif current != value:
+                break
+        else:
+            yield from _join(schema, literals[1:], reached, None, extended, objects)
+
+
+def _complete(schema: ActionSchema, binding: Binding, objects: Dict[str, Dict[str, None]]) -> Iterator[Binding]:
+    """
+    Función privada que asigna los parámetros libres y comprueba los tipos y las (in)igualdades.
+
+    Args:
+        schema (ActionSchema): Esquema a instanciar.
+        binding (Binding): Asignación de los parámetros que aparecen en las precondiciones.
+        objects (Dict[str, Dict[str, None]]): Objetos de cada tipo.
+
+    Returns:
+        Iterator[Binding]: Asignaciones completas válidas.
+    """
+    for variable, kind in schema.parameters:
+        if variable in binding and binding[variable] not in objects.get(kind, ()):
+            return
+
+    free = [(variable, kind) for variable, kind in schema.parameters if variable not in binding]
+    if not free:
+        if all((binding.get(left, left) == binding.get(right, right)) == equal
+               for left, right, equal in schema.constraints):
+            yield binding
+        return
+
+    variable, kind = free[0]
+    for obj in objects.get(kind, ()):
+        yield from _complete(schema, dict(binding, **{variable: obj}), objects)
@@ -0,0 +1,311 @@
+import re
+from typing import Dict, FrozenSet, List, NamedTuple, Tuple, Union
+
+from .ground_action import ActionSchema, Literal
+
+# Expresión S: un símbolo o una lista de expresiones.
+Expression = Union[str, list]
+
+# Requisitos de PDDL admitidos por el cargador.
+REQUIREMENTS = {':strips', ':typing', ':equality'}
+
+
+class Domain(NamedTuple):
+    """
+    Dominio PDDL sin instanciar.
+
+    Attributes:
+        name (str): Nombre del dominio.
+        types (Dict[str, str]): Tipo padre de cada tipo ('object' es la raíz).
+        constants (Dict[str, str]): Tipo de cada constante del dominio.
+        predicates (Dict[str, Tuple[str, ...]]): Tipos de los argumentos de cada predicado.
+        actions (List[ActionSchema]): Esquemas de las acciones.
+    """
+    name: str
+    types: Dict[str, str]
+    constants: Dict[str, str]
+    predicates: Dict[str, Tuple[str, ...]]
+    actions: List[ActionSchema]
+
+    @property
+    def static(self) -> FrozenSet[str]:
+        """ Predicados que no modifica ninguna acción del dominio. """
+        fluent = {predicate for action in self.actions for predicate, _ in action.add_list + action.remove_list}
+        return frozenset(self.predicates) - fluent
+
+
+class Task(NamedTuple):
+    """
+    Problema PDDL sin instanciar.
+
+    Attributes:
+        name (str): Nombre del problema.
+        domain (Domain): Dominio del problema.
+        objects (Dict[str, str]): Tipo de cada objeto del problema, incluidas las constantes del dominio.
+        init (FrozenSet[Tuple[str, ...]]): Átomos del estado inicial como (predicado, objetos...).
+        goal (Tuple[Tuple[str, ...], ...]): Átomos del objetivo como (predicado, objetos...).
+    """
+    name: str
+    domain: Domain
+    objects: Dict[str, str]
+    init: FrozenSet[Tuple[str, ...]]
+    goal: Tuple[Tuple[str, ...], ...]
+
+
+def tokenize(text: str) -> Expression:
+    """
+    Convierte un texto PDDL en una expresión S.
+
+    Se eliminan los comentarios (';') y se pasa todo a minúsculas, ya que PDDL no distingue
+    mayúsculas de minúsculas.
+
+    Args:
+        text (str): Texto PDDL con una única expresión.
+
+    Returns:
+        Expression: La expresión como listas anidadas de símbolos.
+    """
+    tokens = re.findall(r'[()]|[^\s()]+', re.sub(r';[^\n]*', '', text).lower())
+    stack: List[list] = [list()]
+    for token in tokens:
+        if token == '(':
+            stack.append(list())
+        elif token == ')':
+            if len(stack) == 1:
+                raise ValueError("Unbalanced parentheses in PDDL")
+            expression = stack.pop()
+            stack[-1].append(expression)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1 or len(stack[0]) != 1:
+        raise ValueError("PDDL text must contain exactly one expression")
+    return stack[0][0]
+
+
+def parse_domain(text: str) -> Domain:
+    """
+    Interpreta un dominio PDDL del subconjunto STRIPS con tipos.
+
+    Se admiten `:types`, `:constants`, `:predicates` y acciones con `:parameters`, una conjunción
+    de átomos e (in)igualdades como precondición y una conjunción de átomos y negaciones como efecto.
+
+    Args:
+        text (str): Texto del dominio.
+
+    Returns:
+        Domain: El dominio sin instanciar.
+    """
+    expression = tokenize(text)
+    if not isinstance(expression, list) or expression[:1] != ['define'] or len(expression) < 2 \
+            or expression[1][:1] != ['domain']:
+        raise ValueError("Expected (define (domain ...) ...)")
+
+    name = expression[1][1]
+    types: Dict[str, str] = {'object': None}
+    constants: Dict[str, str] = dict()
+    predicates: Dict[str, Tuple[str, ...]] = dict()
+    definitions: List[list] = list()
+    for section in expression[2:]:
+        key = section[0]
+        if key == ':requirements':
+            unsupported = set(section[1:]) - REQUIREMENTS
+            if unsupported:
+                raise ValueError(f"Unsupported requirements: {' '.join(sorted(unsupported))}")
+        elif key == ':types':
+            for item, parent in _typed_list(section[1:]):
+                types[item] = parent
+                types.setdefault(parent, 'object' if parent != 'object' else None)
+        elif key == ':constants':
+            constants.update(_typed_list(section[1:]))
+        elif key == ':predicates':
+            for predicate in section[1:]:
+                predicates[predicate[0]] = tuple(kind for _, kind in _typed_list(predicate[1:]))
+        elif key == ':action':
+            definitions.append(section)
+        else:
+            raise ValueError(f"Unsupported domain section: {key}")
+
+    for kind in list(constants.values()) + [kind for kinds in predicates.values() for kind in kinds]:
+        if kind not in types:
+            raise ValueError(f"Unknown type: {kind}")
+
+    actions = [_parse_action(definition, predicates, types, constants) for definition in definitions]
+    fluent = {predicate for action in actions for predicate, _ in action.add_list + action.remove_list}
+    actions = [action._replace(precondition=tuple(literal for literal in action.precondition
+                                                  if literal[0] in fluent),
+                               static=tuple(literal for literal in action.precondition
+                                            if literal[0] not in fluent))
+               for action in actions]
+    return Domain(name, types, constants, predicates, actions)
+
+
+def parse_problem(text: str, domain: Domain) -> Task:
+    """
+    Interpreta un problema PDDL de un dominio.
+
+    Args:
+        text (str): Texto del problema.
+        domain (Domain): Dominio del problema.
+
+    Returns:
+        Task: El problema sin instanciar.
+    """
+    expression = tokenize(text)
+    if not isinstance(expression, list) or expression[:1] != ['define'] or len(expression) < 2 \
+            or expression[1][:1] != ['problem']:
+        raise ValueError("Expected (define (problem ...) ...)")
+
+    name = expression[1][1]
+    objects: Dict[str, str] = dict(domain.constants)
+    init: List[Tuple[str, ...]] = list()
+    goal: List[Tuple[str, ...]] = list()
+    for section in expression[2:]:
+        key = section[0]
+        if key == ':domain':
+            if section[1] != domain.name:
+                raise ValueError(f"Problem {name} belongs to domain {section[1]}, not {domain.name}")
+        elif key == ':requirements':
+            continue
+        elif key == ':objects':
+            objects.update(_typed_list(section[1:]))
+        elif key == ':init':
+            init.extend(tuple(atom) for atom in section[1:])
+        elif key == ':goal':
+            for literal in _conjunction(section[1]):
+                if literal[0] == 'not':
+                    raise ValueError("Negative goals are not supported")
+                goal.append(tuple(literal))
+        else:
+            raise ValueError(f"Unsupported problem section: {key}")
+
+    for kind in objects.values():
+        if kind not in domain.types:
+            raise ValueError(f"Unknown type: {kind}")
+    for atom in init + goal:
+        _check_atom(atom[0], atom[1:], domain.predicates, objects)
+    return Task(name, domain, objects, frozenset(init), tuple(goal))
+
+
+def _typed_list(items: List[str]) -> List[Tuple[str, str]]:
+    """
+    Función privada que interpreta una lista con tipos ('a b - tipo c').
+
+    Args:
+        items (List[str]): Símbolos de la lista.
+
+    Returns:
+        List[Tuple[str, str]]: Cada nombre y su tipo ('object' si no se indica).
+    """
+    result = list()
+    pending = list()
+    index = 0
+    while index < len(items):
+        item = items[index]
+        if item == '-':
+            if index + 1 >= len(items) or not isinstance(items[index + 1], str):
+                raise ValueError("Expected a type name after '-'")
+            result.extend((name, items[index + 1]) for name in pending)
+            pending = list()
+            index += 2
+        else:
+            if not isinstance(item, str):
+                raise ValueError(f"Unsupported typed list item: {item}")
+            pending.append(item)
+            index += 1
+    result.extend((name, 'object') for name in pending)
+    return result
+
+
+def _conjunction(expression: Expression) -> List[list]:
+    """
+    Función privada que aplana una conjunción de literales.
+
+    Args:
+        expression (Expression): Un literal o una expresión (and ...).
+
+    Returns:
+        List[list]: Los literales de la conjunción.
+    """
+    if not isinstance(expression, list):
+        raise ValueError(f"Expected a formula, found {expression}")
+    if not expression:
+        return list()
+    if expression[0] == 'and':
+        return [literal for item in expression[1:] for literal in _conjunction(item)]
+    if expression[0] in ('or', 'imply', 'exists', 'forall', 'when'):
+        raise ValueError(f"Unsupported formula: {expression[0]}")
+    return [expression]
+
+
+def _parse_action(definition: list, predicates: Dict[str, Tuple[str, ...]], types: Dict[str, str],
+                  constants: Dict[str, str]) -> ActionSchema:
+    """
+    Función privada que interpreta la definición de una acción.
+
+    Las precondiciones se devuelven todas como dinámicas; `parse_domain` separa después las estáticas.
+
+    Args:
+        definition (list): Expresión (:action nombre :parameters ... :precondition ... :effect ...).
+        predicates (Dict[str, Tuple[str, ...]]): Predicados del dominio.
+        types (Dict[str, str]): Tipos del dominio.
+        constants (Dict[str, str]): Constantes del dominio.
+
+    Returns:
+        ActionSchema: El esquema de la acción.
+    """
+    name = definition[1]
+    fields = dict(zip(definition[2::2], definition[3::2]))
+    parameters = tuple(_typed_list(fields.get(':parameters', [])))
+    for variable, kind in parameters:
+        if not variable.startswith('?'):
+            raise ValueError(f"Parameter {variable} of action {name} must start with '?'")
+        if kind not in types:
+            raise ValueError(f"Unknown type: {kind}")
+    variables = dict(constants, **{variable: kind for variable, kind in parameters})
+
+    precondition: List[Literal] = list()
+    constraints: List[Tuple[str, str, bool]] = list()
+    for literal in _conjunction(fields.get(':precondition', [])):
+        positive = literal[0] != 'not'
+        atom = literal if positive else literal[1]
+        if atom[0] == '=':
+            for arg in atom[1:]:
+                if arg not in variables:
+                    raise ValueError(f"Unknown argument {arg} in (= ...)")
+            constraints.append((atom[1], atom[2], positive))
+        elif not positive:
+            raise ValueError(f"Negative precondition {atom} of action {name} is not supported")
+        else:
+            _check_atom(atom[0], atom[1:], predicates, variables)
+            precondition.append((atom[0], tuple(atom[1:])))
+
+    add_list: List[Literal] = list()
+    remove_list: List[Literal] = list()
+    for literal in _conjunction(fields.get(':effect', [])):
+        positive = literal[0] != 'not'
+        atom = literal if positive else literal[1]
+        _check_atom(atom[0], atom[1:], predicates, variables)
+        (add_list if positive else remove_list).append((atom[0], tuple(atom[1:])))
+
+    return ActionSchema(name, parameters, tuple(precondition), (), tuple(add_list), tuple(remove_list),
+                        tuple(constraints))
+
+
+def _check_atom(predicate: str, args: Tuple[str, ...], predicates: Dict[str, Tuple[str, ...]],
+                names: Dict[str, str]):
+    """
+    Función privada que comprueba que un átomo usa un predicado declarado con su aridad y argumentos conocidos.
+
+    Args:
+        predicate (str): Nombre del predicado.
+        args (Tuple[str, ...]): Argumentos del átomo.
+        predicates (Dict[str, Tuple[str, ...]]): Predicados del dominio.
+        names (Dict[str, str]): Variables y objetos que pueden aparecer como argumentos.
+    """
+    if predicate not in predicates:
+        raise ValueError(f"Unknown predicate: {predicate}")
+    if len(args) != len(predicates[predicate]):
+        raise ValueError(f"Predicate {predicate} expects {len(predicates[predicate])} arguments")
+    for arg in args:
+        if not isinstance(arg, str) or arg not in names:
+            raise ValueError(f"Unknown argument {arg} in ({predicate} ...)")
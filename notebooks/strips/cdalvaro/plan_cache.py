@@ -0,0 +1,261 @@
+import hashlib
+import json
+import sqlite3
+import time
+from threading import RLock
+from typing import Callable, Dict, Iterable, List, Union
+
+from .actions import Actions, BaseAction
+from .cache import LRUCache
+from .grounding import ActionTable
+from .plans import is_valid
+from .properties import Properties
+from .state import State
+from .stats import PlannerStats
+
+
+def _descriptions(properties: Properties) -> List[str]:
+    """ Función privada con las descripciones ordenadas de un conjunto de propiedades. """
+    return sorted(prop.description for prop in properties)
+
+
+def canonical_key(initial_state: State, goal: State) -> str:
+    """
+    Calcula la clave canónica de un problema.
+
+    La clave no depende del orden de las propiedades ni de la ejecución del intérprete:
+    es el resumen SHA-256 de las descripciones ordenadas del estado inicial y del objetivo.
+
+    Args:
+        initial_state (State): Estado inicial del problema.
+        goal (State): Estado objetivo del problema.
+
+    Returns:
+        str: Clave hexadecimal del problema.
+    """
+    text = json.dumps([_descriptions(initial_state.properties), _descriptions(goal.properties)],
+                      ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def domain_version(actions: Iterable[BaseAction]) -> str:
+    """
+    Calcula la versión de un dominio a partir de sus acciones.
+
+    Cualquier cambio en el nombre o en las listas de propiedades de una acción
+    cambia la versión, lo que invalida los planes guardados con el dominio anterior.
+
+    Args:
+        actions (Iterable[BaseAction]): Acciones del dominio.
+
+    Returns:
+        str: Versión hexadecimal del dominio.
+    """
+    definition = sorted([action.name, _descriptions(action.precondition), _descriptions(action.add_list),
+                         _descriptions(action.remove_list)] for action in actions)
+    text = json.dumps(definition, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+
+    def __init__(self, actions: ActionTable, path: str = None, maxsize: int = 1024, version: str = None,
+                 stats: PlannerStats = None):
+        """
+        Clase con una caché persistente de planes por problema.
+
+        Tiene dos niveles: una caché LRU en memoria con los planes recientes y, si se indica
+        una ruta, una base de datos sqlite donde los planes se guardan por el nombre de sus acciones.
+        Los planes se validan ejecutándolos sobre el estado inicial antes de devolverlos, y los
+        que no son válidos se eliminan de ambos niveles.
+
+        Cada plan se guarda junto a la versión del dominio. Al abrir la base de datos se
+        eliminan los planes de otras versiones, y `invalidate` permite cambiar de versión en caliente.
+
+        La conexión se comparte entre hilos y sus operaciones se serializan con un cerrojo.
+
+        Args:
+            actions (ActionTable): Tabla de acciones del dominio, con la que se recuperan las acciones por su nombre.
+            path (str, optional): Ruta de la base de datos sqlite. Default: None (sólo en memoria).
+            maxsize (int, optional): Entradas máximas de la caché en memoria. Default: 1024.
+            version (str, optional): Versión del dominio. Default: la calculada con `domain_version`.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: None (desactivado).
+        """
+        self.by_name: Dict[str, BaseAction] = {compiled.action.name: compiled.action for compiled in actions.actions}
+        self.version: str = version if version is not None else domain_version(self.by_name.values())
+        self.memory: LRUCache = LRUCache(maxsize)
+        self.stats: PlannerStats = stats
+        self.hits: int = 0
+        self.misses: int = 0
+        self.invalid: int = 0
+
+        self.path: Union[str, None] = path
+        self._connection: Union[sqlite3.Connection, None] = None
+        self._lock = RLock()
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS plans ("
+                    "key TEXT PRIMARY KEY, version TEXT NOT NULL, plan TEXT NOT NULL, "
+                    "created REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)")
+                self._connection.execute("DELETE FROM plans WHERE version != ?", (self.version,))
+
+    def get(self, initial_state: State, goal: State) -> Union[Actions, None]:
+        """
+        Busca el plan de un problema.
+
+        Args:
+            initial_state (State): Estado inicial del problema.
+            goal (State): Estado objetivo del problema.
+
+        Returns:
+            Union[Actions, None]: Una copia del plan guardado o None si no hay un plan válido.
+        """
+        key = canonical_key(initial_state, goal)
+
+        plan = self.memory.get(key, None)
+        if plan is None and self._connection is not None:
+            plan = self._load(key)
+
+        if plan is not None and not is_valid(initial_state, goal, plan):
+            self.invalid += 1
+            self._count('plan_cache_invalid')
+            self._discard(key)
+            plan = None
+
+        if plan is None:
+            self.misses += 1
+            self._count('plan_cache_misses')
+            return None
+
+        self.memory.put(key, plan)
+        self.hits += 1
+        self._count('plan_cache_hits')
+        return list(plan)
+
+    def put(self, initial_state: State, goal: State, plan: Actions):
+        """
+        Guarda el plan de un problema en ambos niveles de la caché.
+
+        Args:
+            initial_state (State): Estado inicial del problema.
+            goal (State): Estado objetivo del problema.
+            plan (Actions): Plan del problema.
+        """
+        key = canonical_key(initial_state, goal)
+        plan = tuple(plan)
+        self.memory.put(key, plan)
+        if self._connection is not None:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO plans (key, version, plan, created) VALUES (?, ?, ?, ?)",
+                    (key, self.version, json.dumps([action.name for action in plan], ensure_ascii=False),
+                     time.time()))
+
+    def get_or_plan(self, initial_state: State, goal: State,
+                    planner: Callable[[], Union[Actions, bool]]) -> Union[Actions, bool]:
+        """
+        Devuelve el plan guardado o lo calcula con el planificador y lo guarda.
+
+        Los problemas sin solución no se guardan.
+
+        Args:
+            initial_state (State): Estado inicial del problema.
+            goal (State): Estado objetivo del problema.
+            planner (Callable[[], Union[Actions, bool]]): Función que calcula el plan, por ejemplo
+                `Strips(initial_state, goal, heuristic).get_plan`.
+
+        Returns:
+            Union[Actions, bool]: El plan o False si el planificador no lo encuentra.
+        """
+        plan = self.get(initial_state, goal)
+        if plan is not None:
+            return plan
+
+        plan = planner()
+        if plan is not False:
+            self.put(initial_state, goal, plan)
+        return plan
+
+    def invalidate(self, version: str = None):
+        """
+        Vacía la caché en memoria y elimina de disco los planes de otras versiones del dominio.
+
+        Args:
+            version (str, optional): Nueva versión del dominio. Default: None (se mantiene la actual).
+        """
+        if version is not None:
+            self.version = version
+        self.memory.clear()
+        if self._connection is not None:
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM plans WHERE version != ?", (self.version,))
+
+    def info(self) -> Dict[str, int]:
+        """
+        Devuelve los contadores de uso de la caché.
+
+        Returns:
+            Dict[str, int]: Aciertos, fallos, planes inválidos descartados y entradas de cada nivel.
+        """
+        stored = None
+        if self._connection is not None:
+            with self._lock:
+                stored = self._connection.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalid': self.invalid,
+            'memory': len(self.memory),
+            'disk': stored,
+        }
+
+    def close(self):
+        """ Cierra la base de datos. """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _load(self, key: str) -> Union[Actions, None]:
+        """
+        Método privado para recuperar un plan de la base de datos.
+
+        Args:
+            key (str): Clave canónica del problema.
+
+        Returns:
+            Union[Actions, None]: El plan o None si no está guardado o contiene acciones desconocidas.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT plan FROM plans WHERE key = ? AND version = ?",
+                                           (key, self.version)).fetchone()
+            if row is None:
+                return None
+
+            names = json.loads(row[0])
+            if any(name not in self.by_name for name in names):
+                self._discard(key)
+                return None
+
+            with self._connection:
+                self._connection.execute("UPDATE plans SET hits = hits + 1 WHERE key = ?", (key,))
+        return tuple(self.by_name[name] for name in names)
+
+    def _discard(self, key: str):
+        """
+        Método privado para eliminar un plan de ambos niveles.
+
+        Args:
+            key (str): Clave canónica del problema.
+        """
+        self.memory.pop(key)
+        if self._connection is not None:
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM plans WHERE key = ?", (key,))
+
+    def _count(self, name: str):
+        """ Método privado para registrar un contador si hay recolector de estadísticas. """
+        if self.stats is not None:
+            self.stats.count(name)
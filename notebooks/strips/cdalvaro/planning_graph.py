@@ -0,0 +1,389 @@
+from time import perf_counter
+from typing import Dict, List, Set, Union
+
+from .actions import Actions
+from .encoding import bits
+from .grounding import ActionTable
+from .relaxed import INFINITY
+from .state import State
+from .stats import PlannerStats
+
+
+class PlanningGraph:
+
+    def __init__(self, actions: ActionTable, initial_state: Union[State, int], stats: PlannerStats = None):
+        """
+        Clase que implementa un grafo de planificación (Graphplan) sobre máscaras de bits.
+
+        El grafo alterna capas de propiedades y capas de acciones a partir del estado inicial.
+        Cada capa se guarda como una máscara de bits y sus relaciones de exclusión mutua (mutex)
+        como una lista con, para cada nodo, la máscara de los nodos excluyentes con él. Las capas
+        se construyen de una en una con `expand` y las exclusiones se calculan de forma incremental
+        a partir de las de la capa anterior.
+
+        Las acciones se numeran como en la tabla, seguidas de una acción de persistencia (no-op)
+        por cada propiedad, que la mantiene de una capa a la siguiente.
+
+        - Dos acciones son excluyentes si una elimina una precondición o un efecto de la otra
+          (interferencia) o si tienen precondiciones excluyentes en la capa anterior.
+        - Dos propiedades son excluyentes si todas las acciones que consiguen una son
+          excluyentes con todas las que consiguen la otra.
+
+        El grafo se estabiliza cuando una capa repite las propiedades y exclusiones de la anterior.
+        Si el objetivo no aparece entonces sin exclusiones entre sus propiedades, el problema no tiene solución.
+
+        Args:
+            actions (ActionTable): Tabla de acciones instanciadas del problema.
+            initial_state (Union[State, int]): Estado inicial o su máscara de bits.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+        """
+        self.table: ActionTable = actions
+        self.encoding = actions.encoding
+        self.stats: PlannerStats = stats
+        if isinstance(initial_state, State):
+            initial_state = self.encoding.encode(initial_state)
+
+        compiled = actions.actions
+        size = len(self.encoding)
+        self.size: int = size
+        self.noop: int = len(compiled)
+
+        # Listas de cada nodo de acción: las acciones de la tabla y, a continuación, las de persistencia.
+        self._preconditions: List[int] = [action.precondition for action in compiled] + [1 << p for p in range(size)]
+        self._add_lists: List[int] = [action.add_list for action in compiled] + [1 << p for p in range(size)]
+        remove_lists = [action.remove_list for action in compiled] + [0] * size
+
+        # Para cada propiedad: nodos que la añaden, que la requieren y que la eliminan.
+        self._achievers: List[int] = [0] * size
+        self._consumers: List[int] = [0] * size
+        deleters = [0] * size
+        users = [0] * size
+        for node in range(len(self._preconditions)):
+            for p in bits(self._add_lists[node]):
+                self._achievers[p] |= 1 << node
+            for p in bits(self._preconditions[node]):
+                self._consumers[p] |= 1 << node
+            for p in bits(remove_lists[node]):
+                deleters[p] |= 1 << node
+            for p in bits(self._preconditions[node] | self._add_lists[node]):
+                users[p] |= 1 << node
+
+        # La interferencia no depende de la capa, así que se calcula una única vez.
+        self._interference: List[int] = list()
+        for node in range(len(self._preconditions)):
+            interference = 0
+            for p in bits(remove_lists[node]):
+                interference |= users[p]
+            for p in bits(self._preconditions[node] | self._add_lists[node]):
+                interference |= deleters[p]
+            self._interference.append(interference & ~(1 << node))
+
+        self.facts: List[int] = [initial_state]
+        self.fact_mutexes: List[List[int]] = [[0] * size]
+        self.actions: List[int] = list()
+        self.action_mutexes: List[Dict[int, int]] = list()
+        self.leveled_off: Union[int, None] = None
+
+        self._first_level: List[Union[int, None]] = [None] * size
+        for p in bits(initial_state):
+            self._first_level[p] = 0
+        self._nogoods: List[Set[int]] = [set()]
+        self.nodes: int = 0
+
+    def expand(self) -> bool:
+        """
+        Añade una capa de acciones y la siguiente capa de propiedades.
+
+        Returns:
+            bool: True si la nueva capa es distinta de la anterior o False si el grafo ya se ha estabilizado.
+        """
+        level = len(self.facts) - 1
+        if self.leveled_off is not None:
+            # Las capas estabilizadas son idénticas: se comparten en lugar de recalcularse.
+            self.facts.append(self.facts[-1])
+            self.fact_mutexes.append(self.fact_mutexes[-1])
+            self.actions.append(self.actions[-1])
+            self.action_mutexes.append(self.action_mutexes[-1])
+            self._nogoods.append(set())
+            return False
+
+        if self.stats is not None:
+            start = perf_counter()
+
+        facts = self.facts[level]
+        fact_mutexes = self.fact_mutexes[level]
+
+        # Capa de acciones: precondiciones presentes y sin exclusiones entre ellas.
+        layer = 0
+        for node, precondition in enumerate(self._preconditions):
+            if facts & precondition == precondition and \
+                    all(fact_mutexes[p] & precondition == 0 for p in bits(precondition)):
+                layer |= 1 << node
+
+        action_mutexes: Dict[int, int] = dict()
+        for node in bits(layer):
+            # Precondiciones en competencia: propiedades excluyentes con alguna precondición del nodo.
+            competing = 0
+            for p in bits(self._preconditions[node]):
+                competing |= fact_mutexes[p]
+            mutexes = self._interference[node]
+            for q in bits(competing):
+                mutexes |= self._consumers[q]
+            action_mutexes[node] = mutexes & layer
+
+        # Capa de propiedades: efectos de las acciones de la capa.
+        next_facts = 0
+        for node in bits(layer):
+            next_facts |= self._add_lists[node]
+
+        achievers = {p: self._achievers[p] & layer for p in bits(next_facts)}
+        # Para cada propiedad, nodos compatibles con alguna de las acciones que la consiguen.
+        compatible = dict()
+        for p, nodes in achievers.items():
+            mask = 0
+            for node in bits(nodes):
+                mask |= layer & ~action_mutexes[node]
+            compatible[p] = mask
+
+        next_mutexes = [0] * self.size
+        for p in bits(next_facts):
+            mutexes = 0
+            for q in bits(next_facts):
+                if p != q and achievers[q] & compatible[p] == 0:
+                    mutexes |= 1 << q
+            next_mutexes[p] = mutexes
+
+        for p in bits(next_facts & ~facts):
+            self._first_level[p] = level + 1
+
+        self.actions.append(layer)
+        self.action_mutexes.append(action_mutexes)
+        self.facts.append(next_facts)
+        self.fact_mutexes.append(next_mutexes)
+        self._nogoods.append(set())
+
+        if next_facts == facts and next_mutexes == fact_mutexes:
+            self.leveled_off = level
+
+        if self.stats is not None:
+            self.stats.timing('graph_expand', perf_counter() - start)
+            self.stats.count('graph_levels')
+        return self.leveled_off is None
+
+    def level(self, goal: Union[State, int]) -> Union[int, None]:
+        """
+        Calcula la primera capa en la que aparecen todas las propiedades del objetivo sin exclusiones.
+
+        El grafo se expande lo necesario, hasta que aparece el objetivo o se estabiliza.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+
+        Returns:
+            Union[int, None]: Índice de la capa o None si el objetivo nunca aparece sin exclusiones.
+        """
+        goal = self._mask(goal)
+        # Las propiedades que no están en la codificación del grafo no aparecen en ninguna capa.
+        if goal >> self.size:
+            return None
+        level = 0
+        while True:
+            if level == len(self.facts):
+                self.expand()
+            if self._reached(goal, level):
+                return level
+            if self.leveled_off is not None and level > self.leveled_off:
+                return None
+            level += 1
+
+    def is_unsolvable(self, goal: Union[State, int]) -> bool:
+        """
+        Comprueba si el grafo demuestra que el objetivo no es alcanzable.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+
+        Returns:
+            bool: True si el objetivo no aparece sin exclusiones en el grafo estabilizado.
+        """
+        return self.level(goal) is None
+
+    def set_level(self, goal: Union[State, int]) -> float:
+        """
+        Heurística de nivel del conjunto: primera capa con el objetivo sin exclusiones. Es admisible.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+
+        Returns:
+            float: Capa del objetivo o `INFINITY` si no es alcanzable.
+        """
+        level = self.level(goal)
+        return INFINITY if level is None else level
+
+    def max_level(self, goal: Union[State, int]) -> float:
+        """
+        Heurística de nivel máximo: mayor capa en la que aparece alguna propiedad del objetivo. Es admisible.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+
+        Returns:
+            float: Capa máxima o `INFINITY` si alguna propiedad no es alcanzable.
+        """
+        levels = self._fact_levels(self._mask(goal))
+        return max(levels, default=0)
+
+    def sum_level(self, goal: Union[State, int]) -> float:
+        """
+        Heurística de suma de niveles: suma de las capas en las que aparece cada propiedad del objetivo.
+
+        No es admisible, pero suele guiar mejor las búsquedas voraces.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+
+        Returns:
+            float: Suma de las capas o `INFINITY` si alguna propiedad no es alcanzable.
+        """
+        return sum(self._fact_levels(self._mask(goal)))
+
+    def extract_plan(self, goal: Union[State, int], max_levels: int = None) -> Union[Actions, bool]:
+        """
+        Extrae un plan del grafo con la búsqueda hacia atrás de Graphplan.
+
+        Desde la capa del objetivo, se eligen acciones no excluyentes que consigan sus propiedades
+        y se continúa con sus precondiciones en la capa anterior. Los conjuntos de objetivos que
+        fallan en una capa se memorizan (nogoods). Si la extracción falla, se añade una capa y se
+        vuelve a intentar. Una vez estabilizado el grafo, si los nogoods de la capa estable no
+        cambian entre dos intentos, el problema no tiene solución.
+
+        El plan tiene el menor número de pasos paralelos, pero no necesariamente el menor número de acciones.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+            max_levels (int, optional): Número máximo de capas a intentar. Default: None (sin límite).
+
+        Returns:
+            Union[Actions, bool]: Las acciones del plan o False si no existe o se ha superado `max_levels`.
+        """
+        goal = self._mask(goal)
+        level = self.level(goal)
+        if level is None:
+            return False
+
+        previous_nogoods = None
+        while max_levels is None or level <= max_levels:
+            while len(self.facts) <= level:
+                self.expand()
+
+            steps = self._extract(goal, level)
+            if steps is not None:
+                if self.stats is not None:
+                    self.stats.count('graph_extractions')
+                compiled = self.table.actions
+                return [compiled[node].action for step in steps for node in bits(step) if node < self.noop]
+
+            if self.leveled_off is not None and level > self.leveled_off:
+                nogoods = len(self._nogoods[self.leveled_off + 1])
+                if nogoods == previous_nogoods:
+                    return False
+                previous_nogoods = nogoods
+            level += 1
+        return False
+
+    def _extract(self, goal: int, level: int) -> Union[List[int], None]:
+        """
+        Método privado que busca hacia atrás, desde una capa, un plan por pasos para el objetivo.
+
+        Args:
+            goal (int): Máscara de las propiedades a conseguir.
+            level (int): Capa de propiedades en la que se debe cumplir el objetivo.
+
+        Returns:
+            Union[List[int], None]: Máscara de las acciones de cada paso o None si no existe.
+        """
+        if level == 0:
+            return [] if self.facts[0] & goal == goal else None
+        nogoods = self._nogoods[level]
+        if goal in nogoods or not self._reached(goal, level):
+            return None
+
+        layer = self.actions[level - 1]
+        action_mutexes = self.action_mutexes[level - 1]
+        # Se asignan primero las propiedades con menos acciones que las consiguen.
+        pending = sorted(bits(goal), key=lambda p: bin(self._achievers[p] & layer).count('1'))
+
+        def assign(index: int, chosen: int, excluded: int, preconditions: int) -> Union[List[int], None]:
+            while index < len(pending) and any(self._add_lists[node] >> pending[index] & 1 for node in bits(chosen)):
+                index += 1
+            if index == len(pending):
+                steps = self._extract(preconditions, level - 1)
+                return None if steps is None else steps + [chosen]
+
+            p = pending[index]
+            candidates = self._achievers[p] & layer & ~excluded
+            # Se prueba primero la persistencia, que no añade acciones al plan.
+            noop = 1 << (self.noop + p)
+            order = ([self.noop + p] if candidates & noop else []) + list(bits(candidates & ~noop))
+            for node in order:
+                self.nodes += 1
+                steps = assign(index + 1, chosen | 1 << node, excluded | action_mutexes[node],
+                               preconditions | self._preconditions[node])
+                if steps is not None:
+                    return steps
+            return None
+
+        steps = assign(0, 0, 0, 0)
+        if steps is None:
+            nogoods.add(goal)
+        return steps
+
+    def _reached(self, goal: int, level: int) -> bool:
+        """
+        Método privado que comprueba si el objetivo aparece sin exclusiones en una capa.
+
+        Args:
+            goal (int): Máscara del objetivo.
+            level (int): Índice de la capa de propiedades.
+
+        Returns:
+            bool: True si todas las propiedades del objetivo están en la capa y no son excluyentes entre sí.
+        """
+        if self.facts[level] & goal != goal:
+            return False
+        mutexes = self.fact_mutexes[level]
+        return all(mutexes[p] & goal == 0 for p in bits(goal))
+
+    def _fact_levels(self, goal: int) -> List[float]:
+        """
+        Método privado con la primera capa en la que aparece cada propiedad del objetivo.
+
+        Args:
+            goal (int): Máscara del objetivo.
+
+        Returns:
+            List[float]: Capa de cada propiedad o `INFINITY` si no aparece en el grafo estabilizado.
+        """
+        outside = [INFINITY] * bin(goal >> self.size).count('1')
+        goal &= (1 << self.size) - 1
+        while self.leveled_off is None and any(self._first_level[p] is None for p in bits(goal)):
+            self.expand()
+        return [INFINITY if self._first_level[p] is None else self._first_level[p] for p in bits(goal)] + outside
+
+    def _mask(self, goal: Union[State, int]) -> int:
+        """
+        Método privado que codifica el objetivo como máscara de bits.
+
+        La máscara puede tener propiedades fuera del dominio instanciado (posiciones a partir de
+        `size`), que el grafo nunca contiene: el objetivo se trata entonces como inalcanzable.
+
+        Args:
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+
+        Returns:
+            int: Máscara de bits del objetivo.
+        """
+        if isinstance(goal, State):
+            goal = self.encoding.encode(goal)
+        return goal
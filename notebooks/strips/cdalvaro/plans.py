@@ -0,0 +1,73 @@
+from typing import Union
+
+from .actions import Actions
+from .state import State
+
+
+def replay(state: State, plan: Actions) -> Union[State, None]:
+    """
+    Aplica en orden las acciones de un plan sobre un estado.
+
+    Args:
+        state (State): Estado sobre el que se ejecuta el plan.
+        plan (Actions): Acciones del plan.
+
+    Returns:
+        Union[State, None]: El estado final o None si alguna acción no se puede aplicar.
+    """
+    for action in plan:
+        state = action.apply(state)
+        if state is None:
+            return None
+    return state
+
+
+def is_valid(initial_state: State, goal: State, plan: Actions) -> bool:
+    """
+    Comprueba que un plan se puede ejecutar desde el estado inicial y alcanza el objetivo.
+
+    Args:
+        initial_state (State): Estado inicial del problema.
+        goal (State): Estado objetivo del problema.
+        plan (Actions): Acciones del plan.
+
+    Returns:
+        bool: True si el plan es válido, o False en caso contrario.
+    """
+    final_state = replay(initial_state, plan)
+    return final_state is not None and goal.properties <= final_state.properties
+
+
+def eliminate_redundant(initial_state: State, goal: State, plan: Actions) -> Actions:
+    """
+    Elimina las acciones redundantes de un plan válido.
+
+    Para cada acción, prueba a quitarla junto con las acciones posteriores que dejan de
+    poder aplicarse; si el plan resultante sigue alcanzando el objetivo, se conserva.
+
+    Args:
+        initial_state (State): Estado inicial del problema.
+        goal (State): Estado objetivo del problema.
+        plan (Actions): Acciones de un plan válido.
+
+    Returns:
+        Actions: Un plan válido con un subconjunto de las acciones en el mismo orden.
+    """
+    plan = list(plan)
+    prefix_state = initial_state
+    i = 0
+    while i < len(plan):
+        state = prefix_state
+        reduced = plan[:i]
+        for action in plan[i + 1:]:
+            following = action.apply(state)
+            if following is not None:
+                state = following
+                reduced.append(action)
+
+        if goal.properties <= state.properties:
+            plan = reduced
+        else:
+            prefix_state = plan[i].apply(prefix_state)
+            i += 1
+    return plan
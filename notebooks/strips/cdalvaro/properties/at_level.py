@@ -20,7 +20,10 @@ class Level:
         return self.name
 
     def __eq__(self, other) -> bool:
-        return self.level == other.level
+        return isinstance(other, Level) and self.level == other.level
+
+    def __hash__(self) -> int:
+        return hash(self.level)
 
 
 class TopLevel(Level, metaclass=Singleton):
@@ -29,6 +32,9 @@ class TopLevel(Level, metaclass=Singleton):
         """ Clase singleton para representar el nivel superior. """
         super().__init__(1, 'Superior')
 
+    def __reduce__(self):
+        return TopLevel, ()
+
 
 class GroundLevel(Level, metaclass=Singleton):
 
@@ -36,8 +42,12 @@ class GroundLevel(Level, metaclass=Singleton):
         """ Clase singleton para representar el nivel inferior. """
         super().__init__(0, 'Inferior')
 
+    def __reduce__(self):
+        return GroundLevel, ()
+
 
 class AtLevel(BaseProperty):
+    __slots__ = ('element', 'level', 'position')
 
     def __init__(self, element: Element, level: Level, position: int = None):
         """
@@ -3,6 +3,7 @@ from ..element import Element, Banana, Monkey
 
 
 class AtPosition(BaseProperty):
+    __slots__ = ('element', 'position')
 
     def __init__(self, element: Element, position: int):
         """
@@ -13,7 +14,7 @@ class AtPosition(BaseProperty):
             position (int): Entero con la posición en la que se encuentra el elemento.
         """
         name = f"{element}EnPosicion{position}"
-        weight = 1 if element == Banana() else 2 if element == Monkey() else 3
+        weight = 1 if isinstance(element, Banana) else 2 if isinstance(element, Monkey) else 3
 
         super().__init__(name, weight)
         self.element: Element = element
@@ -1,20 +1,30 @@
-from typing import Set, TypeVar
+from typing import AbstractSet, TypeVar
 
-Properties = TypeVar('Properties', bound=Set['BaseProperty'])
+from ..flyweight import Flyweight, _rebuild
 
+Properties = TypeVar('Properties', bound=AbstractSet['BaseProperty'])
 
-class BaseProperty:
+
+class BaseProperty(metaclass=Flyweight):
+    __slots__ = ('description', 'weight', '_hash', '_arguments', '__weakref__')
+    # Argumentos de construcción iniciales que no son objetos del problema y no se permutan.
+    fixed_arguments: int = 0
 
     def __init__(self, description: str, weight: int = 0):
         """
         Clase base para modelizar una propiedad de un estado.
 
+        Las propiedades son únicas: construir la misma propiedad devuelve siempre
+        la misma instancia, por lo que la igualdad es una comparación de identidad
+        y el hash se calcula una única vez.
+
         Args:
             description (str): Atributo privado con la descripción de la propiedad.
             weight (int, optional): El peso que tiene asociada la propiedad. Default: 0.
         """
         self.description: str = description
         self.weight: int = weight
+        self._hash: int = hash(description)
 
     def __str__(self) -> str:
         return self.description
@@ -23,7 +33,10 @@ class BaseProperty:
         return self.__str__()
 
     def __eq__(self, other) -> bool:
-        return self.description == other.description
+        return self is other
 
     def __hash__(self) -> int:
-        return hash(self.description)
+        return self._hash
+
+    def __reduce__(self):
+        return _rebuild, (type(self),) + self._arguments
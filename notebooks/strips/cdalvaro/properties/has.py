@@ -3,6 +3,7 @@ from ..element import Element
 
 
 class Has(BaseProperty):
+    __slots__ = ('owner', 'element')
 
     def __init__(self, owner: Element, element: Element):
         """
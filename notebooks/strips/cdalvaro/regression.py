@@ -0,0 +1,451 @@
+from heapq import heappop, heappush
+from itertools import count
+from time import perf_counter
+from typing import Dict, List, Tuple, Union
+
+from .actions import Actions
+from .encoding import CompiledAction, bits
+from .grounding import ActionTable
+from .heuristic import Heuristic
+from .relaxed import INFINITY, AdditiveHeuristic, MaxHeuristic
+from .search import BestFirstSearch
+from .state import State
+from .stats import PlannerStats
+
+# Para cada nodo: coste acumulado, nodo vecino en el camino hacia su origen y acción que los une.
+Parents = Dict[int, Tuple[int, Union[int, None], Union[CompiledAction, None]]]
+
+
+def static_mutexes(actions: ActionTable, initial: int) -> List[int]:
+    """
+    Calcula los pares de propiedades que nunca pueden cumplirse a la vez.
+
+    Propaga hasta un punto fijo los pares de propiedades alcanzables juntas desde el estado
+    inicial (heurística h²): una acción cuyas precondiciones son alcanzables dos a dos hace
+    alcanzables los pares de propiedades que añade, y cada propiedad añadida junto con cada
+    propiedad que no elimina y es alcanzable con todas sus precondiciones.
+    Los pares que no se alcanzan son mutuamente excluyentes.
+
+    Args:
+        actions (ActionTable): Tabla de acciones instanciadas del problema.
+        initial (int): Máscara del estado inicial.
+
+    Returns:
+        List[int]: Para cada propiedad, la máscara de las propiedades excluyentes con ella.
+    """
+    size = len(actions.achievers)
+    full = (1 << size) - 1
+    reachable = [0] * size
+    for fact in bits(initial):
+        reachable[fact] = initial
+
+    changed = True
+    while changed:
+        changed = False
+        facts = 0
+        for fact in range(size):
+            if reachable[fact] >> fact & 1:
+                facts |= 1 << fact
+
+        for action in actions.actions:
+            precondition = action.precondition
+            together = facts
+            for fact in bits(precondition):
+                if reachable[fact] & precondition != precondition:
+                    break
+                together &= reachable[fact]
+            else:
+                add_list = action.add_list
+                others = together & ~action.remove_list & ~add_list
+                pairs = add_list | others
+                for fact in bits(add_list):
+                    if reachable[fact] | pairs != reachable[fact]:
+                        reachable[fact] |= pairs
+                        changed = True
+                for fact in bits(others):
+                    if reachable[fact] & add_list != add_list:
+                        reachable[fact] |= add_list
+                        changed = True
+
+    return [full & ~pairs for pairs in reachable]
+
+
+class SubsumptionIndex:
+
+    def __init__(self):
+        """
+        Clase con un índice de conjuntos de objetivos para detectar subsunciones.
+
+        Un conjunto de objetivos `g` subsume a otro `h` si `g ⊆ h`: cualquier estado que
+        cumple `h` cumple también `g`, por lo que si `g` ya se ha alcanzado con un coste
+        menor o igual, `h` está dominado y se puede podar.
+
+        Los conjuntos se agrupan por su bit más bajo. Un subconjunto de `h` tiene su bit más
+        bajo entre los bits de `h`, así que sólo se consultan los grupos de esos bits.
+        """
+        self._buckets: Dict[int, List[Tuple[int, float]]] = dict()
+        self._size: int = 0
+
+    def add(self, mask: int, cost: float = 0):
+        """
+        Añade un conjunto de objetivos al índice.
+
+        Args:
+            mask (int): Máscara del conjunto de objetivos.
+            cost (float, optional): Coste con el que se ha alcanzado. Default: 0.
+        """
+        self._buckets.setdefault(mask & -mask, list()).append((mask, cost))
+        self._size += 1
+
+    def subset(self, mask: int, cost: float = INFINITY) -> Union[int, None]:
+        """
+        Busca un conjunto del índice contenido en el indicado.
+
+        Args:
+            mask (int): Máscara del conjunto a consultar.
+            cost (float, optional): Coste máximo del conjunto buscado. Default: sin límite.
+
+        Returns:
+            Union[int, None]: Un conjunto `g ⊆ mask` con coste menor o igual, o None si no existe.
+        """
+        buckets = self._buckets
+        for entry, entry_cost in buckets.get(0, ()):
+            if entry_cost <= cost:
+                return entry
+
+        remaining = mask
+        while remaining:
+            low = remaining & -remaining
+            remaining ^= low
+            for entry, entry_cost in buckets.get(low, ()):
+                if entry & ~mask == 0 and entry_cost <= cost:
+                    return entry
+        return None
+
+    def subsumes(self, mask: int, cost: float = INFINITY) -> bool:
+        """
+        Comprueba si algún conjunto del índice subsume al indicado.
+
+        Args:
+            mask (int): Máscara del conjunto a consultar.
+            cost (float, optional): Coste con el que se ha alcanzado el conjunto. Default: sin límite.
+
+        Returns:
+            bool: True si hay un conjunto `g ⊆ mask` con coste menor o igual, o False en caso contrario.
+        """
+        return self.subset(mask, cost) is not None
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _SupersetIndex:
+
+    def __init__(self):
+        """
+        Clase privada con un índice de estados para buscar los que contienen un conjunto de objetivos.
+
+        Cada estado se guarda en la lista de cada una de sus propiedades, y la consulta
+        recorre sólo la lista más corta de entre las propiedades del conjunto.
+        """
+        self._by_fact: Dict[int, List[int]] = dict()
+        self._states: List[int] = list()
+
+    def add(self, state: int):
+        self._states.append(state)
+        for fact in bits(state):
+            self._by_fact.setdefault(fact, list()).append(state)
+
+    def superset(self, mask: int) -> Union[int, None]:
+        candidates = self._states
+        for fact in bits(mask):
+            states = self._by_fact.get(fact)
+            if states is None:
+                return None
+            if len(states) < len(candidates):
+                candidates = states
+        for state in candidates:
+            if state & mask == mask:
+                return state
+        return None
+
+
+class RegressionSearch:
+    # Estimadores del coste de un conjunto de objetivos a partir de los costes relajados de sus propiedades.
+    ESTIMATORS = {'add': AdditiveHeuristic, 'max': MaxHeuristic}
+
+    def __init__(self, initial_state: State, goal: State, heuristic: Heuristic,
+                 weight: float = 1.0, greedy: bool = False, estimator: str = 'add',
+                 bidirectional: bool = False, stats: PlannerStats = None, time_limit: float = None):
+        """
+        Clase que implementa un planificador por regresión (búsqueda hacia atrás desde el objetivo).
+
+        Los nodos son conjuntos de objetivos codificados como máscaras. Regresar un conjunto `g`
+        por una acción que añade alguna de sus propiedades y no elimina ninguna produce
+        `(g - añadir) ∪ precondición`, y la búsqueda termina al llegar a un conjunto contenido
+        en el estado inicial. Como los objetivos son pequeños y el estado inicial grande,
+        se expanden muchos menos nodos que hacia delante.
+
+        Los costes relajados de cada propiedad desde el estado inicial se calculan una única vez,
+        y el estimador de un conjunto es su suma ('add') o su máximo ('max', admisible). Los
+        conjuntos dominados por otro ya expandido con menor coste se podan con un `SubsumptionIndex`,
+        y se descartan los que contienen dos propiedades mutuamente excluyentes (`static_mutexes`).
+
+        Con `bidirectional=True` se alterna con una búsqueda en anchura hacia delante y se
+        termina cuando un estado hacia delante contiene un conjunto de objetivos hacia atrás.
+        En ese caso el plan es válido pero no necesariamente óptimo.
+
+        Args:
+            initial_state (State): Estado inicial del que parte el problema.
+            goal (State): Estado objetivo que debe alcanzar la planificación.
+            heuristic (Heuristic): Heurística que proporciona las acciones del problema y su codificación.
+            weight (float, optional): Peso del estimador en la función de evaluación. Default: 1.0.
+            greedy (bool, optional): Ordena sólo por el estimador. Default: False.
+            estimator (str, optional): Estimador de los conjuntos de objetivos ('add' o 'max'). Default: 'add'.
+            bidirectional (bool, optional): Combina la regresión con una búsqueda hacia delante. Default: False.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: el de la heurística.
+            time_limit (float, optional): Segundos máximos de búsqueda. Default: None (sin límite).
+        """
+        if estimator not in self.ESTIMATORS:
+            raise ValueError(f"Unknown regression estimator: {estimator}")
+
+        self.initial_state: State = initial_state
+        self.goal: State = goal
+        self.heuristic: Heuristic = heuristic
+        self.weight: float = weight
+        self.greedy: bool = greedy
+        self.bidirectional: bool = bidirectional
+        self.time_limit: Union[float, None] = time_limit
+        self.stats: PlannerStats = stats if stats is not None else heuristic.stats
+
+        self.encoding = heuristic.encoding
+        self.actions = heuristic.actions
+        self._initial: int = self.encoding.encode(initial_state)
+        self._goal: int = self.encoding.encode(goal)
+
+        self.mutexes: List[int] = static_mutexes(self.actions, self._initial)
+        relaxed = self.ESTIMATORS[estimator](self.actions, self._goal)
+        self._costs: List[float] = relaxed.costs(self._initial)
+        self._combine = relaxed._combine
+
+        self.status: Union[str, None] = None
+        self.cost: Union[int, None] = None
+        self.expanded: int = 0
+        self.generated: int = 0
+
+    def estimate(self, goals: int) -> float:
+        """
+        Estima el coste de alcanzar un conjunto de objetivos desde el estado inicial.
+
+        Args:
+            goals (int): Máscara del conjunto de objetivos.
+
+        Returns:
+            float: Coste estimado, o infinito si alguna propiedad es inalcanzable.
+        """
+        costs = self._costs
+        return self._combine([costs[fact] if fact < len(costs) else INFINITY for fact in bits(goals)])
+
+    def regress(self, goals: int) -> List[Tuple[CompiledAction, int]]:
+        """
+        Genera los conjuntos de objetivos previos a un conjunto de objetivos.
+
+        Se descartan los conjuntos con propiedades mutuamente excluyentes, que no
+        pueden cumplirse en ningún estado alcanzable.
+
+        Args:
+            goals (int): Máscara del conjunto de objetivos a regresar.
+
+        Returns:
+            List[Tuple[CompiledAction, int]]: Pares (acción, conjunto de objetivos previo a aplicarla).
+        """
+        mutexes = self.mutexes
+        result = list()
+        for action in self.actions.achieving(goals):
+            if goals & action.remove_list:
+                continue
+            previous = (goals & ~action.add_list) | action.precondition
+            if any(mutexes[fact] & previous for fact in bits(previous)):
+                continue
+            result.append((action, previous))
+        return result
+
+    def get_plan(self) -> Union[Actions, bool]:
+        """
+        Método que implementa la búsqueda del plan.
+
+        Tras la llamada, `status`, `cost`, `expanded` y `generated` describen la búsqueda
+        con los mismos valores que `BestFirstSearch`.
+
+        Returns:
+            Union[Actions, bool]: Devuelve el conjunto de acciones ordenadas que componen el plan
+            o False si se ha demostrado que el problema no tiene solución o se ha agotado el tiempo.
+        """
+        stats = self.stats
+        start_time = perf_counter()
+        deadline = None if self.time_limit is None else start_time + self.time_limit
+
+        self.status = None
+        self.cost = None
+        self.expanded = 0
+        self.generated = 1
+
+        initial, goal = self._initial, self._goal
+        h = self.estimate(goal)
+        if h == INFINITY:
+            return self._finish(BestFirstSearch.UNSOLVABLE, False, start_time)
+
+        backward: Parents = {goal: (0, None, None)}
+        closed = SubsumptionIndex()
+        reached = SubsumptionIndex()
+        reached.add(goal)
+        tie = count()
+        frontier = [(h if self.greedy else self.weight * h, h, next(tie), goal)]
+
+        forward: Parents = dict()
+        forward_frontier: List[int] = list()
+        forward_index = _SupersetIndex()
+        searcher = None
+        if self.bidirectional:
+            searcher = BestFirstSearch(self.initial_state, self.goal, self.heuristic)
+            forward[initial] = (0, None, None)
+            forward_frontier.append(initial)
+            forward_index.add(initial)
+
+        while frontier:
+            if deadline is not None and perf_counter() > deadline:
+                return self._finish(BestFirstSearch.TIMEOUT, False, start_time)
+
+            if searcher is not None and forward_frontier and len(forward_frontier) <= len(frontier):
+                meet = self._expand_forward(searcher, forward, forward_frontier, forward_index, reached)
+                if meet is not None:
+                    return self._meet(forward, backward, *meet, start_time)
+                continue
+
+            _, _, _, goals = heappop(frontier)
+            g = backward[goals][0]
+            if goals & ~initial == 0:
+                self.cost = g
+                return self._finish(BestFirstSearch.SOLVED, self._backward_plan(backward, goals), start_time)
+            if closed.subsumes(goals, g):
+                continue
+
+            closed.add(goals, g)
+            self.expanded += 1
+            if stats is not None:
+                stats.count('expanded')
+
+            for action, previous in self.regress(goals):
+                child_g = g + 1
+                known = backward.get(previous)
+                if known is not None and known[0] <= child_g:
+                    continue
+                if closed.subsumes(previous, child_g):
+                    if stats is not None:
+                        stats.count('subsumed')
+                    continue
+
+                h = self.estimate(previous)
+                if h == INFINITY:
+                    continue
+
+                backward[previous] = (child_g, goals, action)
+                self.generated += 1
+                if searcher is not None:
+                    reached.add(previous)
+                    state = forward_index.superset(previous)
+                    if state is not None:
+                        return self._meet(forward, backward, state, previous, start_time)
+                heappush(frontier, (h if self.greedy else child_g + self.weight * h, h, next(tie), previous))
+
+        return self._finish(BestFirstSearch.UNSOLVABLE, False, start_time)
+
+    def _expand_forward(self, searcher: BestFirstSearch, forward: Parents, frontier: List[int],
+                        index: _SupersetIndex, reached: SubsumptionIndex) -> Union[Tuple[int, int], None]:
+        """
+        Método privado que expande un nivel de la búsqueda en anchura hacia delante.
+
+        Args:
+            searcher (BestFirstSearch): Búsqueda hacia delante que genera los sucesores.
+            forward (Parents): Tabla de costes, estados padre y acciones hacia delante.
+            frontier (List[int]): Estados del nivel actual; se sustituyen por los del siguiente.
+            index (_SupersetIndex): Índice de los estados hacia delante.
+            reached (SubsumptionIndex): Conjuntos de objetivos generados hacia atrás.
+
+        Returns:
+            Union[Tuple[int, int], None]: El par (estado hacia delante, conjunto hacia atrás) en el que
+            se encuentran ambas búsquedas, o None si todavía no se han encontrado.
+        """
+        level = list(frontier)
+        frontier.clear()
+        for state in level:
+            g = forward[state][0]
+            self.expanded += 1
+            for action, child in searcher.successors(state):
+                if child in forward:
+                    continue
+                forward[child] = (g + 1, state, action)
+                self.generated += 1
+                goals = reached.subset(child)
+                if goals is not None:
+                    return child, goals
+                index.add(child)
+                frontier.append(child)
+        return None
+
+    def _meet(self, forward: Parents, backward: Parents, state: int, goals: int,
+              start_time: float) -> Actions:
+        """
+        Método privado que une los planes de ambas búsquedas.
+
+        Args:
+            forward (Parents): Tabla de la búsqueda hacia delante.
+            backward (Parents): Tabla de la búsqueda hacia atrás.
+            state (int): Estado hacia delante que contiene el conjunto de objetivos.
+            goals (int): Conjunto de objetivos hacia atrás.
+            start_time (float): Instante de inicio de la búsqueda.
+
+        Returns:
+            Actions: Las acciones del plan en orden de aplicación.
+        """
+        plan = BestFirstSearch._extract_plan(forward, state) + self._backward_plan(backward, goals)
+        self.cost = len(plan)
+        return self._finish(BestFirstSearch.SOLVED, plan, start_time)
+
+    @staticmethod
+    def _backward_plan(backward: Parents, goals: int) -> Actions:
+        """
+        Método privado que reconstruye el plan desde un conjunto de objetivos hasta el objetivo final.
+
+        Args:
+            backward (Parents): Tabla de la búsqueda hacia atrás.
+            goals (int): Conjunto de objetivos de partida.
+
+        Returns:
+            Actions: Las acciones del plan en orden de aplicación.
+        """
+        plan = list()
+        _, successor, action = backward[goals]
+        while successor is not None:
+            plan.append(action.action)
+            _, successor, action = backward[successor]
+        return plan
+
+    def _finish(self, status: str, plan: Union[Actions, bool], start_time: float) -> Union[Actions, bool]:
+        """
+        Método privado para registrar el final de la búsqueda.
+
+        Args:
+            status (str): Estado final de la búsqueda.
+            plan (Union[Actions, bool]): Plan encontrado o False.
+            start_time (float): Instante de inicio de la búsqueda.
+
+        Returns:
+            Union[Actions, bool]: El plan recibido.
+        """
+        self.status = status
+        if self.stats is not None:
+            self.stats.count('generated', self.generated)
+            self.stats.event('search_finished', status=status, expanded=self.expanded, cost=self.cost)
+            self.stats.timing('get_plan', perf_counter() - start_time)
+        return plan
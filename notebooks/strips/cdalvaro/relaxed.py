@@ -0,0 +1,321 @@
+from heapq import heappop, heappush
+from typing import Dict, List, Set, Type, Union
+
+from .encoding import bits
+from .grounding import ActionTable
+from .state import State
+
+INFINITY = float('inf')
+
+
+class RelaxedHeuristic:
+    # Fracción de propiedades modificadas a partir de la cual se recalcula desde cero.
+    recompute_ratio: float = 0.25
+
+    def __init__(self, actions: ActionTable, goal: Union[State, int]):
+        """
+        Clase base de las heurísticas calculadas sobre el problema relajado (sin listas de eliminar).
+
+        Calcula para cada propiedad el coste estimado de alcanzarla desde un estado mediante
+        una búsqueda de Dijkstra generalizada sobre la tabla de acciones. Las clases hijas
+        deciden cómo se combinan los costes de las precondiciones (`_combine`) y cómo se
+        obtiene el valor final a partir de la tabla de costes (`_evaluate`).
+
+        La tabla de costes del último estado evaluado se conserva, de modo que al evaluar
+        un estado parecido (por ejemplo, un sucesor o un hermano) sólo se recalculan las
+        propiedades afectadas por las propiedades añadidas y eliminadas.
+
+        Las instancias son invocables y pueden usarse como estimador de `BestFirstSearch`.
+
+        Args:
+            actions (ActionTable): Tabla de acciones instanciadas del problema.
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+        """
+        self.actions: ActionTable = actions
+        self.goal: int = goal if isinstance(goal, int) else actions.encoding.encode(goal)
+
+        self._size: int = len(actions.achievers)
+        self._mask: int = (1 << self._size) - 1
+        self._preconditions: List[List[int]] = [list(bits(action.precondition)) for action in actions.actions]
+        self._add_lists: List[List[int]] = [list(bits(action.add_list)) for action in actions.actions]
+        self._unconditional: List[int] = [i for i, pre in enumerate(self._preconditions) if not pre]
+
+        self._state: Union[int, None] = None
+        self._cost: List[float] = list()
+        self._supporter: List[int] = list()
+
+        self.evaluations: int = 0
+        self.incremental_evaluations: int = 0
+
+    def __call__(self, state: int) -> float:
+        """
+        Evalúa la heurística sobre un estado.
+
+        Args:
+            state (int): Máscara del estado a evaluar.
+
+        Returns:
+            float: El valor heurístico, o infinito si el objetivo es inalcanzable desde el estado.
+        """
+        self.update(state)
+        return self._evaluate(state)
+
+    def costs(self, state: int) -> List[float]:
+        """
+        Devuelve la tabla de costes relajados de cada propiedad desde el estado indicado.
+
+        Args:
+            state (int): Máscara del estado de partida.
+
+        Returns:
+            List[float]: Coste de cada propiedad, indexado por su identificador.
+        """
+        self.update(state)
+        return list(self._cost)
+
+    def update(self, state: int):
+        """
+        Actualiza la tabla de costes al estado indicado.
+
+        Si la diferencia con el último estado evaluado es pequeña la actualización es incremental.
+
+        Args:
+            state (int): Máscara del estado a evaluar.
+        """
+        state &= self._mask
+        if state == self._state:
+            return
+
+        self.evaluations += 1
+        if self._state is None:
+            self._recompute(state)
+            return
+
+        changed = bin(state ^ self._state).count('1')
+        if changed > self.recompute_ratio * self._size:
+            self._recompute(state)
+        else:
+            self.incremental_evaluations += 1
+            self._increment(state)
+
+    def _recompute(self, state: int):
+        """
+        Método privado para calcular la tabla de costes desde cero.
+
+        Args:
+            state (int): Máscara del estado de partida.
+        """
+        self._cost = [INFINITY] * self._size
+        self._supporter = [-1] * self._size
+        self._state = state
+
+        queue = list()
+        for prop in bits(state):
+            self._cost[prop] = 0
+            queue.append((0, prop))
+
+        for action in self._unconditional:
+            self._relax(action, queue)
+        self._propagate(queue)
+
+    def _increment(self, state: int):
+        """
+        Método privado para actualizar la tabla de costes a partir de la del último estado evaluado.
+
+        Se invalidan las propiedades eliminadas y aquellas cuyo mejor soporte depende de ellas,
+        se ponen a coste cero las propiedades añadidas y se propagan los cambios.
+
+        Args:
+            state (int): Máscara del nuevo estado.
+        """
+        cost = self._cost
+        supporter = self._supporter
+        deleted = self._state & ~state
+        added = state & ~self._state
+        self._state = state
+
+        queue = list()
+        for prop in bits(added):
+            cost[prop] = 0
+            supporter[prop] = -1
+            queue.append((0, prop))
+
+        # Propiedades cuyo coste debe recalcularse por depender de alguna propiedad eliminada.
+        invalid: Set[int] = set(bits(deleted))
+        pending = list(invalid)
+        for prop in pending:
+            cost[prop] = INFINITY
+            supporter[prop] = -1
+        while pending:
+            prop = pending.pop()
+            for action in self.actions.consumers[prop]:
+                for target in self._add_lists[action]:
+                    if supporter[target] == action and target not in invalid:
+                        invalid.add(target)
+                        cost[target] = INFINITY
+                        supporter[target] = -1
+                        pending.append(target)
+
+        for prop in invalid:
+            for action in self.actions.achievers[prop]:
+                self._relax(action, queue)
+        self._propagate(queue)
+
+    def _relax(self, action: int, queue: List):
+        """
+        Método privado para evaluar una acción y mejorar el coste de las propiedades que añade.
+
+        A igualdad de coste el soporte de una propiedad es la acción de menor índice, de modo que
+        la tabla de soportes (y con ella h_FF) depende sólo del estado y no del orden en que se
+        han evaluado los estados anteriores ni del orden de propagación.
+
+        Args:
+            action (int): Índice de la acción en la tabla de acciones.
+            queue (List): Cola de prioridad de propiedades pendientes de propagar.
+        """
+        action_cost = self._combine([self._cost[prop] for prop in self._preconditions[action]])
+        if action_cost == INFINITY:
+            return
+
+        action_cost += 1
+        cost = self._cost
+        supporter = self._supporter
+        for prop in self._add_lists[action]:
+            if action_cost < cost[prop]:
+                cost[prop] = action_cost
+                supporter[prop] = action
+                heappush(queue, (action_cost, prop))
+            elif action_cost == cost[prop] and action < supporter[prop]:
+                supporter[prop] = action
+
+    def _propagate(self, queue: List):
+        """
+        Método privado que propaga las mejoras de coste hasta alcanzar el punto fijo.
+
+        Args:
+            queue (List): Cola de prioridad de propiedades pendientes de propagar.
+        """
+        cost = self._cost
+        consumers = self.actions.consumers
+        while queue:
+            value, prop = heappop(queue)
+            if value > cost[prop]:
+                continue
+            for action in consumers[prop]:
+                self._relax(action, queue)
+
+    def _goal_costs(self, state: int) -> Union[List[float], None]:
+        """
+        Método privado con los costes de las propiedades objetivo que no se cumplen en el estado.
+
+        Args:
+            state (int): Máscara del estado evaluado.
+
+        Returns:
+            Union[List[float], None]: Los costes, o None si alguna propiedad objetivo es inalcanzable.
+        """
+        pending = self.goal & ~state
+        if pending & ~self._mask:
+            return None
+
+        costs = [self._cost[prop] for prop in bits(pending)]
+        if INFINITY in costs:
+            return None
+        return costs
+
+    @staticmethod
+    def _combine(costs: List[float]) -> float:
+        """
+        Método privado abstracto para combinar los costes de las precondiciones de una acción.
+
+        Cada clase hija de esta clase debe implementarlo.
+        """
+        raise NotImplementedError
+
+    def _evaluate(self, state: int) -> float:
+        """
+        Método privado abstracto para calcular el valor heurístico a partir de la tabla de costes.
+
+        Cada clase hija de esta clase debe implementarlo.
+        """
+        raise NotImplementedError
+
+
+class AdditiveHeuristic(RelaxedHeuristic):
+    """
+    Heurística h_add: el coste de un conjunto de propiedades es la suma de sus costes.
+
+    No es admisible, pero suele guiar mejor la búsqueda voraz que h_max.
+    """
+
+    @staticmethod
+    def _combine(costs: List[float]) -> float:
+        return sum(costs)
+
+    def _evaluate(self, state: int) -> float:
+        costs = self._goal_costs(state)
+        return INFINITY if costs is None else sum(costs)
+
+
+class MaxHeuristic(RelaxedHeuristic):
+    """
+    Heurística h_max: el coste de un conjunto de propiedades es el máximo de sus costes.
+
+    Es admisible, por lo que con A* garantiza planes óptimos.
+    """
+
+    @staticmethod
+    def _combine(costs: List[float]) -> float:
+        return max(costs, default=0)
+
+    def _evaluate(self, state: int) -> float:
+        costs = self._goal_costs(state)
+        return INFINITY if costs is None else max(costs, default=0)
+
+
+class FFHeuristic(AdditiveHeuristic):
+    """
+    Heurística h_FF: longitud de un plan relajado extraído a partir de los mejores soportes de h_add.
+    """
+
+    def _evaluate(self, state: int) -> float:
+        if self._goal_costs(state) is None:
+            return INFINITY
+        return len(self.relaxed_plan(state))
+
+    def relaxed_plan(self, state: int) -> List[int]:
+        """
+        Extrae el plan relajado que alcanza el objetivo desde el estado indicado.
+
+        Args:
+            state (int): Máscara del estado de partida.
+
+        Returns:
+            List[int]: Índices en la tabla de acciones de las acciones del plan relajado.
+        """
+        self.update(state)
+
+        plan = dict()
+        pending = list(bits(self.goal & ~state & self._mask))
+        reached = state
+        while pending:
+            prop = pending.pop()
+            if reached >> prop & 1:
+                continue
+            reached |= 1 << prop
+
+            action = self._supporter[prop]
+            if action < 0 or action in plan:
+                continue
+            plan[action] = None
+            pending.extend(pre for pre in self._preconditions[action] if not reached >> pre & 1)
+
+        return list(plan)
+
+
+# Heurísticas relajadas disponibles por nombre.
+RELAXED_HEURISTICS: Dict[str, Type[RelaxedHeuristic]] = {
+    'add': AdditiveHeuristic,
+    'max': MaxHeuristic,
+    'ff': FFHeuristic,
+}
@@ -0,0 +1,201 @@
+from typing import Dict, Iterator, List, Union
+
+from .actions import Actions, BaseAction
+from .encoding import CompiledAction
+from .heuristic import Heuristic
+from .search import BestFirstSearch
+from .state import State
+from .stats import PlannerStats
+from .strips import Strips
+
+
+def weakest_preconditions(plan: List[CompiledAction], goal: int) -> List[Union[int, None]]:
+    """
+    Calcula la precondición más débil de cada sufijo de un plan.
+
+    La precondición del sufijo que empieza en la acción `k` es el conjunto mínimo de propiedades
+    que debe cumplir un estado para que ejecutar `plan[k:]` desde él alcance el objetivo. Se obtiene
+    regresando el objetivo por las acciones del plan desde la última hasta la primera.
+
+    Args:
+        plan (List[CompiledAction]): Acciones compiladas del plan.
+        goal (int): Máscara del objetivo.
+
+    Returns:
+        List[Union[int, None]]: Máscara de la precondición de cada sufijo, de `plan[0:]` a `plan[n:]`
+        (el propio objetivo). Es None si alguna acción del sufijo elimina una propiedad que se necesita después.
+    """
+    conditions: List[Union[int, None]] = [goal]
+    condition = goal
+    for action in reversed(plan):
+        if condition is not None:
+            pending = condition & ~action.add_list
+            condition = None if pending & action.remove_list else pending | action.precondition
+        conditions.append(condition)
+    conditions.reverse()
+    return conditions
+
+
+class ReplanningPlanner:
+
+    def __init__(self, initial_state: State, goal: State, heuristic: Heuristic,
+                 weight: float = 1.0, greedy: bool = True, estimator: str = 'ff',
+                 streaming: bool = True, reconnect_depth: int = 2, stats: PlannerStats = None):
+        """
+        Clase que implementa una planificación incremental para ejecutar planes en un entorno cambiante.
+
+        `stream` devuelve las acciones una a una para que se ejecuten según se producen y,
+        entre acción y acción, `observe` permite comunicar el estado observado del mundo.
+        Si no coincide con el esperado, el resto del plan se repara:
+
+        1. Si el estado observado cumple la precondición de un sufijo del plan, se continúa con él.
+        2. Si no, se busca un camino corto (hasta `reconnect_depth` acciones) hasta la
+           precondición de algún sufijo y se le antepone.
+        3. Si tampoco existe, se vuelve a planificar desde el estado observado con la misma
+           búsqueda, que conserva la tabla de acciones, sus índices y el estimador relajado.
+
+        Con `streaming=True` el primer plan se produce con `Strips.iter_plan`, de modo que la primera
+        acción se devuelve sin esperar al plan completo. Si la planificación por pila de objetivos
+        no es eficiente o no alcanza el objetivo, se continúa con la búsqueda desde el último estado.
+
+        Args:
+            initial_state (State): Estado inicial del que parte el problema.
+            goal (State): Estado objetivo que debe alcanzar la planificación.
+            heuristic (Heuristic): Heurística que proporciona las acciones del problema y su codificación.
+            weight (float, optional): Peso del estimador de la búsqueda. Default: 1.0.
+            greedy (bool, optional): Activa la búsqueda voraz. Default: True.
+            estimator (str, optional): Heurística relajada de la búsqueda ('add', 'max' o 'ff'). Default: 'ff'.
+            streaming (bool, optional): Produce el primer plan acción a acción con `Strips`. Default: True.
+            reconnect_depth (int, optional): Acciones máximas para reconectar con un sufijo del plan. Default: 2.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: el de la heurística.
+        """
+        self.initial_state: State = initial_state
+        self.goal: State = goal
+        self.heuristic: Heuristic = heuristic
+        self.streaming: bool = streaming
+        self.reconnect_depth: int = reconnect_depth
+        self.stats: PlannerStats = stats if stats is not None else heuristic.stats
+
+        self.encoding = heuristic.encoding
+        self._goal: int = self.encoding.encode(goal)
+        self._search = BestFirstSearch(initial_state, goal, heuristic, weight=weight, greedy=greedy,
+                                       estimator=estimator, stats=self.stats)
+
+        self.state: int = self.encoding.encode(initial_state)
+        self.plan: List[CompiledAction] = list()
+        self.executed: Actions = list()
+        self.status: Union[str, None] = None
+        self.repairs: Dict[str, int] = {'suffix': 0, 'reconnect': 0, 'replan': 0}
+        self._observed: Union[int, None] = None
+
+    def observe(self, state: State):
+        """
+        Comunica el estado observado del mundo tras ejecutar la última acción.
+
+        Args:
+            state (State): Estado observado.
+        """
+        self._observed = self.encoding.encode(state)
+
+    def stream(self) -> Iterator[BaseAction]:
+        """
+        Generador con las acciones a ejecutar, reparando el plan tras cada observación.
+
+        Al terminar, `status` indica si se ha alcanzado el objetivo ('solved') o si no es
+        alcanzable desde el último estado ('unsolvable').
+
+        Returns:
+            Iterator[BaseAction]: Las acciones en orden de ejecución.
+        """
+        if self.streaming:
+            planner = Strips(self.encoding.state(self.state), self.goal, self.heuristic, self.stats)
+            for action in planner.iter_plan(shuffle=False):
+                if self._deviated():
+                    break
+                self._observed = None
+                yield from self._execute(self.encoding.compile(action))
+
+        while True:
+            if self._deviated():
+                self.state = self._observed
+                self._repair()
+            self._observed = None
+
+            if self.state & self._goal == self._goal:
+                self.status = BestFirstSearch.SOLVED
+                return
+
+            if not self.plan or not self.plan[0].can_apply(self.state):
+                self._replan()
+                if not self.plan:
+                    self.status = self._search.status
+                    return
+
+            yield from self._execute(self.plan.pop(0))
+
+    def _execute(self, action: CompiledAction) -> Iterator[BaseAction]:
+        """
+        Método privado que devuelve una acción y actualiza el estado esperado.
+
+        Args:
+            action (CompiledAction): Acción a ejecutar.
+
+        Returns:
+            Iterator[BaseAction]: La acción a ejecutar.
+        """
+        self.state = action.apply(self.state)
+        self.executed.append(action.action)
+        yield action.action
+
+    def _deviated(self) -> bool:
+        """ Método privado que indica si el estado observado difiere del esperado. """
+        return self._observed is not None and self._observed != self.state
+
+    def _repair(self):
+        """
+        Método privado que repara el resto del plan desde el estado actual.
+        """
+        conditions = weakest_preconditions(self.plan, self._goal)
+
+        # Sufijo más corto cuya precondición se cumple en el estado observado.
+        for k in range(len(self.plan), -1, -1):
+            condition = conditions[k]
+            if condition is not None and self.state & condition == condition:
+                self.plan = self.plan[k:]
+                self._count('suffix')
+                return
+
+        # Camino corto desde el estado observado hasta la precondición de algún sufijo.
+        frontier = {self.state: list()}
+        for _ in range(self.reconnect_depth):
+            following = dict()
+            for state, path in frontier.items():
+                for action, child in self._search.successors(state):
+                    if child in following:
+                        continue
+                    for k in range(len(self.plan), -1, -1):
+                        condition = conditions[k]
+                        if condition is not None and child & condition == condition:
+                            self.plan = path + [action] + self.plan[k:]
+                            self._count('reconnect')
+                            return
+                    following[child] = path + [action]
+            frontier = following
+
+        self.plan = list()
+
+    def _replan(self):
+        """
+        Método privado que vuelve a planificar desde el estado actual con la búsqueda reutilizada.
+        """
+        self._search.initial_state = self.encoding.state(self.state)
+        plan = self._search.get_plan()
+        self.plan = [self.encoding.compile(action) for action in plan] if plan is not False else list()
+        if self.executed:
+            self._count('replan')
+
+    def _count(self, repair: str):
+        """ Método privado para registrar una reparación. """
+        self.repairs[repair] += 1
+        if self.stats is not None:
+            self.stats.count(f'{repair}_repairs')
@@ -0,0 +1,318 @@
+from heapq import heappop, heappush
+from itertools import count
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple, Union
+
+from .actions import Actions
+from .encoding import CompiledAction
+from .heuristic import Heuristic
+from .relaxed import RELAXED_HEURISTICS
+from .state import State
+from .stats import PlannerStats
+from .symmetry import Permutation, Symmetries
+
+# Función de estimación del coste restante desde un estado codificado como máscara de bits.
+Estimator = Callable[[int], float]
+
+
+class BestFirstSearch:
+    # Estados posibles de la búsqueda tras llamar a `get_plan`.
+    SOLVED: str = 'solved'
+    UNSOLVABLE: str = 'unsolvable'
+    TIMEOUT: str = 'timeout'
+    NODE_LIMIT: str = 'node_limit'
+    CANCELLED: str = 'cancelled'
+
+    def __init__(self, initial_state: State, goal: State, heuristic: Heuristic,
+                 weight: float = 1.0, greedy: bool = False, estimator: Union[Estimator, str] = None,
+                 stats: PlannerStats = None, time_limit: float = None, node_limit: int = None,
+                 bound: float = None, symmetries: Symmetries = None, should_stop: Callable[[], bool] = None):
+        """
+        Clase que implementa un planificador completo por búsqueda hacia delante (A*/GBFS).
+
+        A diferencia de `Strips`, explora el espacio de estados con una cola de prioridad y
+        una lista de cerrados sobre los estados codificados como máscaras de bits, por lo que
+        siempre termina: o devuelve un plan o determina que el problema no tiene solución.
+
+        - Con `weight=1` y un estimador admisible el plan devuelto es óptimo (A*).
+        - Con `weight=w > 1` el coste del plan está acotado por `w` veces el óptimo (A* ponderado).
+        - Con `greedy=True` se ordena sólo por el estimador (búsqueda voraz primero el mejor).
+
+        Todas las acciones tienen coste unitario, por lo que el coste de un plan es su longitud.
+
+        Args:
+            initial_state (State): Estado inicial del que parte el problema.
+            goal (State): Estado objetivo que debe alcanzar la planificación.
+            heuristic (Heuristic): Heurística que proporciona las acciones del problema y su codificación.
+            weight (float, optional): Peso del estimador en la función de evaluación. Default: 1.0.
+            greedy (bool, optional): Activa la búsqueda voraz primero el mejor. Default: False.
+            estimator (Union[Estimator, str], optional): Estimador del coste restante o nombre de una
+                heurística relajada ('add', 'max' o 'ff'). Default: número de objetivos pendientes.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: el de la heurística.
+            time_limit (float, optional): Segundos máximos de búsqueda. Al agotarse, `get_plan`
+                devuelve False con el estado `TIMEOUT`. Default: None (sin límite).
+            node_limit (int, optional): Nodos máximos a expandir. Al agotarse, `get_plan` devuelve
+                False con el estado `NODE_LIMIT`. Default: None (sin límite).
+            bound (float, optional): Cota superior estricta del coste del plan: se podan los nodos con
+                `g + h >= bound`. Con un estimador admisible, el estado `UNSOLVABLE` indica entonces
+                que no existe un plan más barato que la cota. Default: None (sin cota).
+            symmetries (Symmetries, optional): Simetrías del problema. Si se indican, la búsqueda trabaja sobre
+                las formas canónicas de los estados, de modo que los estados simétricos se exploran una única
+                vez, y el plan se traduce al final al problema original. Default: None.
+            should_stop (Callable[[], bool], optional): Función que se consulta antes de expandir cada nodo.
+                Si devuelve True, `get_plan` devuelve False con el estado `CANCELLED`. Permite cancelar
+                la búsqueda desde otro hilo. Default: None.
+        """
+        self.initial_state: State = initial_state
+        self.goal: State = goal
+        self.heuristic: Heuristic = heuristic
+        self.weight: float = weight
+        self.greedy: bool = greedy
+        self.time_limit: Union[float, None] = time_limit
+        self.node_limit: Union[int, None] = node_limit
+        self.bound: Union[float, None] = bound
+        self.symmetries: Union[Symmetries, None] = symmetries
+        self.should_stop: Union[Callable[[], bool], None] = should_stop
+        self.stats: PlannerStats = stats if stats is not None else heuristic.stats
+
+        self.encoding = heuristic.encoding
+        self._goal: int = self.encoding.encode(goal)
+        if estimator is None:
+            estimator = self.goal_count
+        elif isinstance(estimator, str):
+            estimator = RELAXED_HEURISTICS[estimator](heuristic.actions, self._goal)
+        self.estimator: Estimator = estimator
+
+        # Las acciones se agrupan por su primera precondición para generar
+        # los sucesores comprobando sólo las acciones que pueden ser aplicables.
+        self._unconditional: List[CompiledAction] = list()
+        self._by_anchor: Dict[int, List[CompiledAction]] = dict()
+        for action in heuristic.actions.actions:
+            if action.precondition == 0:
+                self._unconditional.append(action)
+            else:
+                anchor = action.precondition & -action.precondition
+                self._by_anchor.setdefault(anchor, list()).append(action)
+
+        self.status: Union[str, None] = None
+        self.cost: Union[int, None] = None
+        self.expanded: int = 0
+        self.generated: int = 0
+
+    def goal_count(self, state: int) -> int:
+        """
+        Estimador por defecto: número de propiedades objetivo que no se cumplen en el estado.
+
+        Es admisible cuando cada acción añade como mucho una de las propiedades objetivo.
+
+        Args:
+            state (int): Máscara del estado a evaluar.
+
+        Returns:
+            int: Número de propiedades objetivo pendientes.
+        """
+        return bin(self._goal & ~state).count('1')
+
+    def successors(self, state: int) -> List[Tuple[CompiledAction, int]]:
+        """
+        Genera los estados sucesores de un estado.
+
+        Args:
+            state (int): Máscara del estado a expandir.
+
+        Returns:
+            List[Tuple[CompiledAction, int]]: Pares (acción aplicada, máscara del estado resultante).
+        """
+        result = [(action, (state | action.add_list) & ~action.remove_list) for action in self._unconditional]
+        for anchor, actions in self._by_anchor.items():
+            if state & anchor:
+                for action in actions:
+                    if state & action.precondition == action.precondition:
+                        result.append((action, (state | action.add_list) & ~action.remove_list))
+        return result
+
+    def get_plan(self) -> Union[Actions, bool]:
+        """
+        Método que implementa la búsqueda del plan.
+
+        Tras la llamada, `status` indica si el problema se ha resuelto, no tiene solución o se ha
+        agotado el tiempo o los nodos límite, y `expanded`/`generated` el número de nodos expandidos y generados.
+
+        Returns:
+            Union[Actions, bool]: Devuelve el conjunto de acciones ordenadas que componen el plan
+            o False si se ha demostrado que el problema no tiene solución o se ha agotado algún límite.
+        """
+        goal = self._goal
+        estimator = self.estimator
+        weight = self.weight
+        greedy = self.greedy
+        bound = self.bound if self.bound is not None else float('inf')
+        node_limit = self.node_limit
+        should_stop = self.should_stop
+        stats = self.stats
+        start_time = None
+        deadline = None if self.time_limit is None else perf_counter() + self.time_limit
+        if stats is not None:
+            start_time = perf_counter()
+            estimator = self._timed(estimator, stats)
+
+        self.expanded = 0
+        self.generated = 1
+        self.status = None
+        self.cost = None
+
+        start = self.encoding.encode(self.initial_state)
+        symmetries = self.symmetries
+        if symmetries is not None:
+            # Permutaciones con las que se ha canonizado cada estado, para traducir el plan.
+            start, start_permutation = symmetries.canonicalize(start)
+            permutations: Dict[int, Permutation] = dict()
+        h = estimator(start)
+        if h == float('inf') or h >= bound:
+            return self._finish(self.UNSOLVABLE, False, start_time)
+
+        # Para cada estado: coste acumulado, estado padre y acción que lo genera.
+        parents: Dict[int, Tuple[int, Union[int, None], Union[CompiledAction, None]]] = {start: (0, None, None)}
+        closed = set()
+        tie = count()
+        frontier = [(h if greedy else weight * h, h, next(tie), start)]
+
+        while frontier:
+            _, _, _, state = heappop(frontier)
+            if state in closed:
+                continue
+
+            g = parents[state][0]
+            if state & goal == goal:
+                self.cost = g
+                if symmetries is not None:
+                    plan = self._restore_plan(parents, permutations, state, start_permutation)
+                else:
+                    plan = self._extract_plan(parents, state)
+                return self._finish(self.SOLVED, plan, start_time)
+
+            if deadline is not None and perf_counter() > deadline:
+                return self._finish(self.TIMEOUT, False, start_time)
+            if node_limit is not None and self.expanded >= node_limit:
+                return self._finish(self.NODE_LIMIT, False, start_time)
+            if should_stop is not None and should_stop():
+                return self._finish(self.CANCELLED, False, start_time)
+
+            closed.add(state)
+            self.expanded += 1
+
+            if stats is None:
+                successors = self.successors(state)
+            else:
+                phase_start = perf_counter()
+                successors = self.successors(state)
+                stats.timing('successors', perf_counter() - phase_start)
+                stats.count('expanded')
+                stats.count('successors', len(successors))
+
+            for action, child in successors:
+                if symmetries is not None:
+                    child, permutation = symmetries.canonicalize(child)
+                if child in closed:
+                    continue
+                child_g = g + 1
+                known = parents.get(child)
+                if known is not None and known[0] <= child_g:
+                    continue
+
+                h = estimator(child)
+                if h == float('inf') or child_g + h >= bound:
+                    continue
+
+                parents[child] = (child_g, state, action)
+                if symmetries is not None:
+                    permutations[child] = permutation
+                self.generated += 1
+                heappush(frontier, (h if greedy else child_g + weight * h, h, next(tie), child))
+
+        return self._finish(self.UNSOLVABLE, False, start_time)
+
+    def _finish(self, status: str, plan: Union[Actions, bool],
+                start_time: Union[float, None]) -> Union[Actions, bool]:
+        """
+        Método privado para registrar el final de la búsqueda.
+
+        Args:
+            status (str): Estado final de la búsqueda.
+            plan (Union[Actions, bool]): Plan encontrado o False.
+            start_time (Union[float, None]): Instante de inicio si se recogen estadísticas.
+
+        Returns:
+            Union[Actions, bool]: El plan recibido.
+        """
+        self.status = status
+        if start_time is not None:
+            self.stats.count('generated', self.generated)
+            self.stats.event('search_finished', status=status, expanded=self.expanded, cost=self.cost)
+            self.stats.timing('get_plan', perf_counter() - start_time)
+        return plan
+
+    @staticmethod
+    def _timed(estimator: Estimator, stats: PlannerStats) -> Estimator:
+        """
+        Método privado que envuelve el estimador para medir sus evaluaciones.
+
+        Args:
+            estimator (Estimator): Estimador a medir.
+            stats (PlannerStats): Recolector de estadísticas.
+
+        Returns:
+            Estimator: Estimador que registra el número de evaluaciones y su tiempo.
+        """
+        def timed(state: int) -> float:
+            start = perf_counter()
+            value = estimator(state)
+            stats.timing('estimator', perf_counter() - start)
+            stats.count('evaluations')
+            return value
+
+        return timed
+
+    @staticmethod
+    def _extract_plan(parents: Dict[int, Tuple[int, Union[int, None], Union[CompiledAction, None]]],
+                      state: int) -> Actions:
+        """
+        Método privado para reconstruir el plan siguiendo los estados padre.
+
+        Args:
+            parents (Dict): Tabla de costes, estados padre y acciones de la búsqueda.
+            state (int): Máscara del estado final alcanzado.
+
+        Returns:
+            Actions: Las acciones del plan en orden de aplicación.
+        """
+        plan = list()
+        _, parent, action = parents[state]
+        while parent is not None:
+            plan.append(action.action)
+            _, parent, action = parents[parent]
+        plan.reverse()
+        return plan
+
+    def _restore_plan(self, parents: Dict[int, Tuple[int, Union[int, None], Union[CompiledAction, None]]],
+                      permutations: Dict[int, Permutation], state: int, start_permutation: Permutation) -> Actions:
+        """
+        Método privado para reconstruir el plan de una búsqueda sobre estados canónicos.
+
+        Args:
+            parents (Dict): Tabla de costes, estados padre y acciones de la búsqueda.
+            permutations (Dict[int, Permutation]): Permutación con la que se ha canonizado cada estado.
+            state (int): Máscara del estado final alcanzado.
+            start_permutation (Permutation): Permutación con la que se ha canonizado el estado inicial.
+
+        Returns:
+            Actions: Las acciones del plan en el problema original, en orden de aplicación.
+        """
+        steps = list()
+        _, parent, action = parents[state]
+        while parent is not None:
+            steps.append((action, permutations[state]))
+            state = parent
+            _, parent, action = parents[state]
+        steps.reverse()
+        return self.symmetries.restore_plan(start_permutation, steps)
@@ -0,0 +1,796 @@
+"""
+Servicio local de planificación.
+
+Un servidor asyncio atiende peticiones en un protocolo de líneas JSON sobre un socket Unix
+o TCP y las reparte entre un conjunto de hilos de trabajo. Cada petición tiene un plazo: si
+vence mientras espera en la cola se responde sin planificar, y si vence durante la búsqueda
+ésta se detiene de forma cooperativa. Las peticiones también pueden cancelarse.
+
+Peticiones (una por línea, todas con un `id` que se repite en la respuesta):
+    {"id": 1, "op": "plan", "initial_state": [...], "goal": [...], "planner": "gbfs",
+     "positions": [1, 2, 3], "deadline": 5.0}
+    {"id": 2, "op": "cancel", "target": 1}
+    {"id": 3, "op": "metrics"}
+    {"id": 4, "op": "ping"}
+
+El `id` de una petición de planificación no puede repetir el de otra de la misma conexión que
+siga en curso: la repetida se responde con un error sin encolarse.
+
+Las propiedades se codifican como {"type": "AtPosition", "args": [{"element": "Monkey"}, 1]}.
+
+Uso:
+    python -m cdalvaro.service serve --unix /tmp/planner.sock --workers 4
+    python -m cdalvaro.service load --unix /tmp/planner.sock --requests 200 --concurrency 16
+    python -m cdalvaro.service load --requests 200 --concurrency 16  # con un servidor local temporal
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import os
+import tempfile
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from threading import Event
+from typing import Callable, Deque, Dict, Iterable, List, Tuple, Union
+
+from .actions import BaseAction, ChangeLevel, GetBanana, MoveHorizontally, PushBox
+from .cache import LRUCache
+from .config import PlannerConfig
+from .element import Banana, Box, Element, Monkey
+from .generator import Problem, generate_suite
+from .heuristic import Heuristic
+from .properties import AtLevel, AtPosition, BaseProperty, GroundLevel, Has, Level, TopLevel
+from .search import BestFirstSearch
+from .state import State
+from .stats import PlannerStats
+from .strips import Strips
+
+# Tipos que se pueden recibir en una petición, por su nombre.
+PROPERTIES = {cls.__name__: cls for cls in (AtPosition, AtLevel, Has)}
+ACTIONS = {cls.__name__: cls for cls in (MoveHorizontally, PushBox, ChangeLevel, GetBanana)}
+ELEMENTS = {cls.__name__: cls for cls in (Monkey, Box, Banana)}
+LEVELS = {cls.__name__: cls for cls in (TopLevel, GroundLevel)}
+
+# Planificadores del servicio: reciben el estado inicial, el objetivo, la heurística y la función de parada.
+PLANNERS: Dict[str, Callable[[State, State, Heuristic, Callable[[], bool]], object]] = {
+    'gbfs': lambda initial, goal, heuristic, stop: BestFirstSearch(initial, goal, heuristic, greedy=True,
+                                                                   estimator='ff', should_stop=stop),
+    'wastar': lambda initial, goal, heuristic, stop: BestFirstSearch(initial, goal, heuristic, weight=3.0,
+                                                                     estimator='add', should_stop=stop),
+    'astar': lambda initial, goal, heuristic, stop: BestFirstSearch(initial, goal, heuristic, estimator='max',
+                                                                    should_stop=stop),
+    'strips': lambda initial, goal, heuristic, stop: Strips(initial, goal, heuristic, backtracking=True,
+                                                            config=PlannerConfig(seed=0), should_stop=stop),
+}
+
+# Estados de las respuestas, además de los de los planificadores.
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+REJECTED = 'rejected'
+ERROR = 'error'
+
+
+def _encode_value(value):
+    """ Función privada que codifica un argumento de una propiedad o acción. """
+    if isinstance(value, Element):
+        data = {'element': type(value).__name__}
+        if getattr(value, 'index', None) is not None:
+            data['index'] = value.index
+        return data
+    if isinstance(value, Level):
+        return {'level': type(value).__name__}
+    return value
+
+
+def _decode_value(data):
+    """ Función privada que decodifica un argumento de una propiedad o acción. """
+    if isinstance(data, dict):
+        if 'element' in data:
+            if data['element'] not in ELEMENTS:
+                raise ValueError(f"Unknown element: {data['element']}")
+            if data.get('index') is not None and not _is_int(data['index']):
+                raise ValueError(f"Element index must be an integer: {data['index']!r}")
+            return ELEMENTS[data['element']](*([data['index']] if data.get('index') is not None else []))
+        if 'level' in data:
+            if data['level'] not in LEVELS:
+                raise ValueError(f"Unknown level: {data['level']}")
+            return LEVELS[data['level']]()
+        raise ValueError(f"Unknown argument: {data}")
+    return data
+
+
+def _is_int(value) -> bool:
+    """ Función privada que comprueba si un valor es un entero (los booleanos no lo son). """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_arguments(cls: type, args: List, kwargs: Dict):
+    """
+    Función privada que comprueba los argumentos decodificados de una propiedad o acción.
+
+    Cada argumento se compara con la anotación de su parámetro en el constructor: un elemento,
+    un nivel o un entero (una posición). Así se rechaza la petición antes de construir nada.
+
+    Args:
+        cls (type): Clase de la propiedad o acción.
+        args (List): Argumentos posicionales.
+        kwargs (Dict): Argumentos por nombre.
+    """
+    signature = inspect.signature(cls.__init__)
+    try:
+        bound = signature.bind(None, *args, **kwargs)
+    except TypeError as error:
+        raise ValueError(f"Invalid arguments for {cls.__name__}: {error}") from None
+    for name, value in list(bound.arguments.items())[1:]:
+        parameter = signature.parameters[name]
+        expected = parameter.annotation
+        if value is None and parameter.default is None:
+            continue
+        if expected is int:
+            valid = _is_int(value)
+        elif isinstance(expected, type) and issubclass(expected, (Element, Level)):
+            valid = isinstance(value, expected)
+        else:
+            continue
+        if not valid:
+            raise ValueError(f"Argument '{name}' of {cls.__name__} must be {expected.__name__}, got {value!r}")
+
+
+def encode(instance: Union[BaseProperty, BaseAction]) -> Dict:
+    """
+    Codifica una propiedad o una acción como un diccionario serializable en JSON.
+
+    Args:
+        instance (Union[BaseProperty, BaseAction]): Propiedad o acción a codificar.
+
+    Returns:
+        Dict: Su tipo y sus argumentos de construcción.
+    """
+    args, kwargs = instance._arguments
+    data = {'type': type(instance).__name__, 'args': [_encode_value(arg) for arg in args]}
+    if kwargs:
+        data['kwargs'] = {key: _encode_value(value) for key, value in kwargs.items()}
+    return data
+
+
+def decode(data: Dict, types: Dict[str, type] = None) -> Union[BaseProperty, BaseAction]:
+    """
+    Decodifica una propiedad o una acción codificada con `encode`.
+
+    Args:
+        data (Dict): Propiedad o acción codificada.
+        types (Dict[str, type], optional): Tipos admitidos por su nombre. Default: `PROPERTIES`.
+
+    Returns:
+        Union[BaseProperty, BaseAction]: La instancia correspondiente, o ValueError si el tipo es
+            desconocido o algún argumento no es del tipo que espera.
+    """
+    types = PROPERTIES if types is None else types
+    if not isinstance(data, dict) or data.get('type') not in types:
+        raise ValueError(f"Unknown type: {data}")
+    args = data.get('args', [])
+    kwargs = data.get('kwargs', {})
+    if not isinstance(args, list) or not isinstance(kwargs, dict):
+        raise ValueError(f"Invalid arguments: {data}")
+    args = [_decode_value(arg) for arg in args]
+    kwargs = {key: _decode_value(value) for key, value in kwargs.items()}
+    _check_arguments(types[data['type']], args, kwargs)
+    return types[data['type']](*args, **kwargs)
+
+
+def encode_state(state: State) -> List[Dict]:
+    """
+    Codifica un estado como una lista de propiedades serializable en JSON.
+
+    Las propiedades se ordenan por su descripción para que la codificación sea estable.
+
+    Args:
+        state (State): Estado a codificar.
+
+    Returns:
+        List[Dict]: Las propiedades codificadas.
+    """
+    return [encode(prop) for prop in sorted(state.properties, key=lambda prop: prop.description)]
+
+
+def decode_state(data: List[Dict]) -> State:
+    """
+    Decodifica un estado codificado con `encode_state`.
+
+    Args:
+        data (List[Dict]): Las propiedades codificadas.
+
+    Returns:
+        State: El estado con esas propiedades.
+    """
+    if not isinstance(data, list):
+        raise ValueError("A state must be a list of properties")
+    return State({decode(item) for item in data})
+
+
+def percentiles(values: Iterable[float], quantiles: Iterable[float] = (0.5, 0.9, 0.99)) -> Dict[str, float]:
+    """
+    Calcula percentiles por el método del rango más cercano.
+
+    Args:
+        values (Iterable[float]): Valores observados.
+        quantiles (Iterable[float], optional): Cuantiles a calcular. Default: (0.5, 0.9, 0.99).
+
+    Returns:
+        Dict[str, float]: Cada percentil ('p50', 'p90'...) y el máximo, o vacío si no hay valores.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return dict()
+    result = {f"p{round(q * 100):g}": ordered[min(len(ordered), max(1, math.ceil(len(ordered) * q))) - 1]
+              for q in quantiles}
+    result['max'] = ordered[-1]
+    return result
+
+
+class _Job:
+    __slots__ = ('id', 'initial_state', 'goal', 'planner', 'positions', 'received', 'deadline',
+                 'cancelled', 'future', 'started')
+
+    def __init__(self, request_id, initial_state: State, goal: State, planner: str, positions: List[int],
+                 deadline: float, future: asyncio.Future):
+        """
+        Clase privada con una petición de planificación en curso.
+
+        Args:
+            request_id: Identificador de la petición.
+            initial_state (State): Estado inicial del problema.
+            goal (State): Estado objetivo del problema.
+            planner (str): Nombre del planificador en `PLANNERS`.
+            positions (List[int]): Posiciones del escenario.
+            deadline (float): Instante (`time.monotonic`) en el que vence el plazo.
+            future (asyncio.Future): Futuro en el que se publica la respuesta.
+        """
+        self.id = request_id
+        self.initial_state: State = initial_state
+        self.goal: State = goal
+        self.planner: str = planner
+        self.positions: List[int] = positions
+        self.received: float = time.monotonic()
+        self.deadline: float = deadline
+        self.cancelled: Event = Event()
+        self.future: asyncio.Future = future
+        self.started: Union[float, None] = None
+
+    def should_stop(self) -> bool:
+        """ Indica si la petición se ha cancelado o ha vencido su plazo. """
+        return self.cancelled.is_set() or time.monotonic() > self.deadline
+
+
+class PlanningService:
+
+    def __init__(self, workers: int = None, max_queue: int = 1024, deadline: float = 30.0,
+                 history: int = 10000, stats: PlannerStats = None):
+        """
+        Clase con el servidor local de planificación.
+
+        Las peticiones se encolan en una cola acotada y `workers` tareas las despachan a un
+        conjunto de hilos. Cuando la cola está llena, las peticiones nuevas se rechazan.
+        Cada búsqueda consulta su función `should_stop`, que vence con el plazo de la petición,
+        con su cancelación o cuando el cliente se desconecta.
+
+        Args:
+            workers (int, optional): Hilos de planificación. Default: número de CPUs.
+            max_queue (int, optional): Peticiones máximas en espera. Default: 1024.
+            deadline (float, optional): Plazo en segundos de las peticiones que no lo indican. Default: 30.0.
+            history (int, optional): Latencias recientes con las que se calculan los percentiles. Default: 10000.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+        """
+        self.workers: int = workers or os.cpu_count() or 1
+        self.max_queue: int = max_queue
+        self.deadline: float = deadline
+        self.stats: PlannerStats = stats
+
+        self.requests: int = 0
+        self.running: int = 0
+        self.statuses: Counter = Counter()
+        self.latencies: Deque[float] = deque(maxlen=history)
+        self.queue_times: Deque[float] = deque(maxlen=history)
+        self.heuristics: LRUCache = LRUCache(64)
+
+        self._executor: Union[ThreadPoolExecutor, None] = None
+        self._queue: Union[asyncio.Queue, None] = None
+        self._tasks: List[asyncio.Task] = list()
+        self._pending: Dict[Tuple[int, object], _Job] = dict()
+        self._server: Union[asyncio.AbstractServer, None] = None
+
+    async def start(self, path: str = None, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        """
+        Arranca el servidor en un socket Unix o TCP.
+
+        Args:
+            path (str, optional): Ruta del socket Unix. Default: None (se usa TCP).
+            host (str, optional): Dirección TCP. Default: '127.0.0.1'.
+            port (int, optional): Puerto TCP. Con 0 se elige uno libre (ver `address`). Default: 0.
+
+        Returns:
+            asyncio.AbstractServer: El servidor arrancado.
+        """
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='planner')
+        self._queue = asyncio.Queue(self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path, limit=2 ** 22)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=2 ** 22)
+        return self._server
+
+    @property
+    def address(self) -> Union[str, Tuple[str, int]]:
+        """ Ruta del socket Unix o dirección y puerto TCP en los que escucha el servidor. """
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        """ Detiene el servidor, cancela las peticiones pendientes y libera los hilos. """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for job in self._pending.values():
+            job.cancelled.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def metrics(self) -> Dict:
+        """
+        Devuelve las métricas del servicio.
+
+        Returns:
+            Dict: Peticiones en cola y en ejecución, peticiones por estado y percentiles
+            (en segundos) de la latencia total y del tiempo de espera en cola.
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'running': self.running,
+            'workers': self.workers,
+            'requests': self.requests,
+            'statuses': dict(self.statuses),
+            'latency': percentiles(self.latencies),
+            'queue_time': percentiles(self.queue_times),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Método privado que atiende una conexión.
+
+        Las respuestas de las peticiones de planificación se escriben cuando terminan, por lo que
+        pueden llegar en un orden distinto al de las peticiones. Al cerrarse la conexión se
+        cancelan sus peticiones pendientes.
+        """
+        connection = id(writer)
+        lock = asyncio.Lock()
+        responses = set()
+
+        async def send(message: Dict):
+            async with lock:
+                writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be a JSON object")
+                except ValueError as error:
+                    await send({'id': None, 'status': ERROR, 'error': str(error)})
+                    continue
+
+                request_id = request.get('id')
+                op = request.get('op', 'plan')
+                if op == 'plan':
+                    if (connection, request_id) in self._pending:
+                        await send({'id': request_id, 'status': ERROR,
+                                    'error': f"Request {request_id!r} is already in progress"})
+                        continue
+                    try:
+                        job = self._job(request)
+                    except (ValueError, TypeError) as error:
+                        await send({'id': request_id, 'status': ERROR, 'error': str(error)})
+                        continue
+                    self.requests += 1
+                    try:
+                        self._queue.put_nowait(job)
+                    except asyncio.QueueFull:
+                        self._record(job, REJECTED)
+                        await send({'id': request_id, 'status': REJECTED, 'error': "Queue is full"})
+                        continue
+                    self._pending[(connection, request_id)] = job
+                    task = asyncio.create_task(self._respond(connection, job, send))
+                    responses.add(task)
+                    task.add_done_callback(responses.discard)
+                elif op == 'cancel':
+                    job = self._pending.get((connection, request.get('target')))
+                    if job is not None:
+                        job.cancelled.set()
+                    await send({'id': request_id, 'op': 'cancel', 'found': job is not None})
+                elif op == 'metrics':
+                    await send({'id': request_id, 'op': 'metrics', 'metrics': self.metrics()})
+                elif op == 'ping':
+                    await send({'id': request_id, 'op': 'pong'})
+                else:
+                    await send({'id': request_id, 'status': ERROR, 'error': f"Unknown operation: {op}"})
+        finally:
+            for (owner, _), job in list(self._pending.items()):
+                if owner == connection:
+                    job.cancelled.set()
+            for task in list(responses):
+                task.cancel()
+            writer.close()
+
+    def _job(self, request: Dict) -> _Job:
+        """
+        Método privado que valida una petición de planificación.
+
+        Args:
+            request (Dict): Petición recibida.
+
+        Returns:
+            _Job: La petición lista para encolarse.
+        """
+        planner = request.get('planner', 'gbfs')
+        if planner not in PLANNERS:
+            raise ValueError(f"Unknown planner: {planner}")
+        initial_state = decode_state(request.get('initial_state'))
+        goal = decode_state(request.get('goal'))
+        positions = request.get('positions')
+        if positions is not None and not all(isinstance(position, int) for position in positions):
+            raise ValueError("Positions must be integers")
+        deadline = request.get('deadline', self.deadline)
+        if not isinstance(deadline, (int, float)) or deadline <= 0:
+            raise ValueError("Deadline must be a positive number of seconds")
+        future = asyncio.get_running_loop().create_future()
+        return _Job(request.get('id'), initial_state, goal, planner, positions, time.monotonic() + deadline, future)
+
+    async def _respond(self, connection: int, job: _Job, send: Callable):
+        """ Método privado que espera el resultado de una petición y lo envía. """
+        try:
+            response = await job.future
+            await send(response)
+        except (ConnectionError, asyncio.CancelledError):
+            job.cancelled.set()
+        finally:
+            self._pending.pop((connection, job.id), None)
+
+    async def _worker(self):
+        """ Método privado con una tarea que despacha las peticiones de la cola a los hilos. """
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                job.started = time.monotonic()
+                if job.should_stop():
+                    response = self._stopped(job)
+                else:
+                    self.running += 1
+                    try:
+                        response = await loop.run_in_executor(self._executor, self._solve, job)
+                    except Exception as error:
+                        response = {'id': job.id, 'status': ERROR, 'error': repr(error)}
+                    finally:
+                        self.running -= 1
+                self._record(job, response['status'])
+                if not job.future.done():
+                    job.future.set_result(response)
+            finally:
+                self._queue.task_done()
+
+    def _solve(self, job: _Job) -> Dict:
+        """
+        Método privado que resuelve una petición en un hilo de trabajo.
+
+        Args:
+            job (_Job): Petición a resolver.
+
+        Returns:
+            Dict: La respuesta de la petición.
+        """
+        positions = tuple(job.positions) if job.positions is not None else None
+        key = (frozenset(job.initial_state.properties), positions)
+        heuristic = self.heuristics.get(key, None)
+        if heuristic is None:
+            heuristic = Heuristic(job.initial_state, positions, self.stats)
+            self.heuristics.put(key, heuristic)
+
+        start = time.monotonic()
+        planner = PLANNERS[job.planner](job.initial_state, job.goal, heuristic, job.should_stop)
+        plan = planner.get_plan()
+        elapsed = time.monotonic() - start
+
+        if plan is False:
+            if planner.status == BestFirstSearch.CANCELLED:
+                return self._stopped(job, elapsed)
+            return {'id': job.id, 'status': planner.status, 'plan': None, 'solve_time': elapsed}
+        return {
+            'id': job.id,
+            'status': BestFirstSearch.SOLVED,
+            'plan': [str(action) for action in plan],
+            'actions': [encode(action) for action in plan],
+            'cost': len(plan),
+            'solve_time': elapsed,
+        }
+
+    @staticmethod
+    def _stopped(job: _Job, elapsed: float = 0.0) -> Dict:
+        """ Método privado con la respuesta de una petición cancelada o fuera de plazo. """
+        status = CANCELLED if job.cancelled.is_set() else TIMEOUT
+        return {'id': job.id, 'status': status, 'plan': None, 'solve_time': elapsed}
+
+    def _record(self, job: _Job, status: str):
+        """ Método privado que registra el estado y las latencias de una petición terminada. """
+        now = time.monotonic()
+        self.statuses[status] += 1
+        self.latencies.append(now - job.received)
+        if job.started is not None:
+            self.queue_times.append(job.started - job.received)
+        if self.stats is not None:
+            self.stats.count(f'service_{status}')
+            self.stats.timing('service_latency', now - job.received)
+
+
+class PlanningClient:
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Clase con un cliente del servicio de planificación.
+
+        Varias peticiones pueden estar en curso a la vez sobre la misma conexión: cada
+        respuesta se asocia a su petición por el identificador. Se crea con `connect`.
+
+        Args:
+            reader (asyncio.StreamReader): Flujo de lectura de la conexión.
+            writer (asyncio.StreamWriter): Flujo de escritura de la conexión.
+        """
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self._ids = count(1)
+        self._waiting: Dict[int, asyncio.Future] = dict()
+        self._listener: asyncio.Task = asyncio.create_task(self._listen())
+
+    @classmethod
+    async def connect(cls, path: str = None, host: str = '127.0.0.1', port: int = None) -> 'PlanningClient':
+        """
+        Conecta con el servicio por un socket Unix o TCP.
+
+        Args:
+            path (str, optional): Ruta del socket Unix. Default: None (se usa TCP).
+            host (str, optional): Dirección TCP. Default: '127.0.0.1'.
+            port (int, optional): Puerto TCP. Default: None.
+
+        Returns:
+            PlanningClient: El cliente conectado.
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=2 ** 22)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=2 ** 22)
+        return cls(reader, writer)
+
+    async def request(self, message: Dict) -> Dict:
+        """
+        Envía una petición y espera su respuesta.
+
+        Args:
+            message (Dict): Petición sin identificador; se le asigna uno nuevo.
+
+        Returns:
+            Dict: La respuesta del servicio.
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self.writer.write(json.dumps(dict(message, id=request_id), ensure_ascii=False).encode('utf-8') + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def plan(self, initial_state: State, goal: State, planner: str = 'gbfs', positions: List[int] = None,
+                   deadline: float = None) -> Dict:
+        """
+        Pide un plan al servicio.
+
+        Args:
+            initial_state (State): Estado inicial del problema.
+            goal (State): Estado objetivo del problema.
+            planner (str, optional): Nombre del planificador en `PLANNERS`. Default: 'gbfs'.
+            positions (List[int], optional): Posiciones del escenario. Default: None.
+            deadline (float, optional): Plazo en segundos. Default: el del servicio.
+
+        Returns:
+            Dict: La respuesta, con el estado, el plan y los tiempos.
+        """
+        message = {'op': 'plan', 'initial_state': encode_state(initial_state), 'goal': encode_state(goal),
+                   'planner': planner}
+        if positions is not None:
+            message['positions'] = list(positions)
+        if deadline is not None:
+            message['deadline'] = deadline
+        return await self.request(message)
+
+    async def metrics(self) -> Dict:
+        """ Devuelve las métricas del servicio. """
+        return (await self.request({'op': 'metrics'}))['metrics']
+
+    async def close(self):
+        """ Cierra la conexión. """
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._listener.cancel()
+
+    async def _listen(self):
+        """ Método privado que reparte las respuestas recibidas entre las peticiones en curso. """
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed by the planning service"))
+            self._waiting.clear()
+
+
+async def load_test(problems: List[Problem], requests: int = 100, concurrency: int = 8, path: str = None,
+                    host: str = '127.0.0.1', port: int = None, planner: str = 'gbfs',
+                    deadline: float = None) -> Dict:
+    """
+    Prueba de carga del servicio.
+
+    Abre `concurrency` conexiones que envían peticiones de forma continua, repartiendo los
+    problemas en orden circular, hasta completar `requests` peticiones.
+
+    Args:
+        problems (List[Problem]): Problemas a enviar.
+        requests (int, optional): Número total de peticiones. Default: 100.
+        concurrency (int, optional): Conexiones simultáneas. Default: 8.
+        path (str, optional): Ruta del socket Unix. Default: None (se usa TCP).
+        host (str, optional): Dirección TCP. Default: '127.0.0.1'.
+        port (int, optional): Puerto TCP. Default: None.
+        planner (str, optional): Nombre del planificador en `PLANNERS`. Default: 'gbfs'.
+        deadline (float, optional): Plazo en segundos de cada petición. Default: el del servicio.
+
+    Returns:
+        Dict: Peticiones por estado, rendimiento, percentiles de latencia vistos por el cliente
+        y métricas del servicio al terminar.
+    """
+    if not problems:
+        raise ValueError("At least one problem is required")
+    indices = iter(range(requests))
+    statuses = Counter()
+    latencies = list()
+
+    async def session():
+        client = await PlanningClient.connect(path, host, port)
+        try:
+            for index in indices:
+                problem = problems[index % len(problems)]
+                start = time.perf_counter()
+                response = await client.plan(problem.initial_state, problem.goal, planner,
+                                             problem.positions, deadline)
+                latencies.append(time.perf_counter() - start)
+                statuses[response['status']] += 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    client = await PlanningClient.connect(path, host, port)
+    try:
+        metrics = await client.metrics()
+    finally:
+        await client.close()
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'statuses': dict(statuses),
+        'wall_time': elapsed,
+        'throughput': requests / elapsed if elapsed else None,
+        'latency': percentiles(latencies),
+        'service': metrics,
+    }
+
+
+async def _serve(options: argparse.Namespace):
+    """ Función privada que arranca el servidor hasta que se interrumpe. """
+    service = PlanningService(options.workers, options.max_queue, options.deadline)
+    host, port = _tcp_address(options.tcp)
+    await service.start(options.unix, host, port)
+    print(f"Servicio de planificación escuchando en {service.address}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+async def _load(options: argparse.Namespace) -> Dict:
+    """ Función privada que ejecuta la prueba de carga, con un servidor local si no se indica uno. """
+    problems = generate_suite(options.positions, options.boxes, options.bananas, options.instances, options.seed)
+    host, port = _tcp_address(options.tcp)
+    if options.unix is not None or options.tcp is not None:
+        return await load_test(problems, options.requests, options.concurrency, options.unix, host, port,
+                               options.planner, options.deadline)
+
+    service = PlanningService(options.workers, options.max_queue)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'planner.sock')
+        await service.start(path)
+        try:
+            return await load_test(problems, options.requests, options.concurrency, path,
+                                    planner=options.planner, deadline=options.deadline)
+        finally:
+            await service.close()
+
+
+def _tcp_address(address: Union[str, None]) -> Tuple[str, int]:
+    """ Función privada que separa una dirección TCP 'host:puerto'. """
+    if address is None:
+        return '127.0.0.1', 0
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Servicio local de planificación STRIPS")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="Arranca el servidor")
+    load = commands.add_parser('load', help="Ejecuta una prueba de carga")
+    for command in (serve, load):
+        command.add_argument('--unix', help="Ruta del socket Unix")
+        command.add_argument('--tcp', help="Dirección TCP 'host:puerto'")
+        command.add_argument('--workers', type=int)
+        command.add_argument('--max-queue', type=int, default=1024)
+    serve.add_argument('--deadline', type=float, default=30.0)
+
+    load.add_argument('--requests', type=int, default=200)
+    load.add_argument('--concurrency', type=int, default=16)
+    load.add_argument('--planner', choices=sorted(PLANNERS), default='gbfs')
+    load.add_argument('--deadline', type=float)
+    load.add_argument('--positions', type=int, nargs='+', default=[3, 5, 8])
+    load.add_argument('--boxes', type=int, nargs='+', default=[1])
+    load.add_argument('--bananas', type=int, nargs='+', default=[1])
+    load.add_argument('--instances', type=int, default=2)
+    load.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(args)
+
+    if options.command == 'serve':
+        try:
+            asyncio.run(_serve(options))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(_load(options)), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
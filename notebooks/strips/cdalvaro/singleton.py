@@ -1,12 +1,34 @@
+from threading import RLock
+from weakref import WeakValueDictionary
+
+
 class Singleton(type):
     """
     Metaclase para implementar el patrón de diseño Singleton
     https://stackoverflow.com/a/6798042/3398062
+
+    La creación de instancias está protegida por un cerrojo, de modo que dos hilos que piden
+    a la vez la misma instancia obtienen siempre el mismo objeto.
+
+    Las instancias se guardan con referencias débiles, como en `Flyweight`: una instancia que
+    ya no se usa se libera, de modo que un proceso de larga duración no acumula una por cada
+    combinación de argumentos que ha visto.
     """
-    _instances = dict()
+    _instances = WeakValueDictionary()
+    _lock = RLock()
 
     def __call__(self, *args, **kwargs):
-        if self not in self._instances:
-            self._instances[self] = super(
-                Singleton, self).__call__(*args, **kwargs)
-        return self._instances[self]
+        # Se guarda una instancia por cada combinación de argumentos, de modo que
+        # las clases sin argumentos siguen teniendo una única instancia.
+        key = (self, args, tuple(sorted(kwargs.items())))
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+
+        # El cerrojo es reentrante porque construir una instancia puede requerir otras.
+        with Singleton._lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                instance = self._instances[key] = super(
+                    Singleton, self).__call__(*args, **kwargs)
+        return instance
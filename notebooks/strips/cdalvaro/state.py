@@ -1,18 +1,30 @@
-from .properties import Properties
+from typing import Iterable
+
+from .properties import BaseProperty, Properties
 
 
 class State:
 
-    def __init__(self, properties: Properties = None):
+    def __init__(self, properties: Iterable[BaseProperty] = None):
         """
         Clase para definir un estado.
 
+        Los estados son inmutables y se pueden usar como claves de diccionarios y cachés:
+        las propiedades se guardan en un `frozenset` y dos estados son iguales si tienen
+        las mismas propiedades.
+
         Args:
-            properties (Properties, optional): Propiedades que definen el estado. Default: None.
+            properties (Iterable[BaseProperty], optional): Propiedades que definen el estado. Default: None.
         """
         if properties is None:
-            properties = set()
-        self.properties: Properties = properties
+            properties = frozenset()
+        self.properties: Properties = frozenset(properties)
 
     def __str__(self) -> str:
-        return str(self.properties)
+        return str(set(self.properties))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, State) and self.properties == other.properties
+
+    def __hash__(self) -> int:
+        return hash(self.properties)
@@ -0,0 +1,203 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, IO, Iterable, Union
+
+
+class Sink:
+    """
+    Clase base de los destinos de las estadísticas de planificación.
+
+    Las clases hijas sobrescriben los métodos de los registros que les interesan.
+    """
+
+    def count(self, name: str, amount: int):
+        """ Registra el incremento de un contador. """
+
+    def timing(self, name: str, seconds: float):
+        """ Registra el tiempo empleado en una fase. """
+
+    def event(self, name: str, data: Dict):
+        """ Registra un evento puntual con sus datos. """
+
+
+class CounterSink(Sink):
+
+    def __init__(self):
+        """
+        Destino que acumula en memoria los contadores y los tiempos por fase.
+
+        Los incrementos se protegen con un cerrojo para no perder registros
+        cuando varios planificadores comparten el recolector desde distintos hilos.
+        """
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.events: Dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+
+    def count(self, name: str, amount: int):
+        with self._lock:
+            self.counters[name] += amount
+
+    def timing(self, name: str, seconds: float):
+        with self._lock:
+            self.timings[name] += seconds
+
+    def event(self, name: str, data: Dict):
+        with self._lock:
+            self.events[name] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Devuelve una copia de las estadísticas acumuladas.
+
+        Returns:
+            Dict[str, Dict]: Diccionario con los contadores, tiempos y eventos.
+        """
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': dict(self.timings),
+                'events': dict(self.events),
+            }
+
+    def reset(self):
+        """ Reinicia las estadísticas acumuladas. """
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.events.clear()
+
+
+class JsonLinesSink(Sink):
+
+    def __init__(self, output: Union[str, IO]):
+        """
+        Destino que escribe cada registro como una línea JSON.
+
+        Args:
+            output (Union[str, IO]): Ruta del fichero (se abre en modo añadir) o fichero abierto.
+        """
+        self._owned = isinstance(output, str)
+        self.output: IO = open(output, 'a') if self._owned else output
+
+    def _write(self, record: Dict):
+        record['time'] = time.time()
+        self.output.write(json.dumps(record) + '\n')
+
+    def count(self, name: str, amount: int):
+        self._write({'type': 'count', 'name': name, 'value': amount})
+
+    def timing(self, name: str, seconds: float):
+        self._write({'type': 'timing', 'name': name, 'value': seconds})
+
+    def event(self, name: str, data: Dict):
+        self._write({'type': 'event', 'name': name, 'data': data})
+
+    def close(self):
+        """ Cierra el fichero si ha sido abierto por el destino. """
+        if self._owned:
+            self.output.close()
+
+
+class CallbackSink(Sink):
+
+    def __init__(self, callback: Callable[[str, str, object], None]):
+        """
+        Destino que reenvía cada registro a una función.
+
+        Args:
+            callback (Callable[[str, str, object], None]): Función que recibe el tipo de registro
+                ('count', 'timing' o 'event'), su nombre y su valor.
+        """
+        self.callback = callback
+
+    def count(self, name: str, amount: int):
+        self.callback('count', name, amount)
+
+    def timing(self, name: str, seconds: float):
+        self.callback('timing', name, seconds)
+
+    def event(self, name: str, data: Dict):
+        self.callback('event', name, data)
+
+
+class PlannerStats:
+
+    def __init__(self, sinks: Iterable[Sink] = None):
+        """
+        Clase para recoger las estadísticas de los planificadores y de la heurística.
+
+        Los planificadores y la heurística reciben una instancia opcional de esta clase.
+        Cuando no se proporciona (`stats=None`) no se recoge ninguna estadística y el
+        único coste es la comprobación de que no hay instancia.
+
+        Args:
+            sinks (Iterable[Sink], optional): Destinos de las estadísticas. Default: un `CounterSink`.
+        """
+        self.sinks = list(sinks) if sinks is not None else [CounterSink()]
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Incrementa un contador.
+
+        Args:
+            name (str): Nombre del contador.
+            amount (int, optional): Incremento. Default: 1.
+        """
+        for sink in self.sinks:
+            sink.count(name, amount)
+
+    def timing(self, name: str, seconds: float):
+        """
+        Registra el tiempo empleado en una fase.
+
+        Args:
+            name (str): Nombre de la fase.
+            seconds (float): Segundos empleados.
+        """
+        for sink in self.sinks:
+            sink.timing(name, seconds)
+
+    def event(self, name: str, **data):
+        """
+        Registra un evento puntual.
+
+        Args:
+            name (str): Nombre del evento.
+            **data: Datos asociados al evento.
+        """
+        for sink in self.sinks:
+            sink.event(name, data)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Gestor de contexto que mide el tiempo empleado en el bloque.
+
+        Args:
+            name (str): Nombre de la fase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, time.perf_counter() - start)
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        """ Contadores del primer `CounterSink` configurado. """
+        return self._counter_sink().counters
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """ Tiempos por fase del primer `CounterSink` configurado. """
+        return self._counter_sink().timings
+
+    def _counter_sink(self) -> CounterSink:
+        for sink in self.sinks:
+            if isinstance(sink, CounterSink):
+                return sink
+        raise ValueError("No CounterSink configured")
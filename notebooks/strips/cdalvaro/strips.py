@@ -1,40 +1,130 @@
-from typing import Union
-from random import shuffle
+from random import Random
+from time import perf_counter
+from typing import Callable, Iterator, List, Tuple, Union
 
 from .actions import BaseAction, Actions
+from .config import PlannerConfig
+from .encoding import CompiledAction
 from .heuristic import Heuristic
+from .properties import BaseProperty
 from .state import State
+from .stats import PlannerStats
+
+# Elemento de la pila de objetivos: una propiedad a conseguir o una acción a aplicar.
+Target = Union[BaseProperty, CompiledAction]
 
 
 class Strips:
     # Límite de iteraciones en el que se tendrá en cuenta el orden
     # establecido por la heurística en la búsqueda de acciones.
+    # Sólo se usa en los planificadores sin configuración propia (ver `PlannerConfig`).
     efficiency_limit: int = 10
 
-    def __init__(self, initial_state: State, goal: State, heuristic: Heuristic):
+    # Estados posibles de la planificación tras llamar a `get_plan`.
+    SOLVED: str = 'solved'
+    FAILED: str = 'failed'
+    EXHAUSTED: str = 'exhausted'
+    NODE_LIMIT: str = 'node_limit'
+    CANCELLED: str = 'cancelled'
+
+    def __init__(self, initial_state: State, goal: State, heuristic: Heuristic, stats: PlannerStats = None,
+                 backtracking: bool = False, max_depth: int = 8, max_nodes: int = None, seed: int = None,
+                 config: PlannerConfig = None, should_stop: Callable[[], bool] = None):
         """
         Clase que implementa la generación de planes de acción basada en STRIPS.
 
+        Por defecto, al superar `efficiency_limit` iteraciones se baraja el orden de las acciones
+        propuesto por la heurística y se sigue siempre la primera, sin volver atrás.
+
+        Con `backtracking=True` la búsqueda es determinista: se conserva el orden de la heurística,
+        se vuelve atrás sobre las acciones alternativas cuando una rama falla, se descartan las
+        configuraciones (estado, pila de objetivos) repetidas y se comprueba el objetivo al final.
+        Los presupuestos `max_depth` y `max_nodes` acotan el tiempo de la búsqueda.
+
+        Con `config` el planificador no depende de `Strips.efficiency_limit` ni de `BaseAction.verbose`,
+        por lo que puede usarse a la vez que otros planificadores desde varios hilos.
+
         Args:
             initial_state (State): Estado inicial del que parte el problema.
             goal (State): Estado objetivo que debe alcanzar la planificación.
             heuristic (Heuristic): Instancia de heurística para determinar las acciones del plan.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: el de la heurística.
+            backtracking (bool, optional): Activa la búsqueda determinista con vuelta atrás. Default: False.
+            max_depth (int, optional): Máximo de acciones anidadas pendientes en la pila de objetivos
+                con vuelta atrás. None desactiva el límite. Default: 8.
+            max_nodes (int, optional): Máximo de acciones probadas con vuelta atrás. Default: None (sin límite).
+            seed (int, optional): Semilla para barajar las acciones sin vuelta atrás. Default: `config.seed`.
+            config (PlannerConfig, optional): Configuración del planificador. Default: None (los atributos
+                de clase `Strips.efficiency_limit` y `BaseAction.verbose` en el momento de planificar).
+            should_stop (Callable[[], bool], optional): Función que se consulta en cada iteración. Si devuelve
+                True, la planificación se detiene con el estado `CANCELLED`. Default: None.
         """
         self.initial_state: State = initial_state
         self.goal: State = goal
         self.heuristic: Heuristic = heuristic
+        self.stats: PlannerStats = stats if stats is not None else heuristic.stats
+        self.backtracking: bool = backtracking
+        self.max_depth: Union[int, None] = max_depth
+        self.max_nodes: Union[int, None] = max_nodes
+        self.config: Union[PlannerConfig, None] = config
+        self.should_stop: Union[Callable[[], bool], None] = should_stop
+        self.random: Random = Random(seed if seed is not None or config is None else config.seed)
+
+        self.status: Union[str, None] = None
+        self.failure: Union[str, None] = None
+        self.nodes: int = 0
 
     def get_plan(self) -> Union[Actions, bool]:
         """
         Método que implementa la lógica para la búsqueda del plan.
 
+        Tras la llamada, `status` indica el resultado de la planificación y, si ha fallado,
+        `failure` describe el motivo.
+
         Returns:
             Union[Actions, bool]: Devuelve el conjunto de acciones ordenadas que
             componen el plan o False indicando que no ha sido posible elaborar un plan.
         """
-        plan: Actions = list()
+        if self.backtracking:
+            self._reset()
+            return self._backtracking_plan()
 
-        state = self.initial_state
+        plan = list(self.iter_plan())
+        return plan if self.status == self.SOLVED else False
+
+    def iter_plan(self, shuffle: bool = True) -> Iterator[BaseAction]:
+        """
+        Generador que devuelve las acciones del plan según se incorporan a él.
+
+        Sin vuelta atrás, cada acción se devuelve en cuanto se aplica sobre el estado actual,
+        por lo que su ejecución puede empezar antes de que el plan esté completo. Con vuelta
+        atrás, las acciones se devuelven cuando se ha encontrado el plan completo.
+
+        Al terminar, `status` indica el resultado de la planificación: las acciones
+        devueltas sólo forman un plan completo si es `SOLVED`.
+
+        Args:
+            shuffle (bool, optional): Baraja las acciones al superar `efficiency_limit` iteraciones.
+                Si es False, la planificación se detiene en ese punto con el estado `FAILED`. Default: True.
+
+        Returns:
+            Iterator[BaseAction]: Las acciones del plan en orden de aplicación.
+        """
+        self._reset()
+        if self.backtracking:
+            plan = self._backtracking_plan()
+            if plan is not False:
+                yield from plan
+            return
+
+        config = self.settings()
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+
+        # El estado actual se representa como una máscara de bits de la codificación de la heurística.
+        encoding = self.heuristic.encoding
+        state = encoding.encode(self.initial_state)
         targets = list(self.goal.properties)
 
         iteration_counter = 0
@@ -42,42 +132,70 @@ class Strips:
 
         while len(targets) > 0:
             iteration_counter += 1
+            if self.should_stop is not None and self.should_stop():
+                if stats is not None:
+                    stats.timing('get_plan', perf_counter() - start)
+                self.status = self.CANCELLED
+                self.failure = "Planning cancelled"
+                return
 
             # Se extrae el primer objetivo de la lista de objetivos.
             target = targets.pop(0)
+            if stats is not None:
+                stats.count('iterations')
 
             # Si el objetivo a explorar se trata de una acción:
             # - Se aplica la acción sobre el estado actual y si se puede generar un
             #   nuevo estado válido se actualiza el estado actual y se añade la acción al plan.
-            if issubclass(type(target), BaseAction):
+            if isinstance(target, CompiledAction):
                 new_state = target.apply(state)
                 if new_state is not None:
+                    if config.verbose:
+                        print(f"Aplicando: {target} sobre el estado {encoding.state(state)}")
                     state = new_state
-                    plan.append(target)
+                    if stats is not None:
+                        stats.count('successors')
+                    yield target.action
 
             # Si no es una acción, entonces es una propiedad.
             else:
 
                 # Si el objetivo es una propiedad del estado actual:
                 # - No se hace nada y se explora el siguiente objetivo de la lista.
-                if target in state.properties:
+                if stats is not None:
+                    stats.count('target_pops')
+                if state & encoding.bit(target):
                     continue
 
                 # Se generan las posibles acciones que pueden dar lugar desde el estado
                 # actual un estado que tiene como propiedad el objetivo que se está estudiando.
-                actions = self.heuristic.choose_actions(state, State({target}))
+                actions = self.heuristic.choose_compiled_actions(state, encoding.bit(target))
                 if len(actions) == 0:
                     # Si no hay acciones posibles, no se ha conseguido elaborar
                     # la planificación y se devuelve False
-                    return False
+                    if stats is not None:
+                        stats.event('no_actions', target=str(target))
+                        stats.timing('get_plan', perf_counter() - start)
+                    self.status = self.FAILED
+                    self.failure = f"No actions achieve {target}"
+                    return
+
+                if iteration_counter > config.efficiency_limit:
+                    if not shuffle:
+                        if stats is not None:
+                            stats.timing('get_plan', perf_counter() - start)
+                        self.status = self.FAILED
+                        self.failure = "Efficiency limit exceeded"
+                        return
 
-                if iteration_counter > self.efficiency_limit:
                     # Se anula el orden calculado por la heurística si el número
                     # de iteraciones es alto para evitar bucles infinitos
                     if show_warning:
                         print("AVISO: La heurística no está encontrando soluciones eficientes")
                         show_warning = False
-                    shuffle(actions)
+                        if stats is not None:
+                            stats.event('efficiency_limit_exceeded', iteration=iteration_counter)
+                    self.random.shuffle(actions)
 
                 # Se añade la primera acción devuelta por la heurística a la lista de objetivos.
                 action = actions.pop(0)
@@ -85,6 +203,140 @@ class Strips:
 
                 # Además de añadir la acción, se anteponen sus precondiciones
                 # para buscar las acciones que generen estas precondiciones.
-                targets = self.heuristic.sort_properties(action.precondition) + targets
+                targets = self.heuristic.sort_properties(action.action.precondition) + targets
+
+        if stats is not None:
+            stats.timing('get_plan', perf_counter() - start)
+        self.status = self.SOLVED
+
+    def settings(self) -> PlannerConfig:
+        """
+        Devuelve la configuración efectiva del planificador.
+
+        Returns:
+            PlannerConfig: La configuración propia o, si no tiene, la de los atributos de clase actuales.
+        """
+        if self.config is not None:
+            return self.config
+        return PlannerConfig(efficiency_limit=Strips.efficiency_limit, verbose=BaseAction.verbose)
 
-        return plan
+    def _reset(self):
+        """ Método privado para reiniciar el resultado de la planificación anterior. """
+        self.status = None
+        self.failure = None
+        self.nodes = 0
+
+    def _backtracking_plan(self) -> Union[Actions, bool]:
+        """
+        Método privado que implementa la búsqueda determinista con vuelta atrás.
+
+        Cada punto de decisión es una propiedad de la pila de objetivos que no se cumple en
+        el estado actual. Sus alternativas son las acciones de la heurística en el orden
+        propuesto por ésta, y se prueban en profundidad con una pila explícita.
+
+        Returns:
+            Union[Actions, bool]: Las acciones del plan o False si no se ha encontrado.
+        """
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+
+        encoding = self.heuristic.encoding
+        goal = encoding.encode(self.goal)
+        visited = set()
+        # Pares (estado, objetivo) de los puntos de decisión de la rama actual: volver a
+        # perseguir el mismo objetivo desde el mismo estado es un ciclo de submetas.
+        ancestors = set()
+        frames: List[Tuple[int, BaseProperty, Tuple[Target, ...], Tuple[BaseAction, ...],
+                           Iterator[CompiledAction]]] = list()
+
+        def expand(state: int, targets: Tuple[Target, ...], plan: Tuple[BaseAction, ...]) -> Union[Actions, None]:
+            # Avanza sobre la pila de objetivos hasta el siguiente punto de decisión,
+            # que se añade a `frames`, o hasta completar el plan.
+            while targets:
+                target, targets = targets[0], targets[1:]
+                if isinstance(target, CompiledAction):
+                    state = target.apply(state)
+                    if state is None:
+                        return None
+                    plan += (target.action,)
+                elif not state & encoding.bit(target):
+                    break
+            else:
+                # La pila se ha vaciado: si alguna acción ha deshecho un objetivo,
+                # se vuelven a apilar los objetivos pendientes.
+                if state & goal == goal:
+                    return list(plan)
+                target, *pending = self._sort(encoding.decode(goal & ~state))
+                targets = tuple(pending)
+
+            key = (state, target, targets)
+            if key in visited or (state, target) in ancestors:
+                if stats is not None:
+                    stats.count('cycles')
+                return None
+            visited.add(key)
+
+            depth = sum(isinstance(pending, CompiledAction) for pending in targets)
+            if self.max_depth is not None and depth >= self.max_depth:
+                if stats is not None:
+                    stats.count('depth_cutoffs')
+                return None
+
+            actions = self.heuristic.choose_compiled_actions(state, encoding.bit(target))
+            if stats is not None:
+                stats.count('target_pops')
+            frames.append((state, target, targets, plan, iter(actions)))
+            ancestors.add((state, target))
+            return None
+
+        plan = expand(encoding.encode(self.initial_state), tuple(self._sort(self.goal.properties)), ())
+        while plan is None and frames:
+            state, target, targets, partial_plan, alternatives = frames[-1]
+            action = next(alternatives, None)
+            if action is None:
+                frames.pop()
+                ancestors.discard((state, target))
+                continue
+
+            self.nodes += 1
+            if self.max_nodes is not None and self.nodes > self.max_nodes:
+                self.status = self.NODE_LIMIT
+                self.failure = f"Node budget of {self.max_nodes} exhausted"
+                break
+            if self.should_stop is not None and self.should_stop():
+                self.status = self.CANCELLED
+                self.failure = "Planning cancelled"
+                break
+
+            if stats is not None:
+                stats.count('iterations')
+            targets = tuple(self._sort(action.action.precondition)) + (action,) + targets
+            plan = expand(state, targets, partial_plan)
+
+        if plan is not None:
+            self.status = self.SOLVED
+        elif self.status is None:
+            self.status = self.EXHAUSTED
+            self.failure = "Every alternative has been explored without finding a plan"
+
+        if stats is not None:
+            if plan is None:
+                stats.event('search_failed', status=self.status, nodes=self.nodes)
+            stats.timing('get_plan', perf_counter() - start)
+        return plan if plan is not None else False
+
+    @staticmethod
+    def _sort(properties) -> List[BaseProperty]:
+        """
+        Método privado para ordenar propiedades por peso de forma determinista.
+
+        A igual peso, las propiedades se ordenan por su descripción.
+
+        Args:
+            properties (Properties): Propiedades a ordenar.
+
+        Returns:
+            List[BaseProperty]: Lista de propiedades ordenadas de menor a mayor peso.
+        """
+        return sorted(properties, key=lambda prop: (prop.weight, prop.description))
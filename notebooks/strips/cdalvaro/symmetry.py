@@ -0,0 +1,373 @@
+from typing import Dict, Hashable, List, Tuple, Union
+
+from .actions import Actions
+from .cache import LRUCache
+from .encoding import CompiledAction, bits
+from .grounding import ActionTable
+from .state import State
+from .stats import PlannerStats
+
+# Permutación de objetos: para cada objeto intercambiable, el objeto por el que se sustituye.
+Permutation = Dict[Hashable, Hashable]
+
+
+class _DisjointSet:
+
+    def __init__(self):
+        """
+        Clase privada con una estructura union-find para agrupar objetos en clases.
+        """
+        self.parents: Dict[Hashable, Hashable] = dict()
+
+    def find(self, item: Hashable) -> Hashable:
+        """ Devuelve el representante de la clase del elemento, comprimiendo el camino. """
+        parent = self.parents.setdefault(item, item)
+        if parent != item:
+            parent = self.parents[item] = self.find(parent)
+        return parent
+
+    def union(self, first: Hashable, second: Hashable):
+        """ Une las clases de los dos elementos. """
+        self.parents[self.find(second)] = self.find(first)
+
+
+class Symmetries:
+
+    def __init__(self, actions: ActionTable, goal: Union[State, int], cache_size: int = 65536,
+                 stats: PlannerStats = None):
+        """
+        Clase que detecta las simetrías de objetos de un problema y canoniza sus estados.
+
+        Los objetos son los argumentos con los que se construyen las propiedades y las acciones
+        (elementos, niveles y posiciones), salvo los `fixed_arguments` iniciales, que no son
+        objetos sino parte de su tipo (el predicado de un átomo o el esquema de una acción PDDL). Dos objetos del mismo tipo son intercambiables si
+        intercambiarlos en todas las acciones y en el objetivo deja ambos conjuntos iguales.
+        Como las transposiciones que cumplen esto generan el grupo simétrico de cada clase, basta
+        con probar cada objeto contra el representante de cada clase y unirlas con union-find.
+
+        En el problema del mono, por ejemplo, son intercambiables las cajas y las posiciones sin plátano.
+
+        La forma canónica de un estado se obtiene refinando los colores de los objetos según las
+        propiedades del estado en las que aparecen y ordenando cada clase por color. Los estados
+        simétricos se representan así, en la mayoría de los casos, con el mismo estado. Es siempre
+        un estado simétrico al original, por lo que usarlo para detectar duplicados es correcto.
+
+        Args:
+            actions (ActionTable): Tabla de acciones instanciadas del problema.
+            goal (Union[State, int]): Estado objetivo o su máscara de bits.
+            cache_size (int, optional): Número de formas canónicas guardadas. Default: 65536.
+            stats (PlannerStats, optional): Recolector de estadísticas. Default: None.
+        """
+        self.table: ActionTable = actions
+        self.encoding = actions.encoding
+        self.stats: PlannerStats = stats
+        self.goal: int = self.encoding.encode(goal) if isinstance(goal, State) else goal
+        self.cache: LRUCache = LRUCache(cache_size)
+
+        self._actions: Dict[object, CompiledAction] = {action.action: action for action in actions.actions}
+        self._properties: Dict[Tuple[tuple, tuple], int] = dict()
+        self._structure: List[Tuple[int, tuple]] = list()
+        kinds: Dict[tuple, int] = dict()
+        mentions: Dict[Hashable, List[int]] = dict()
+        for index, prop in enumerate(self.encoding.properties):
+            kind = self._kind(prop)
+            args = self._arguments(prop)
+            self._properties[(kind, args)] = index
+            self._structure.append((kinds.setdefault(kind, len(kinds)), args))
+            for arg in args:
+                mentions.setdefault(arg, list()).append(index)
+
+        action_mentions: Dict[Hashable, List[CompiledAction]] = dict()
+        for action in actions.actions:
+            for arg in self._arguments(action.action):
+                action_mentions.setdefault(arg, list()).append(action)
+
+        # Se prueba cada objeto contra el representante de cada clase de su mismo tipo.
+        groups = _DisjointSet()
+        representatives: Dict[type, List[Hashable]] = dict()
+        for item in list(mentions) + [item for item in action_mentions if item not in mentions]:
+            candidates = representatives.setdefault(type(item), list())
+            for representative in candidates:
+                swap = {representative: item, item: representative}
+                if self._preserves(swap, mentions.get(item, []) + mentions.get(representative, []),
+                                   action_mentions.get(item, []) + action_mentions.get(representative, [])):
+                    groups.union(representative, item)
+                    break
+            else:
+                candidates.append(item)
+
+        classes: Dict[Hashable, List[Hashable]] = dict()
+        for item in groups.parents:
+            classes.setdefault(groups.find(item), list()).append(item)
+        self.classes: List[List[Hashable]] = [members for members in classes.values() if len(members) > 1]
+
+        # Color inicial de cada objeto: su clase si es intercambiable o un color fijo negativo si no.
+        self._colors: Dict[Hashable, int] = dict()
+        for color, members in enumerate(self.classes):
+            for item in members:
+                self._colors[item] = color
+        for item in list(mentions) + list(action_mentions):
+            self._colors.setdefault(item, -1 - len(self._colors))
+        self._mentions: Dict[Hashable, List[int]] = {item: indices for item, indices in mentions.items()
+                                                      if item in self._colors and self._colors[item] >= 0}
+
+    @property
+    def order(self) -> int:
+        """ Número de permutaciones del grupo de simetrías detectado. """
+        order = 1
+        for members in self.classes:
+            for size in range(2, len(members) + 1):
+                order *= size
+        return order
+
+    def canonical(self, state: int) -> int:
+        """
+        Devuelve la forma canónica de un estado.
+
+        Args:
+            state (int): Máscara del estado.
+
+        Returns:
+            int: Máscara del estado canónico simétrico al indicado.
+        """
+        return self.canonicalize(state)[0]
+
+    def canonicalize(self, state: int) -> Tuple[int, Permutation]:
+        """
+        Calcula la forma canónica de un estado y la permutación que lleva a ella.
+
+        Args:
+            state (int): Máscara del estado.
+
+        Returns:
+            Tuple[int, Permutation]: Máscara del estado canónico y permutación de objetos aplicada.
+        """
+        result = self.cache.get(state, None)
+        if result is not None:
+            return result
+
+        if not self.classes:
+            result = (state, dict())
+            self.cache.put(state, result)
+            return result
+
+        indices = list(bits(state))
+        present = set(indices)
+        colors = dict(self._colors)
+        distinct = len(self.classes)
+        while True:
+            # Firma de cada objeto intercambiable: su color y el de las propiedades del estado en las que aparece.
+            signatures = dict()
+            for members in self.classes:
+                for item in members:
+                    described = list()
+                    for index in self._mentions.get(item, ()):
+                        if index in present:
+                            kind, args = self._structure[index]
+                            described.append((kind, args.index(item), tuple(colors[arg] for arg in args)))
+                    described.sort()
+                    signatures[item] = (colors[item], tuple(described))
+
+            ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures.values())))}
+            for item, signature in signatures.items():
+                colors[item] = ranks[signature]
+            if len(ranks) == distinct:
+                break
+            distinct = len(ranks)
+
+        permutation: Permutation = dict()
+        for members in self.classes:
+            for target, item in zip(members, sorted(members, key=lambda member: colors[member])):
+                permutation[item] = target
+
+        result = (self.map_state(state, permutation), permutation)
+        self.cache.put(state, result)
+        if self.stats is not None:
+            self.stats.count('canonicalizations')
+        return result
+
+    def map_state(self, state: int, permutation: Permutation) -> int:
+        """
+        Aplica una permutación de objetos a un estado.
+
+        Args:
+            state (int): Máscara del estado.
+            permutation (Permutation): Permutación de objetos.
+
+        Returns:
+            int: Máscara del estado permutado.
+        """
+        mask = 0
+        for index in bits(state):
+            mask |= 1 << self._map_property(index, permutation)
+        return mask
+
+    def map_action(self, action: CompiledAction, permutation: Permutation) -> CompiledAction:
+        """
+        Aplica una permutación de objetos a una acción.
+
+        Args:
+            action (CompiledAction): Acción a permutar.
+            permutation (Permutation): Permutación de objetos.
+
+        Returns:
+            CompiledAction: La acción de la tabla equivalente tras la permutación.
+        """
+        return self._actions[self._permute(action.action, permutation)]
+
+    def restore_plan(self, permutation: Permutation, steps: List[Tuple[CompiledAction, Permutation]]) -> Actions:
+        """
+        Traduce un plan encontrado sobre estados canónicos a un plan del problema original.
+
+        Si `τ` lleva el estado real al canónico desde el que se aplica la acción `a`, la acción real es
+        `τ⁻¹(a)`. Tras ella, `τ` se compone con la permutación con la que se ha canonizado el estado resultante.
+
+        Args:
+            permutation (Permutation): Permutación con la que se ha canonizado el estado inicial.
+            steps (List[Tuple[CompiledAction, Permutation]]): Cada acción aplicada sobre un estado
+                canónico y la permutación con la que se ha canonizado el estado resultante.
+
+        Returns:
+            Actions: Las acciones del plan aplicables desde el estado inicial original.
+        """
+        plan = list()
+        for action, following in steps:
+            inverse = {target: item for item, target in permutation.items()}
+            plan.append(self.map_action(action, inverse).action)
+            permutation = {item: following.get(target, target) for item, target in permutation.items()}
+        return plan
+
+    def _preserves(self, permutation: Permutation, properties: List[int], actions: List[CompiledAction]) -> bool:
+        """
+        Método privado que comprueba si una permutación conserva el objetivo, las propiedades y las acciones.
+
+        Sólo se comprueban las propiedades y acciones en las que aparecen los objetos permutados.
+        La imagen de cada acción debe estar en la tabla y sus máscaras de precondición, añadir y
+        eliminar deben ser las de la acción original permutadas: que exista una acción con los
+        argumentos permutados no basta para que la permutación conserve su efecto.
+
+        Args:
+            permutation (Permutation): Permutación de objetos.
+            properties (List[int]): Índices de las propiedades en las que aparecen los objetos.
+            actions (List[CompiledAction]): Acciones en las que aparecen los objetos.
+
+        Returns:
+            bool: True si la permutación es una simetría del problema.
+        """
+        for index in properties:
+            if self._find_property(index, permutation) is None:
+                return False
+        for action in actions:
+            image = self._actions.get(self._permute(action.action, permutation))
+            if image is None:
+                return False
+            for mask, mapped in ((action.precondition, image.precondition), (action.add_list, image.add_list),
+                                 (action.remove_list, image.remove_list)):
+                if self._find_state(mask, permutation) != mapped:
+                    return False
+        return all(self._find_property(index, permutation) in bits(self.goal) for index in bits(self.goal))
+
+    def _find_state(self, state: int, permutation: Permutation) -> Union[int, None]:
+        """
+        Método privado equivalente a `map_state` para permutaciones que pueden no ser simetrías.
+
+        Args:
+            state (int): Máscara del estado.
+            permutation (Permutation): Permutación de objetos.
+
+        Returns:
+            Union[int, None]: Máscara del estado permutado o None si alguna propiedad no está en la codificación.
+        """
+        mask = 0
+        for index in bits(state):
+            mapped = self._find_property(index, permutation)
+            if mapped is None:
+                return None
+            mask |= 1 << mapped
+        return mask
+
+    def _map_property(self, index: int, permutation: Permutation) -> int:
+        """
+        Método privado que aplica una permutación a una propiedad de una simetría del problema.
+
+        Args:
+            index (int): Índice de la propiedad en la codificación.
+            permutation (Permutation): Permutación de objetos.
+
+        Returns:
+            int: Índice de la propiedad permutada.
+        """
+        mapped = self._find_property(index, permutation)
+        if mapped is None:
+            raise ValueError(f"Permutation does not preserve {self.encoding.properties[index]}")
+        return mapped
+
+    def _find_property(self, index: int, permutation: Permutation) -> Union[int, None]:
+        """
+        Método privado que busca en la codificación la propiedad resultante de una permutación.
+
+        Args:
+            index (int): Índice de la propiedad en la codificación.
+            permutation (Permutation): Permutación de objetos.
+
+        Returns:
+            Union[int, None]: Índice de la propiedad permutada o None si no está en la codificación.
+        """
+        prop = self.encoding.properties[index]
+        args = self._structure[index][1]
+        mapped = tuple(permutation.get(arg, arg) for arg in args)
+        key = (self._kind(prop), mapped)
+        found = self._properties.get(key)
+        if found is None:
+            found = self.encoding.ids.get(self._permute(prop, permutation))
+            if found is not None:
+                self._properties[key] = found
+        return found
+
+    @staticmethod
+    def _permute(instance, permutation: Permutation):
+        """
+        Método privado que construye la propiedad o acción con los objetos permutados.
+
+        Args:
+            instance: Propiedad o acción a permutar.
+            permutation (Permutation): Permutación de objetos.
+
+        Returns:
+            La propiedad o acción permutada, o None si sus argumentos no son válidos.
+        """
+        args, kwargs = instance._arguments
+        fixed = instance.fixed_arguments
+        try:
+            return type(instance)(*args[:fixed], *(permutation.get(arg, arg) for arg in args[fixed:]),
+                                  **{key: permutation.get(value, value) for key, value in kwargs.items()})
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _kind(instance) -> tuple:
+        """
+        Método privado con el tipo de una propiedad o acción y sus argumentos que no son objetos.
+
+        Args:
+            instance: Propiedad o acción.
+
+        Returns:
+            tuple: El tipo seguido de los `fixed_arguments` iniciales.
+        """
+        return (type(instance),) + tuple(instance._arguments[0][:instance.fixed_arguments])
+
+    @staticmethod
+    def _arguments(instance) -> tuple:
+        """
+        Método privado con los objetos con los que se construye una propiedad o acción.
+
+        Args:
+            instance: Propiedad o acción.
+
+        Returns:
+            tuple: Argumentos posicionales, sin los `fixed_arguments` iniciales, seguidos de los
+                valores de los argumentos por nombre.
+        """
+        args, kwargs = instance._arguments
+        return tuple(args[instance.fixed_arguments:]) + tuple(value for _, value in sorted(kwargs.items()))
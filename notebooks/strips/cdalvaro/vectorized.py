@@ -0,0 +1,225 @@
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+from .actions import Actions, BaseAction
+from .grounding import ActionTable
+from .state import State
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Simulation(NamedTuple):
+    """
+    Resultado de simular un lote de planes.
+
+    Attributes:
+        states (np.ndarray): Matriz booleana (planes x propiedades) con el estado final de cada plan.
+            Si un plan falla, es el estado previo a la acción que no se ha podido aplicar.
+        valid (np.ndarray): Vector booleano que indica si todas las acciones de cada plan se han aplicado.
+        failed_at (np.ndarray): Posición de la primera acción no aplicable de cada plan o -1 si no hay ninguna.
+    """
+    states: 'np.ndarray'
+    valid: 'np.ndarray'
+    failed_at: 'np.ndarray'
+
+
+class VectorizedActions:
+
+    def __init__(self, table: ActionTable):
+        """
+        Clase que representa las acciones de una `ActionTable` como matrices booleanas de NumPy.
+
+        Las precondiciones, listas de añadir y listas de eliminar se guardan como matrices
+        (acciones x propiedades). Así, comprobar qué acciones se pueden aplicar sobre un lote
+        de estados es un único producto de matrices y simular muchos planes a la vez es una
+        operación vectorizada por cada paso de los planes.
+
+        Las acciones se identifican por su posición en la tabla. La posición `len(table)` es una
+        acción vacía que no requiere ni modifica nada y sirve para rellenar planes de distinta longitud.
+
+        Args:
+            table (ActionTable): Tabla de acciones del problema.
+        """
+        if np is None:
+            raise ImportError("NumPy is required for VectorizedActions")
+
+        self.table: ActionTable = table
+        self.encoding = table.encoding
+        self.size: int = len(self.encoding)
+        self.noop: int = len(table)
+        self.positions: Dict[BaseAction, int] = {action.action: i for i, action in enumerate(table.actions)}
+
+        actions = len(table) + 1
+        self.precondition = np.zeros((actions, self.size), dtype=bool)
+        self.add_list = np.zeros((actions, self.size), dtype=bool)
+        self.remove_list = np.zeros((actions, self.size), dtype=bool)
+        for i, action in enumerate(table.actions):
+            self.precondition[i] = self._unpack(action.precondition)
+            self.add_list[i] = self._unpack(action.add_list)
+            self.remove_list[i] = self._unpack(action.remove_list)
+
+        # Número de precondiciones de cada acción, para el producto de matrices de `applicable`.
+        self._precondition_counts = self.precondition.sum(axis=1, dtype=np.int32)
+        self._precondition_matrix = self.precondition.T.astype(np.int32)
+
+    def states(self, states: Iterable[Union[int, State]]) -> 'np.ndarray':
+        """
+        Codifica un lote de estados como una matriz booleana.
+
+        Args:
+            states (Iterable[Union[int, State]]): Estados o máscaras de bits de los estados.
+
+        Returns:
+            np.ndarray: Matriz booleana (estados x propiedades).
+        """
+        masks = [state if isinstance(state, int) else self.encoding.encode(state) for state in states]
+        matrix = np.zeros((len(masks), self.size), dtype=bool)
+        for i, mask in enumerate(masks):
+            # La codificación es compartida y puede haber crecido después de construir las matrices:
+            # sólo se rechazan los estados con propiedades que éstas no contemplan.
+            if mask >> self.size:
+                raise ValueError("States contain properties outside the grounded domain")
+            matrix[i] = self._unpack(mask)
+        return matrix
+
+    def masks(self, states: 'np.ndarray') -> List[int]:
+        """
+        Convierte una matriz booleana de estados en máscaras de bits.
+
+        Args:
+            states (np.ndarray): Matriz booleana (estados x propiedades).
+
+        Returns:
+            List[int]: Máscara de bits de cada estado.
+        """
+        packed = np.packbits(np.atleast_2d(states), axis=1, bitorder='little')
+        return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+
+    def plans(self, plans: Sequence[Actions]) -> 'np.ndarray':
+        """
+        Codifica un lote de planes como una matriz de posiciones de la tabla de acciones.
+
+        Los planes más cortos se rellenan con la acción vacía.
+
+        Args:
+            plans (Sequence[Actions]): Planes a codificar.
+
+        Returns:
+            np.ndarray: Matriz de enteros (planes x longitud del plan más largo).
+        """
+        positions = self.positions
+        length = max((len(plan) for plan in plans), default=0)
+        matrix = np.full((len(plans), length), self.noop, dtype=np.intp)
+        for i, plan in enumerate(plans):
+            try:
+                matrix[i, :len(plan)] = [positions[action] for action in plan]
+            except KeyError as error:
+                raise ValueError(f"Plan {i} contains an action outside the action table: {error}") from None
+        return matrix
+
+    def applicable(self, states: 'np.ndarray') -> 'np.ndarray':
+        """
+        Calcula qué acciones se pueden aplicar sobre cada estado de un lote.
+
+        Una acción es aplicable si el número de sus precondiciones presentes en el estado,
+        que se obtiene con un único producto de matrices, es igual al total de sus precondiciones.
+
+        Args:
+            states (np.ndarray): Matriz booleana (estados x propiedades).
+
+        Returns:
+            np.ndarray: Matriz booleana (estados x acciones), sin la acción vacía.
+        """
+        satisfied = states.astype(np.int32) @ self._precondition_matrix
+        return (satisfied == self._precondition_counts)[:, :self.noop]
+
+    def apply(self, states: 'np.ndarray', actions: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Aplica una acción sobre cada estado de un lote.
+
+        Los estados sobre los que la acción no es aplicable se devuelven sin modificar.
+
+        Args:
+            states (np.ndarray): Matriz booleana (estados x propiedades).
+            actions (np.ndarray): Posición en la tabla de la acción a aplicar sobre cada estado.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Matriz de estados resultantes y vector booleano que
+            indica si la acción se ha podido aplicar sobre cada estado.
+        """
+        valid = ~(self.precondition[actions] & ~states).any(axis=1)
+        following = (states | self.add_list[actions]) & ~self.remove_list[actions]
+        following = np.where(valid[:, None], following, states)
+        return following, valid
+
+    def simulate(self, initial: Union[int, State, 'np.ndarray'], plans: Union[Sequence[Actions], 'np.ndarray']) -> Simulation:
+        """
+        Simula un lote de planes de forma vectorizada.
+
+        En cada paso se aplica a la vez la acción correspondiente de todos los planes que
+        todavía son válidos. Un plan deja de avanzar en su primera acción no aplicable.
+
+        Args:
+            initial (Union[int, State, np.ndarray]): Estado inicial común o matriz con el estado inicial de cada plan.
+            plans (Union[Sequence[Actions], np.ndarray]): Planes o su matriz de posiciones (ver `plans`).
+
+        Returns:
+            Simulation: Estado final de cada plan, si es válido y dónde ha fallado.
+        """
+        if not isinstance(plans, np.ndarray):
+            plans = self.plans(plans)
+
+        if isinstance(initial, np.ndarray):
+            states = np.array(initial, dtype=bool, copy=True)
+        else:
+            states = np.repeat(self.states([initial]), len(plans), axis=0)
+        if len(states) != len(plans):
+            raise ValueError(f"Expected {len(plans)} initial states, got {len(states)}")
+
+        valid = np.ones(len(plans), dtype=bool)
+        failed_at = np.full(len(plans), -1, dtype=np.intp)
+        for step in range(plans.shape[1]):
+            actions = plans[:, step]
+            applicable = valid & ~(self.precondition[actions] & ~states).any(axis=1)
+            failed = valid & ~applicable
+            failed_at[failed] = step
+            valid &= applicable
+
+            following = (states[applicable] | self.add_list[actions[applicable]]) & ~self.remove_list[actions[applicable]]
+            states[applicable] = following
+            if not valid.any():
+                break
+
+        return Simulation(states, valid, failed_at)
+
+    def validate(self, initial: Union[int, State, 'np.ndarray'], goal: Union[int, State],
+                 plans: Union[Sequence[Actions], 'np.ndarray']) -> 'np.ndarray':
+        """
+        Equivalente vectorizado de `plans.is_valid` para un lote de planes.
+
+        Args:
+            initial (Union[int, State, np.ndarray]): Estado inicial común o matriz con el estado inicial de cada plan.
+            goal (Union[int, State]): Estado objetivo.
+            plans (Union[Sequence[Actions], np.ndarray]): Planes o su matriz de posiciones (ver `plans`).
+
+        Returns:
+            np.ndarray: Vector booleano que indica si cada plan es válido y alcanza el objetivo.
+        """
+        simulation = self.simulate(initial, plans)
+        goal = self.states([goal])[0]
+        return simulation.valid & ~(goal & ~simulation.states).any(axis=1)
+
+    def _unpack(self, mask: int) -> 'np.ndarray':
+        """
+        Método privado que convierte una máscara de bits en un vector booleano.
+
+        Args:
+            mask (int): Máscara de bits.
+
+        Returns:
+            np.ndarray: Vector booleano de `size` posiciones.
+        """
+        data = np.frombuffer(mask.to_bytes((self.size + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little', count=self.size).astype(bool)